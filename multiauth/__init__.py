@@ -2,4 +2,4 @@
 
 from multiauth.cli.cli import cli
 from multiauth.lib.store.user import User, UserName
-from multiauth.multiauth import Multiauth, MultiauthConfiguration
+from multiauth.multiauth import AsyncMultiauth, Multiauth, MultiauthConfiguration
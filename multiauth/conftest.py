@@ -0,0 +1,127 @@
+import json
+import os
+import signal
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import pytest
+
+
+class LocalServer(ThreadingHTTPServer):
+    """
+    HTTP server standing in for remote services in tests. It counts the requests it receives by method, and the
+    peak number of requests it handled at once.
+    """
+
+    request_queue_size = 64
+
+    latency: float
+    requests: Counter[str]
+    in_flight: int
+    peak_in_flight: int
+    state: dict[str, Any]  # settings read by the handler
+
+    __lock: threading.Lock
+
+    def __init__(self, handler: type['LocalHandler']) -> None:
+        super().__init__(('127.0.0.1', 0), handler)
+        self.latency = 0
+        self.requests = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.state = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    @contextmanager
+    def track(self, method: str) -> Iterator[None]:
+        with self.__lock:
+            self.requests[method] += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            with self.__lock:
+                self.in_flight -= 1
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    """
+    Replies to every GET and POST request with the JSON payload returned by `respond`, after the server latency.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server: LocalServer
+
+    def respond(self, body: bytes) -> tuple[int, Any, dict[str, str]]:
+        raise NotImplementedError
+
+    def do_GET(self) -> None:
+        self.__dispatch()
+
+    def do_POST(self) -> None:
+        self.__dispatch()
+
+    def __dispatch(self) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with self.server.track(self.command):
+            time.sleep(self.server.latency)
+            status, payload, headers = self.respond(body)
+
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *_: Any) -> None:
+        pass
+
+
+@pytest.fixture()
+def serve() -> Iterator[Callable[[type[LocalHandler]], LocalServer]]:
+    """
+    Start local servers with the provided handlers, shut down at the end of the test.
+    """
+    servers: list[LocalServer] = []
+
+    def start(handler: type[LocalHandler]) -> LocalServer:
+        server = LocalServer(handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def run_in_child(check: Callable[[], bool], timeout_seconds: int = 10) -> bool:
+    """
+    Run a check in a forked child, which is killed if it does not complete in time. Returns whether the check passed.
+    """
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(timeout_seconds)
+        passed = False
+        try:
+            passed = check()
+        finally:
+            os._exit(0 if passed else 1)
+
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,178 @@
+"""Concurrency primitives independent of the library."""
+
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from concurrent.futures import Future
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager, contextmanager
+from typing import Generic, TypeVar
+
+from multiauth.helpers.fork import ForkAware
+
+T = TypeVar('T')
+
+
+class KeyedSemaphore(ForkAware):
+    """
+    Caps the number of threads holding each key at the same time. A `None` limit disables the cap.
+    Keys are always acquired in the same order, so that holders of several keys cannot deadlock.
+    """
+
+    limit: int | None
+
+    __semaphores: dict[str, threading.BoundedSemaphore]
+    __lock: threading.Lock
+
+    def __init__(self, limit: int | None) -> None:
+        super().__init__()
+        self.limit = limit
+        self.__semaphores = {}
+        self.__lock = threading.Lock()
+
+    def _after_fork(self) -> None:
+        # The semaphores may be held by threads that do not exist in the child
+        self.__semaphores = {}
+        self.__lock = threading.Lock()
+
+    def __semaphore(self, key: str, limit: int) -> threading.BoundedSemaphore:
+        with self.__lock:
+            if key not in self.__semaphores:
+                self.__semaphores[key] = threading.BoundedSemaphore(limit)
+            return self.__semaphores[key]
+
+    @contextmanager
+    def acquire(self, keys: Iterable[str]) -> Iterator[None]:
+        if self.limit is None:
+            yield
+            return
+
+        with ExitStack() as stack:
+            for key in sorted(set(keys)):
+                stack.enter_context(self.__semaphore(key, self.limit))
+            yield
+
+
+class AsyncKeyedSemaphore:
+    """
+    Caps the number of tasks holding each key at the same time. A `None` limit disables the cap.
+    Keys are always acquired in the same order, so that holders of several keys cannot deadlock.
+    """
+
+    limit: int | None
+
+    __semaphores: dict[str, asyncio.Semaphore]
+
+    def __init__(self, limit: int | None) -> None:
+        self.limit = limit
+        self.__semaphores = {}
+
+    @asynccontextmanager
+    async def acquire(self, keys: Iterable[str]) -> AsyncIterator[None]:
+        if self.limit is None:
+            yield
+            return
+
+        async with AsyncExitStack() as stack:
+            for key in sorted(set(keys)):
+                semaphore = self.__semaphores.setdefault(key, asyncio.Semaphore(self.limit))
+                await stack.enter_async_context(semaphore)
+            yield
+
+
+class SingleFlight(ForkAware, Generic[T]):
+    """
+    Coalesces concurrent calls sharing the same key: the first caller runs the function while the others wait for,
+    and receive, its result. Calls are not reentrant: a function must not start a call with its own key.
+    """
+
+    calls: int
+    coalesced: int
+
+    __inflight: dict[str, Future[T]]
+    __lock: threading.Lock
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+        self.coalesced = 0
+        self.__inflight = {}
+        self.__lock = threading.Lock()
+
+    def _after_fork(self) -> None:
+        # The calls in flight are run by threads that do not exist in the child: they would never complete
+        self.__inflight = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self.__lock:
+            self.calls += 1
+            inflight = self.__inflight.get(key)
+            if inflight is None:
+                future: Future[T] = Future()
+                self.__inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if inflight is not None:
+            return inflight.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.__settle(key)
+            future.set_exception(e)
+            raise
+
+        self.__settle(key)
+        future.set_result(result)
+        return result
+
+    def __settle(self, key: str) -> None:
+        with self.__lock:
+            del self.__inflight[key]
+
+
+class AsyncSingleFlight(Generic[T]):
+    """
+    Coalesces concurrent coroutines sharing the same key: the first caller awaits the coroutine while the others
+    wait for, and receive, its result. Calls are not reentrant: a coroutine must not start a call with its own key.
+    """
+
+    calls: int
+    coalesced: int
+
+    __inflight: dict[str, asyncio.Future[T]]
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.coalesced = 0
+        self.__inflight = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+
+        inflight = self.__inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            # Shielded, so that a cancelled follower does not cancel the call of the others
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self.__inflight[key] = future
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            del self.__inflight[key]
+            future.cancel()
+            raise
+        except BaseException as e:
+            del self.__inflight[key]
+            future.set_exception(e)
+            # Retrieve the exception, so that it is not reported as never retrieved when nobody waits for it
+            future.exception()
+            raise
+
+        del self.__inflight[key]
+        future.set_result(result)
+        return result
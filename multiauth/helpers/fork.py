@@ -0,0 +1,59 @@
+"""Reset process-local state in the children of a fork."""
+
+import abc
+import gc
+import itertools
+import os
+import weakref
+from collections.abc import Callable
+
+_instances: weakref.WeakValueDictionary[int, 'ForkAware'] = weakref.WeakValueDictionary()
+_counter = itertools.count()
+
+
+class ForkAware(abc.ABC):
+    """
+    Objects holding process-local state: locks, threads or open connections.
+
+    A forked child only keeps the thread that forked: locks held by other threads are never released, background
+    threads are gone, and open connections are shared with the parent. `_after_fork` resets this state in the child,
+    right after the fork. Instances are reset in the order they were created, so that an instance can rely on the
+    instances it was built from having already been reset.
+    """
+
+    def __init__(self) -> None:
+        _instances[next(_counter)] = self
+
+    @abc.abstractmethod
+    def _after_fork(self) -> None:
+        """
+        Reset the process-local state of the instance. Shared data, such as stored authentications, is kept.
+        """
+
+
+def after_fork_in_child(hook: Callable[[], None]) -> None:
+    """
+    Run a hook in every child forked from this process, on platforms supporting it.
+    """
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=hook)
+
+
+def _reset_instances() -> None:
+    for instance in list(_instances.values()):
+        instance._after_fork()
+
+
+def freeze() -> None:
+    """
+    Move every object allocated so far out of the reach of the garbage collector.
+
+    To be called in the parent right before forking workers, once the configuration is loaded and the users are
+    authenticated: collections in the children would otherwise write to the memory pages of every inherited object,
+    copying the procedures, users and authentications into each child.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+after_fork_in_child(_reset_instances)
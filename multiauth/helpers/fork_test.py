@@ -0,0 +1,34 @@
+import threading
+
+from multiauth.conftest import run_in_child
+from multiauth.helpers.concurrency import SingleFlight
+from multiauth.lib.http_core.client import HTTPClientPool
+
+
+def test_children_do_not_wait_for_the_threads_of_the_parent() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def hold() -> int:
+        started.set()
+        release.wait()
+        return 0
+
+    thread = threading.Thread(target=flight.do, args=('key', hold))
+    thread.start()
+    started.wait()
+
+    # The call in flight is run by a thread that does not exist in the child
+    assert run_in_child(lambda: flight.do('key', lambda: 1) == 1)
+
+    release.set()
+    thread.join()
+
+
+def test_children_do_not_inherit_clients() -> None:
+    pool = HTTPClientPool()
+    client = pool.get()
+
+    assert run_in_child(lambda: len(pool) == 0 and pool.get() is not client)
+    assert pool.get() is client
+    pool.close()
@@ -21,6 +21,10 @@ EventType = Literal[
     'selenium_error',
     'procedure_skipped',
     'token_parsed',
+    'token_verified',
+    'token_verification_failed',
+    'expiration_hint',
+    'unresolved_variables',
     'validation_attempted',
     'validation_succeeded',
     'validation_failed',
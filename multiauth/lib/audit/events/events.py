@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Literal
 
 from multiauth.lib.audit.events.base import Event
@@ -54,12 +55,13 @@ class HTTPResponseEvent(Event):
     def logline(self) -> str:
         txt = f' {self.response.status_code} {self.response.reason} in {self.response.elapsed.microseconds//1000}ms\n'
 
-        data_str = 'No data'
-        if self.response.data_text is not None:
-            if len(self.response.data_text) > 100:
-                data_str = self.response.data_text[:100] + '...' + f' ({len(self.response.data_text.encode())} bytes)'
-            else:
-                data_str = self.response.data_text
+        # Only the logged part of large bodies is decoded
+        content = self.response.content
+        if len(content) > 100:
+            head = content[:100].decode(self.response.encoding, errors='ignore')
+            data_str = head + '...' + f' ({len(content)} bytes)'
+        else:
+            data_str = self.response.data_text
 
         for header in self.response.headers:
             for v in header.values:
@@ -168,6 +170,51 @@ class TokenParsedEvent(Event):
         return f'{self.token.type} token parsed: {self.token.raw}. Expiration: {self.token.expiration}'
 
 
+class TokenVerifiedEvent(Event):
+    type: Literal['token_verified'] = 'token_verified'
+    default_severity: Literal['info'] = 'info'
+    token: Token
+
+    @property
+    def logline(self) -> str:
+        return f'{self.token.type} token signature verified: {self.token.raw}'
+
+
+class TokenVerificationFailedEvent(Event):
+    type: Literal['token_verification_failed'] = 'token_verification_failed'
+    default_severity: Literal['error'] = 'error'
+    reason: Literal['invalid_signature', 'unknown_key', 'unverifiable']
+    description: str
+    token: Token
+
+    @property
+    def logline(self) -> str:
+        return f'{self.token.type} token verification failed ({self.reason}): {self.description}'
+
+
+class ExpirationHintEvent(Event):
+    type: Literal['expiration_hint'] = 'expiration_hint'
+    default_severity: Literal['debug'] = 'debug'
+    source: str
+    expiration: datetime
+
+    @property
+    def logline(self) -> str:
+        return f'Expiration hint found in {self.source}: {self.expiration}'
+
+
+class UnresolvedVariablesEvent(Event):
+    type: Literal['unresolved_variables'] = 'unresolved_variables'
+    default_severity: Literal['warning'] = 'warning'
+    step: int
+    names: list[str]
+
+    @property
+    def logline(self) -> str:
+        names = ', '.join(f'`{name}`' for name in self.names)
+        return f'Unresolved variables at step {self.step} of procedure, sent as is: {names}'
+
+
 class ValidationAttemptedEvent(Event):
     type: Literal['validation_attempted'] = 'validation_attempted'
     default_severity: Literal['debug'] = 'debug'
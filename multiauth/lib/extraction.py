@@ -1,14 +1,24 @@
-from pydantic import Field
+from typing import Self
+
+from pydantic import Field, model_validator
 
 from multiauth.helpers.base_model import StrictBaseModel
 from multiauth.lib.http_core.entities import HTTPLocation
+from multiauth.lib.json_path import JSONPath
 from multiauth.lib.presets.base import generate_seeded_slug
 from multiauth.lib.store.variables import VariableName
 
 
 class TokenExtraction(StrictBaseModel):
     location: HTTPLocation = Field(description='The location of the HTTP request where the value should be extracted')
-    key: str = Field(description='The key to use for the extracted value, depending on the location')
+    key: str = Field(
+        description=(
+            'The key to use for the extracted value, depending on the location. For a body location, the key is a path'
+            ' to the value, such as `data.login.tokens[0].access`. A key without any `.`, `[` or `$` is searched at'
+            ' any depth.'
+        ),
+        examples=['Authorization', 'access_token', 'data.login.tokens[0].access'],
+    )
     regex: str | None = Field(
         description='The regex to use to extract the token from the key value. By default the entire value is taken.',
         default=None,
@@ -18,6 +28,20 @@ class TokenExtraction(StrictBaseModel):
         description='The name of the variable to store the extracted value into',
         examples=['my-token'],
     )
+    incremental: bool = Field(
+        default=False,
+        description=(
+            'For a body location, scan the raw body for the key instead of parsing it, and stop at the value. Suited to'
+            ' very large bodies, such as GraphQL responses. Lifetime fields, such as `expires_in`, are then not read'
+            ' from the body.'
+        ),
+    )
+
+    @model_validator(mode='after')
+    def compile_path(self) -> Self:
+        if self.location == HTTPLocation.BODY:
+            JSONPath(self.key)
+        return self
 
     @property
     def slug(self) -> VariableName:
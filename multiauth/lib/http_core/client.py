@@ -0,0 +1,208 @@
+"""Long-lived HTTP clients shared across requests."""
+import asyncio
+import ssl
+import threading
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from types import TracebackType
+
+import httpx
+
+from multiauth.helpers.fork import ForkAware
+from multiauth.lib.http_core.tls import ca_bundle_path, ssl_context
+
+DEFAULT_POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+# Bodies are cut beyond this size
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+
+# (proxy, CA bundle, http2)
+ClientKey = tuple[str | None, str, bool]
+
+
+class _RejectAllCookiesPolicy(DefaultCookiePolicy):
+    """
+    Pooled clients are shared between users: cookies set by a response must never be stored in the client jar,
+    otherwise they would leak into the requests of other users.
+    """
+
+    def set_ok(self, *_: object) -> bool:
+        return False
+
+
+def _cookie_jar() -> CookieJar:
+    return CookieJar(policy=_RejectAllCookiesPolicy())
+
+
+class HTTPClientPool(ForkAware):
+    """
+    Registry of long-lived httpx clients, keyed by proxy, TLS verification settings and HTTP/2 support.
+    Clients keep their connections alive, so that successive requests to the same host reuse them
+    instead of paying a new TCP and TLS handshake every time.
+    """
+
+    limits: httpx.Limits
+    http2: bool
+    max_body_size: int
+
+    __clients: dict[ClientKey, tuple[httpx.Client, ssl.SSLContext]]
+    # Clients replaced after the CA bundle changed may still be in use by other threads: they are closed by `close`
+    __outdated_clients: list[httpx.Client]
+    # Async clients are bound to the event loop their connections were opened in
+    __async_clients: weakref.WeakKeyDictionary[
+        asyncio.AbstractEventLoop,
+        dict[ClientKey, tuple[httpx.AsyncClient, ssl.SSLContext]],
+    ]
+    __outdated_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, list[httpx.AsyncClient]]
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        limits: httpx.Limits | None = None,
+        http2: bool = True,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+    ) -> None:
+        super().__init__()
+        self.limits = limits or DEFAULT_POOL_LIMITS
+        self.http2 = http2
+        self.max_body_size = max_body_size
+
+        self.__clients = {}
+        self.__outdated_clients = []
+        self.__async_clients = weakref.WeakKeyDictionary()
+        self.__outdated_async_clients = weakref.WeakKeyDictionary()
+        self.__lock = threading.Lock()
+
+    def get(self, proxy: str | None = None) -> httpx.Client:
+        """
+        Retrieve the client matching the provided proxy and the current TLS settings, creating it if needed.
+        """
+        key: ClientKey = (proxy, ca_bundle_path(), self.http2)
+        context = ssl_context()
+
+        with self.__lock:
+            client, client_context = self.__clients.get(key, (None, None))
+            if client is None or client.is_closed or client_context is not context:
+                # The CA bundle changed on disk since the client was created
+                if client is not None and not client.is_closed:
+                    self.__outdated_clients.append(client)
+                client = httpx.Client(
+                    http2=self.http2,
+                    trust_env=False,
+                    proxies=proxy,
+                    verify=context,
+                    limits=self.limits,
+                    cookies=_cookie_jar(),
+                )
+                self.__clients[key] = (client, context)
+
+        return client
+
+    def get_async(self, proxy: str | None = None) -> httpx.AsyncClient:
+        """
+        Retrieve the async client matching the provided proxy, the current TLS settings and the running event loop,
+        creating it if needed.
+        """
+        key: ClientKey = (proxy, ca_bundle_path(), self.http2)
+        loop = asyncio.get_running_loop()
+        context = ssl_context()
+
+        with self.__lock:
+            self.__drop_closed_loops()
+            clients = self.__async_clients.setdefault(loop, {})
+            client, client_context = clients.get(key, (None, None))
+            if client is None or client.is_closed or client_context is not context:
+                # Async clients can only be closed from a coroutine: outdated ones are closed by `aclose`
+                if client is not None and not client.is_closed:
+                    self.__outdated_async_clients.setdefault(loop, []).append(client)
+                client = httpx.AsyncClient(
+                    http2=self.http2,
+                    trust_env=False,
+                    proxies=proxy,
+                    verify=context,
+                    limits=self.limits,
+                    cookies=_cookie_jar(),
+                )
+                clients[key] = (client, context)
+
+        return client
+
+    def _after_fork(self) -> None:
+        # The connections of the inherited clients are shared with the parent: they are dropped without being closed,
+        # as closing them could end the sessions of the parent
+        self.__clients = {}
+        self.__outdated_clients = []
+        self.__async_clients = weakref.WeakKeyDictionary()
+        self.__outdated_async_clients = weakref.WeakKeyDictionary()
+        self.__lock = threading.Lock()
+
+    def __drop_closed_loops(self) -> None:
+        # The clients of a closed loop can neither be used nor closed anymore: their connections are released
+        # along with them
+        for loop in [loop for loop in self.__async_clients if loop.is_closed()]:
+            del self.__async_clients[loop]
+        for loop in [loop for loop in self.__outdated_async_clients if loop.is_closed()]:
+            del self.__outdated_async_clients[loop]
+
+    def close(self) -> None:
+        """
+        Close every sync client of the pool, including those replaced after the CA bundle changed, along with their
+        open connections. The pool remains usable: new clients are created on demand.
+        """
+        with self.__lock:
+            clients = [client for client, _ in self.__clients.values()] + self.__outdated_clients
+            self.__clients = {}
+            self.__outdated_clients = []
+
+        for client in clients:
+            client.close()
+
+    async def aclose(self) -> None:
+        """
+        Close every sync client of the pool, and the async clients of the running event loop, along with their open
+        connections. The pool remains usable: new clients are created on demand.
+        """
+        self.close()
+
+        loop = asyncio.get_running_loop()
+        with self.__lock:
+            self.__drop_closed_loops()
+            clients = [client for client, _ in self.__async_clients.pop(loop, {}).values()]
+            clients += self.__outdated_async_clients.pop(loop, [])
+
+        for client in clients:
+            await client.aclose()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            self.__drop_closed_loops()
+            return len(self.__clients) + sum(len(clients) for clients in self.__async_clients.values())
+
+    def __enter__(self) -> 'HTTPClientPool':
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    async def __aenter__(self) -> 'HTTPClientPool':
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+
+_default_client_pool = HTTPClientPool()
+
+
+def default_client_pool() -> HTTPClientPool:
+    """The process-wide pool used when no pool is explicitly provided."""
+    return _default_client_pool
@@ -0,0 +1,109 @@
+import asyncio
+import ssl
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+import pytest
+
+from multiauth.conftest import LocalHandler, LocalServer
+from multiauth.lib.http_core.client import HTTPClientPool, default_client_pool
+from multiauth.lib.http_core.entities import HTTPRequest, HTTPResponse
+from multiauth.lib.http_core.request import send_request
+
+
+def test_pool_reuses_clients() -> None:
+    with HTTPClientPool() as pool:
+        assert pool.get() is pool.get()
+        assert pool.get('http://my-proxy:8080') is not pool.get()
+        assert len(pool) == 2
+
+
+def test_pool_recreates_clients_after_close() -> None:
+    pool = HTTPClientPool()
+    client = pool.get()
+    pool.close()
+
+    assert client.is_closed
+    assert pool.get() is not client
+    pool.close()
+
+
+def test_outdated_clients_are_closed_with_the_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    pool = HTTPClientPool()
+    client = pool.get()
+
+    # The CA bundle changed on disk: other threads may still be sending requests with the outdated client
+    monkeypatch.setattr('multiauth.lib.http_core.client.ssl_context', ssl.create_default_context)
+    assert pool.get() is not client
+    assert not client.is_closed
+
+    pool.close()
+    assert client.is_closed
+
+
+def test_pooled_clients_do_not_store_cookies() -> None:
+    with HTTPClientPool() as pool:
+        client = pool.get()
+        request = httpx.Request('GET', 'https://example.com/login')
+        response = httpx.Response(200, headers={'Set-Cookie': 'session=secret; Path=/'}, request=request)
+
+        client.cookies.extract_cookies(response)
+
+        assert len(client.cookies) == 0
+        assert response.cookies['session'] == 'secret'
+
+
+class OKHandler(LocalHandler):
+    def respond(self, _: bytes) -> tuple[int, Any, dict[str, str]]:
+        return 200, {}, {}
+
+
+def test_requests_use_the_provided_pool(serve: Callable[[type[LocalHandler]], LocalServer]) -> None:
+    server = serve(OKHandler)
+    default_clients = len(default_client_pool())
+
+    # An empty pool must not be mistaken for a missing one
+    with HTTPClientPool() as pool:
+        response = send_request(HTTPRequest.from_url(f'{server.url}/'), pool)
+
+        assert isinstance(response, HTTPResponse)
+        assert len(pool) == 1
+    assert len(default_client_pool()) == default_clients
+
+
+class LargeBodyHandler(LocalHandler):
+    def respond(self, _: bytes) -> tuple[int, Any, dict[str, str]]:
+        return 200, {'page': 'x' * 4096}, {}
+
+
+def test_bodies_are_cut_at_the_maximum_size(serve: Callable[[type[LocalHandler]], LocalServer]) -> None:
+    server = serve(LargeBodyHandler)
+
+    with HTTPClientPool(max_body_size=1024) as pool:
+        response = send_request(HTTPRequest.from_url(f'{server.url}/'), pool)
+        assert isinstance(response, HTTPResponse)
+        assert response.truncated
+        assert len(response.content) == 1024
+        assert response.data_text.startswith('{"page": "xxx')
+        assert response.data_json is None
+
+    with HTTPClientPool() as pool:
+        response = send_request(HTTPRequest.from_url(f'{server.url}/'), pool)
+        assert isinstance(response, HTTPResponse)
+        assert not response.truncated
+        assert response.data_json == {'page': 'x' * 4096}
+
+
+def test_async_clients_are_dropped_with_their_loop() -> None:
+    pool = HTTPClientPool()
+
+    async def get_client() -> httpx.AsyncClient:
+        assert pool.get_async() is pool.get_async()
+        return pool.get_async()
+
+    clients = [asyncio.run(get_client()) for _ in range(20)]
+
+    # Each loop had its own client, released once the loop was closed
+    assert len({id(client) for client in clients}) == len(clients)
+    assert len(pool) == 0
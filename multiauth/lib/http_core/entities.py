@@ -2,15 +2,21 @@
 import datetime
 import enum
 import json
+from dataclasses import dataclass, field
+from functools import cached_property
 from http import HTTPMethod
+from typing import Annotated, Any
 from urllib.parse import quote, urlparse, urlunparse
 
-from pydantic import Field, field_serializer
-
-from multiauth.helpers.base_model import StrictBaseModel
+from pydantic import ConfigDict, Field, GetCoreSchemaHandler, PlainSerializer
+from pydantic_core import core_schema
 
 JSONSerializable = dict | list | str | int | float | bool
 
+# HTTP entities are built in bulk on the request path: they are slotted dataclasses, which pydantic only validates
+# where they are part of a model, i.e. the configuration, the events and the stored authentications
+_ENTITY_CONFIG = ConfigDict(extra='forbid')
+
 
 class HTTPEncoding(enum.StrEnum):
     """The MIME encoding of the HTTP request body."""
@@ -39,7 +45,10 @@ class HTTPScheme(enum.StrEnum):
     HTTPS = 'https'
 
 
-class HTTPHeader(StrictBaseModel):
+@dataclass(slots=True, kw_only=True)
+class HTTPHeader:
+    __pydantic_config__ = _ENTITY_CONFIG
+
     name: str
     values: list[str]
 
@@ -65,7 +74,10 @@ class HTTPHeader(StrictBaseModel):
         return list(headers_dict.values())
 
 
-class HTTPCookie(StrictBaseModel):
+@dataclass(slots=True, kw_only=True)
+class HTTPCookie:
+    __pydantic_config__ = _ENTITY_CONFIG
+
     name: str
     values: list[str]
 
@@ -84,7 +96,10 @@ class HTTPCookie(StrictBaseModel):
         return [HTTPCookie(name=k, values=[v]) for k, v in cookies.items()]
 
 
-class HTTPQueryParameter(StrictBaseModel):
+@dataclass(slots=True, kw_only=True)
+class HTTPQueryParameter:
+    __pydantic_config__ = _ENTITY_CONFIG
+
     name: str
     values: list[str]
 
@@ -99,20 +114,23 @@ class HTTPQueryParameter(StrictBaseModel):
         return [HTTPQueryParameter(name=k, values=[v]) for k, v in query_parameters.items()]
 
 
-class HTTPRequest(StrictBaseModel):
+@dataclass(slots=True, kw_only=True)
+class HTTPRequest:
+    __pydantic_config__ = _ENTITY_CONFIG
+
     method: HTTPMethod
     host: str
     scheme: HTTPScheme
     path: str
-    headers: list[HTTPHeader] = Field(default_factory=list)
-    username: str | None = Field(default=None)
-    password: str | None = Field(default=None)
-    data_json: JSONSerializable | None = Field(default=None)
-    data_text: str | None = Field(default=None)
-    query_parameters: list[HTTPQueryParameter] = Field(default_factory=list)
-    cookies: list[HTTPCookie] = Field(default_factory=list)
-    proxy: str | None = Field(default=None)
-    timeout: int = Field(default=5)
+    headers: list[HTTPHeader] = field(default_factory=list)
+    username: str | None = None
+    password: str | None = None
+    data_json: JSONSerializable | None = None
+    data_text: str | None = None
+    query_parameters: list[HTTPQueryParameter] = field(default_factory=list)
+    cookies: list[HTTPCookie] = field(default_factory=list)
+    proxy: str | None = None
+    timeout: int = 5
 
     def __to_http_document(self) -> str:
         scheme_str = 'HTTP/1.1' if self.scheme.value == 'http' else 'HTTPS/1.1'
@@ -156,19 +174,50 @@ class HTTPRequest(StrictBaseModel):
         return urlunparse((self.scheme.value, self.host, self.path, '', '', ''))
 
 
-class HTTPResponse(StrictBaseModel):
+@dataclass(kw_only=True)
+class HTTPResponse:
+    """
+    The body is kept as received: it is only decoded, as text or JSON, on first access. Responses are not slotted,
+    so that the decoded forms can be cached along with them.
+    """
+
+    __pydantic_config__ = _ENTITY_CONFIG
+
     url: str
     status_code: int
     reason: str
-    elapsed: datetime.timedelta
-    headers: list[HTTPHeader] = Field(default_factory=list)
-    cookies: list[HTTPCookie] = Field(default_factory=list)
-    data_text: str | None = Field(default=None)
-    data_json: JSONSerializable | None = Field(default=None)
-
-    @field_serializer('elapsed')
-    def serialize_elapsed(self, elapsed: datetime.timedelta) -> float:
-        return elapsed.total_seconds()
+    elapsed: Annotated[datetime.timedelta, PlainSerializer(lambda elapsed: elapsed.total_seconds(), return_type=float)]
+    headers: list[HTTPHeader] = field(default_factory=list)
+    cookies: list[HTTPCookie] = field(default_factory=list)
+    # Serialized as `data_text` and `data_json`
+    content: Annotated[bytes, Field(exclude=True)] = b''
+    encoding: str = 'utf-8'
+    # Whether the body was cut at the maximum body size of the client pool
+    truncated: bool = False
+    # Expiration of the cookies set by the response, from their `Max-Age` or `Expires` attributes
+    cookie_expirations: dict[str, datetime.datetime] = field(default_factory=dict)
+
+    @cached_property
+    def data_text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+    @cached_property
+    def data_json(self) -> JSONSerializable | None:
+        # JSON bodies are UTF-8 encoded: they are parsed from the raw bytes, without decoding the text first
+        if not self.content:
+            return None
+        try:
+            return json.loads(self.content)
+        except ValueError:
+            return None
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: type, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        return core_schema.no_info_before_validator_function(
+            _parse_response,
+            handler(source),
+            serialization=core_schema.wrap_serializer_function_ser_schema(_serialize_response),
+        )
 
     def __to_http_document(self) -> str:
         document = f'{self.status_code} {self.reason} ({self.elapsed}s)\n'
@@ -195,3 +244,16 @@ class HTTPResponse(StrictBaseModel):
             document += '\n'
 
         return document
+
+
+def _serialize_response(response: HTTPResponse, serialize: core_schema.SerializerFunctionWrapHandler) -> Any:
+    return serialize(response) | {'data_text': response.data_text, 'data_json': response.data_json}
+
+
+def _parse_response(value: Any) -> Any:
+    # Serialized responses hold their decoded body
+    if isinstance(value, dict) and 'data_text' in value:
+        text = value['data_text'] or ''
+        value = {key: item for key, item in value.items() if key not in ('data_text', 'data_json')}
+        value['content'] = text.encode(value.get('encoding', 'utf-8'))
+    return value
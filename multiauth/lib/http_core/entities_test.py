@@ -1,4 +1,11 @@
-from multiauth.lib.http_core.entities import HTTPCookie
+import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from multiauth.lib.audit.events.events import HTTPResponseEvent
+from multiauth.lib.http_core.entities import HTTPCookie, HTTPHeader, HTTPResponse
+from multiauth.lib.store.user import Credentials
 
 
 def test_cookie_serialization() -> None:
@@ -12,3 +19,21 @@ def test_cookies_serialization() -> None:
         HTTPCookie(name='mycookie2', values=['value3', 'value4']),
     ]
     assert HTTPCookie.serialize(cookies) == 'mycookie=value1%2Cvalue2; mycookie2=value3%2Cvalue4'
+
+
+def test_entities_are_validated_within_models() -> None:
+    response = HTTPResponse(
+        url='https://example.com',
+        status_code=200,
+        reason='OK',
+        elapsed=datetime.timedelta(milliseconds=1500),
+        headers=[HTTPHeader(name='Content-Type', values=['application/json'])],
+    )
+    event = HTTPResponseEvent(response=response)
+
+    assert event.response is response
+    assert event.model_dump()['response']['elapsed'] == 1.5
+    assert HTTPResponseEvent.model_validate(event.model_dump()).response == response
+
+    with pytest.raises(ValidationError):
+        Credentials.model_validate({'headers': [{'name': 'Authorization', 'values': ['token'], 'value': 'token'}]})
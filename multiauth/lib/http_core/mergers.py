@@ -11,7 +11,7 @@ def merge_headers(headers_a: list[HTTPHeader], headers_b: list[HTTPHeader]) -> l
     headers = {h.name: h.values for h in headers_a}
     headers.update({h.name: h.values for h in headers_b})
 
-    return [HTTPHeader(name=name, values=values) for name, values in headers.items()]
+    return [HTTPHeader(name=name, values=list(values)) for name, values in headers.items()]
 
 
 def merge_cookies(cookies_a: list[HTTPCookie], cookies_b: list[HTTPCookie]) -> list[HTTPCookie]:
@@ -20,7 +20,7 @@ def merge_cookies(cookies_a: list[HTTPCookie], cookies_b: list[HTTPCookie]) -> l
     cookies = {c.name: c.values for c in cookies_a}
     cookies.update({c.name: c.values for c in cookies_b})
 
-    return [HTTPCookie(name=name, values=values) for name, values in cookies.items()]
+    return [HTTPCookie(name=name, values=list(values)) for name, values in cookies.items()]
 
 
 def merge_query_parameters(qp_a: list[HTTPQueryParameter], qp_b: list[HTTPQueryParameter]) -> list[HTTPQueryParameter]:
@@ -29,7 +29,7 @@ def merge_query_parameters(qp_a: list[HTTPQueryParameter], qp_b: list[HTTPQueryP
     qp = {c.name: c.values for c in qp_a}
     qp.update({c.name: c.values for c in qp_b})
 
-    return [HTTPQueryParameter(name=name, values=values) for name, values in qp.items()]
+    return [HTTPQueryParameter(name=name, values=list(values)) for name, values in qp.items()]
 
 
 body_merger = Merger(
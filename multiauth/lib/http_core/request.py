@@ -1,10 +1,10 @@
-import json
-from os import getenv
+from datetime import datetime
 from urllib.parse import urlencode, urlunparse
 
 import httpx
 
 from multiauth.lib.audit.events.events import HTTPFailureEvent
+from multiauth.lib.http_core.client import HTTPClientPool, default_client_pool
 from multiauth.lib.http_core.entities import (
     HTTPCookie,
     HTTPHeader,
@@ -15,85 +15,125 @@ from multiauth.lib.http_core.entities import (
 HTTP_REQUEST_TIMEOUT = 5
 
 
-def _request(
-    method: str,
-    url: str,
-    headers: dict[str, str],
-    cookies: dict[str, str],
-    data: str | None = None,
-    timeout: int | None = None,
-    proxy: str | None = None,
-) -> httpx.Response:
-    ca_bundle = getenv('REQUESTS_CA_BUNDLE', '')
-    context = httpx.create_ssl_context(verify=ca_bundle if ca_bundle else True)
-
-    with httpx.Client(
-        http2=True,
-        trust_env=False,
-        proxies=proxy,
-        verify=context,
-    ) as client:
-        return client.request(
-            method=method,
-            url=url,
-            headers=headers,
-            cookies=cookies,
-            content=data,
-            timeout=timeout or 5,
-        )
-
-
-def send_request(request: HTTPRequest) -> HTTPResponse | HTTPFailureEvent:
-    """Send HTTP request."""
-
+def _url(request: HTTPRequest) -> str:
     query_parameters = {qp.name: qp.values for qp in request.query_parameters}
+    return urlunparse((request.scheme.value, request.host, request.path, '', urlencode(query_parameters), ''))
+
+
+def _build_request(client: httpx.Client | httpx.AsyncClient, request: HTTPRequest, url: str) -> httpx.Request:
     headers = {h.name: ','.join(h.values) for h in request.headers}
     cookies = {c.name: ','.join(c.values) for c in request.cookies}
 
-    url = urlunparse((request.scheme.value, request.host, request.path, '', urlencode(query_parameters), ''))
+    # Cookies are sent as a header rather than through the client jar, which is shared between users
+    if cookies and not any(name.lower() == 'cookie' for name in headers):
+        headers = headers | {'Cookie': '; '.join(f'{name}={value}' for name, value in cookies.items())}
 
-    try:
-        response = _request(
-            method=request.method.value,
-            url=url,
-            headers=headers,
-            cookies=cookies,
-            data=request.data_text,
-            timeout=HTTP_REQUEST_TIMEOUT,
-            proxy=request.proxy,
-        )
-    except httpx.TimeoutException as e:
+    return client.build_request(
+        method=request.method.value,
+        url=url,
+        headers=headers,
+        content=request.data_text,
+        timeout=HTTP_REQUEST_TIMEOUT,
+    )
+
+
+def _failure_event(e: Exception) -> HTTPFailureEvent:
+    if isinstance(e, httpx.TimeoutException):
         return HTTPFailureEvent(reason='timeout', description=str(e))
-    except httpx.ConnectError as e:
+    if isinstance(e, httpx.ConnectError):
         return HTTPFailureEvent(reason='connection_error', description=str(e))
-    except httpx.TooManyRedirects as e:
+    if isinstance(e, httpx.TooManyRedirects):
         return HTTPFailureEvent(reason='too_many_redirects', description=str(e))
-    except httpx.HTTPError as e:
-        return HTTPFailureEvent(reason='unknown', description=str(e))
-    except Exception as e:
-        return HTTPFailureEvent(reason='unknown', description=str(e))
+    return HTTPFailureEvent(reason='unknown', description=str(e))
 
-    data_json = None
-    try:
-        data_json = response.json()
-    except json.JSONDecodeError:
-        pass
 
+def _to_http_response(url: str, response: httpx.Response, content: bytes, truncated: bool) -> HTTPResponse:
     response_headers: list[HTTPHeader] = [
-        HTTPHeader(name=name, values=list(value.split(','))) for name, value in response.headers.items()
+        HTTPHeader(name=name, values=value.split(',')) for name, value in response.headers.items()
     ]
 
     response_cookies: list[HTTPCookie] = [
-        HTTPCookie(name=name, values=list(value.split(','))) for name, value in dict(response.cookies).items()
+        HTTPCookie(name=name, values=value.split(',')) for name, value in response.cookies.items()
     ]
 
+    cookie_expirations = {
+        cookie.name: datetime.fromtimestamp(cookie.expires) for cookie in response.cookies.jar if cookie.expires
+    }
+
     return HTTPResponse(
         url=url,
         status_code=response.status_code,
         reason=response.reason_phrase,
         headers=response_headers,
         cookies=response_cookies,
-        data_text=response.text,
-        data_json=data_json,
+        content=content,
+        encoding=response.encoding or 'utf-8',
+        truncated=truncated,
         elapsed=response.elapsed,
+        cookie_expirations=cookie_expirations,
     )
+
+
+def _append_chunk(chunks: list[bytes], size: int, chunk: bytes, max_body_size: int) -> tuple[int, bool]:
+    """
+    Append a chunk of the body, up to the maximum body size. Returns the new size, and whether the body was cut.
+    """
+    if size + len(chunk) > max_body_size:
+        chunks.append(chunk[: max_body_size - size])
+        return max_body_size, True
+    chunks.append(chunk)
+    return size + len(chunk), False
+
+
+def send_request(request: HTTPRequest, client_pool: HTTPClientPool | None = None) -> HTTPResponse | HTTPFailureEvent:
+    """
+    Send HTTP request, reusing a pooled client. The process-wide pool is used if no pool is provided.
+    The body is streamed, and cut at the maximum body size of the pool.
+    """
+
+    url = _url(request)
+    client_pool = client_pool if client_pool is not None else default_client_pool()
+
+    try:
+        client = client_pool.get(request.proxy)
+        response = client.send(_build_request(client, request, url), stream=True)
+        try:
+            chunks: list[bytes] = []
+            size, truncated = 0, False
+            for chunk in response.iter_bytes():
+                size, truncated = _append_chunk(chunks, size, chunk, client_pool.max_body_size)
+                if truncated:
+                    break
+        finally:
+            response.close()
+    except Exception as e:
+        return _failure_event(e)
+
+    return _to_http_response(url, response, b''.join(chunks), truncated)
+
+
+async def send_request_async(
+    request: HTTPRequest,
+    client_pool: HTTPClientPool | None = None,
+) -> HTTPResponse | HTTPFailureEvent:
+    """Send HTTP request from a coroutine, reusing a pooled async client."""
+
+    url = _url(request)
+    client_pool = client_pool if client_pool is not None else default_client_pool()
+
+    try:
+        client = client_pool.get_async(request.proxy)
+        response = await client.send(_build_request(client, request, url), stream=True)
+        try:
+            chunks: list[bytes] = []
+            size, truncated = 0, False
+            async for chunk in response.aiter_bytes():
+                size, truncated = _append_chunk(chunks, size, chunk, client_pool.max_body_size)
+                if truncated:
+                    break
+        finally:
+            await response.aclose()
+    except Exception as e:
+        return _failure_event(e)
+
+    return _to_http_response(url, response, b''.join(chunks), truncated)
@@ -0,0 +1,74 @@
+"""TLS settings shared by every HTTP client of the library."""
+import os
+import ssl
+import threading
+
+import httpx
+
+from multiauth.helpers.fork import after_fork_in_child
+
+# (CA bundle path, bundle modification time)
+SSLContextKey = tuple[str, int | None]
+
+_ssl_contexts: dict[str, tuple[SSLContextKey, ssl.SSLContext]] = {}
+_ssl_contexts_lock = threading.Lock()
+
+
+def _reset_lock() -> None:
+    global _ssl_contexts_lock  # noqa: PLW0603
+    _ssl_contexts_lock = threading.Lock()
+
+
+after_fork_in_child(_reset_lock)
+
+
+def ca_bundle_path() -> str:
+    """The CA bundle configured through the `REQUESTS_CA_BUNDLE` environment variable, if any."""
+    return os.getenv('REQUESTS_CA_BUNDLE', '')
+
+
+def _ssl_context_key(ca_bundle: str) -> SSLContextKey | None:
+    if not ca_bundle:
+        return (ca_bundle, None)
+    try:
+        return (ca_bundle, os.stat(ca_bundle).st_mtime_ns)
+    except OSError:
+        return None
+
+
+def ssl_context() -> ssl.SSLContext:
+    """
+    Return the SSL context matching the configured CA bundle.
+
+    Loading a CA bundle is expensive, so contexts are cached by bundle path and modification time:
+    the bundle is only parsed again when the file changes on disk.
+    """
+    ca_bundle = ca_bundle_path()
+    key = _ssl_context_key(ca_bundle)
+
+    # The bundle cannot be read: let httpx raise the appropriate error
+    if key is None:
+        return httpx.create_ssl_context(verify=ca_bundle)
+
+    with _ssl_contexts_lock:
+        cached = _ssl_contexts.get(ca_bundle)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+    context = httpx.create_ssl_context(verify=ca_bundle if ca_bundle else True)
+
+    with _ssl_contexts_lock:
+        # Another thread may have built the same context meanwhile: keep a single one, so that pooled clients
+        # do not see it as a change of settings
+        cached = _ssl_contexts.get(ca_bundle)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        _ssl_contexts[ca_bundle] = (key, context)
+
+    return context
+
+
+def clear_ssl_contexts() -> None:
+    """Drop every cached SSL context."""
+    with _ssl_contexts_lock:
+        _ssl_contexts.clear()
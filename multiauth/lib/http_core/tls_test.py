@@ -0,0 +1,45 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import certifi
+import pytest
+
+from multiauth.lib.http_core.tls import clear_ssl_contexts, ssl_context
+
+
+@pytest.fixture()
+def ca_bundle(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / 'bundle.pem'
+    shutil.copy(certifi.where(), path)
+    monkeypatch.setenv('REQUESTS_CA_BUNDLE', str(path))
+    clear_ssl_contexts()
+    return path
+
+
+def test_ssl_context_is_cached(ca_bundle: Path) -> None:
+    assert ca_bundle.exists()
+    assert ssl_context() is ssl_context()
+
+
+def test_ssl_context_is_invalidated_when_bundle_changes(ca_bundle: Path) -> None:
+    context = ssl_context()
+
+    stat = ca_bundle.stat()
+    os.utime(ca_bundle, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert ssl_context() is not context
+
+
+def test_ssl_context_without_bundle(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv('REQUESTS_CA_BUNDLE', raising=False)
+    assert ssl_context() is ssl_context()
+
+
+def test_concurrent_misses_share_a_context(ca_bundle: Path) -> None:
+    assert ca_bundle.exists()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        contexts = list(executor.map(lambda _: ssl_context(), range(8)))
+
+    assert all(context is contexts[0] for context in contexts)
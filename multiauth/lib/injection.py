@@ -72,20 +72,20 @@ class TokenInjection(StrictBaseModel):
                     name=self.key,
                     values=[variable.value],
                 )
-            authentication.headers.append(header)
+            authentication = Authentication(headers=[header])
             events.append(InjectedVariableEvent(variable=variable, location=HTTPLocation.HEADER, target=self.key))
         elif self.location == HTTPLocation.COOKIE:
             cookie = HTTPCookie(
                 name=self.key,
                 values=[f'{self.prefix or ""}{variable.value}'],
             )
-            authentication.cookies.append(cookie)
+            authentication = Authentication(cookies=[cookie])
             events.append(InjectedVariableEvent(variable=variable, location=HTTPLocation.COOKIE, target=self.key))
         elif self.location == HTTPLocation.QUERY:
             query_parameter = HTTPQueryParameter(
                 name=self.key,
                 values=[f'{self.prefix or ""}{variable.value}'],
             )
-            authentication.query_parameters.append(query_parameter)
+            authentication = Authentication(query_parameters=[query_parameter])
             events.append(InjectedVariableEvent(variable=variable, location=HTTPLocation.QUERY, target=self.key))
         return authentication, events
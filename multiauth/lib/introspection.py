@@ -0,0 +1,125 @@
+import datetime
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from multiauth.helpers.concurrency import SingleFlight
+from multiauth.helpers.fork import after_fork_in_child
+from multiauth.lib.http_core.client import HTTPClientPool, default_client_pool
+from multiauth.lib.token import OAuthToken, extract_token, introspect
+from multiauth.lib.token_cache import TokenCache, token_digest
+
+# Results without a reported expiry, and inactive tokens, are introspected again after this delay
+DEFAULT_INTROSPECTION_TTL_SECONDS = 60
+DEFAULT_INTROSPECTION_CONCURRENCY = 8
+
+
+class OAuthIntrospectionClient:
+    """
+    Introspects opaque OAuth 2.0 tokens (RFC 7662) with the pooled HTTP client.
+
+    - Results are cached until the expiry reported by the endpoint, or for `ttl_seconds` if none is reported or the
+    token is inactive. Failed introspections are not cached.
+    - Concurrent introspections of the same token share a single request.
+    """
+
+    url: str
+    client_id: str
+    client_secret: str
+    ttl_seconds: float
+    max_concurrency: int
+
+    cache: TokenCache[OAuthToken]
+    client_pool: HTTPClientPool
+
+    __introspections: SingleFlight[OAuthToken | None]
+
+    def __init__(
+        self,
+        url: str,
+        client_id: str = '',
+        client_secret: str = '',
+        client_pool: HTTPClientPool | None = None,
+        ttl_seconds: float = DEFAULT_INTROSPECTION_TTL_SECONDS,
+        max_concurrency: int = DEFAULT_INTROSPECTION_CONCURRENCY,
+    ) -> None:
+        self.url = url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.ttl_seconds = ttl_seconds
+        self.max_concurrency = max_concurrency
+
+        self.cache = TokenCache()
+        self.client_pool = client_pool if client_pool is not None else default_client_pool()
+
+        self.__introspections = SingleFlight()
+
+    def __expiration(self, token: OAuthToken) -> datetime.datetime:
+        default_expiration = datetime.datetime.now() + datetime.timedelta(seconds=self.ttl_seconds)
+        if not token.active or token.expiration is None:
+            return default_expiration
+        return token.expiration
+
+    def __introspect(self, key: str, token: str) -> OAuthToken | None:
+        result = introspect(self.client_pool.get(None), token, self.url, self.client_id, self.client_secret)
+        if result is not None:
+            self.cache.put(key, result, self.__expiration(result))
+        return result
+
+    def introspect(self, token: str) -> OAuthToken | None:
+        """
+        Introspect a token. Returns None if the endpoint could not be reached.
+        """
+        token = extract_token(token)
+        key = token_digest(token)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        return self.__introspections.do(key, lambda: self.__introspect(key, token))
+
+    def introspect_many(self, tokens: Iterable[str]) -> dict[str, OAuthToken | None]:
+        """
+        Introspect a batch of tokens, up to `max_concurrency` at a time.
+        """
+        unique_tokens = list(dict.fromkeys(tokens))
+        if len(unique_tokens) <= 1:
+            return {token: self.introspect(token) for token in unique_tokens}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='multiauth-introspection') as pool:
+            return dict(zip(unique_tokens, pool.map(self.introspect, unique_tokens), strict=True))
+
+    def is_active(self, token: str) -> bool:
+        """
+        Whether a token is active and not expired, according to the introspection endpoint.
+        """
+        result = self.introspect(token)
+        if result is None or not result.active:
+            return False
+        return result.expiration is None or result.expiration > datetime.datetime.now()
+
+
+_introspection_clients: dict[tuple[str, str, str], OAuthIntrospectionClient] = {}
+_introspection_clients_lock = threading.Lock()
+
+
+def _reset_lock() -> None:
+    global _introspection_clients_lock  # noqa: PLW0603
+    _introspection_clients_lock = threading.Lock()
+
+
+after_fork_in_child(_reset_lock)
+
+
+def introspection_client(url: str, client_id: str = '', client_secret: str = '') -> OAuthIntrospectionClient:
+    """
+    The client shared by every introspection of an endpoint with the provided credentials in this process, so that
+    they share a single cache and coalesce their requests.
+    """
+    key = (url, client_id, token_digest(client_secret))
+    with _introspection_clients_lock:
+        client = _introspection_clients.get(key)
+        if client is None:
+            client = _introspection_clients[key] = OAuthIntrospectionClient(url, client_id, client_secret)
+        return client
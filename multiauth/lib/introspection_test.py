@@ -0,0 +1,93 @@
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+from urllib.parse import parse_qs
+
+import pytest
+
+from multiauth.conftest import LocalHandler, LocalServer
+from multiauth.lib.introspection import OAuthIntrospectionClient, introspection_client
+from multiauth.lib.token import OAuthToken, parse_token
+
+
+class IntrospectionHandler(LocalHandler):
+    def respond(self, body: bytes) -> tuple[int, Any, dict[str, str]]:
+        form = parse_qs(body.decode())
+        if form['token'][0].startswith('active-'):
+            return 200, {'active': True, 'exp': int(time.time()) + 60, 'client_id': form['client_id'][0]}, {}
+        return 200, {'active': False}, {}
+
+
+@pytest.fixture()
+def introspection_server(serve: Callable[[type[LocalHandler]], LocalServer]) -> LocalServer:
+    return serve(IntrospectionHandler)
+
+
+def local_introspection_client(server: LocalServer) -> OAuthIntrospectionClient:
+    return OAuthIntrospectionClient(f'{server.url}/introspect', client_id='scanner')
+
+
+def test_introspect(introspection_server: LocalServer) -> None:
+    client = local_introspection_client(introspection_server)
+
+    token = client.introspect('Bearer active-1')
+    assert token is not None
+    assert token.active
+    assert token.client_id == 'scanner'
+    assert client.is_active('active-1')
+    assert not client.is_active('revoked')
+
+    # Results are cached until they expire
+    assert client.introspect('active-1') is token
+    assert introspection_server.requests['POST'] == 2
+
+
+def test_introspections_are_coalesced(introspection_server: LocalServer) -> None:
+    introspection_server.latency = 0.2
+    client = local_introspection_client(introspection_server)
+    barrier = threading.Barrier(5)
+
+    def introspect() -> None:
+        barrier.wait()
+        client.introspect('active-1')
+
+    threads = [threading.Thread(target=introspect) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert introspection_server.requests['POST'] == 1
+
+
+def test_introspect_many(introspection_server: LocalServer) -> None:
+    introspection_server.latency = 0.1
+    client = local_introspection_client(introspection_server)
+    tokens = [f'active-{i}' for i in range(16)] + ['revoked', 'active-0']
+
+    start = time.monotonic()
+    results = client.introspect_many(tokens)
+
+    assert time.monotonic() - start < 1
+    assert len(results) == 17
+    assert all(result is not None and result.active for token, result in results.items() if token != 'revoked')
+    assert introspection_server.requests['POST'] == 17
+
+
+def test_parse_token_shares_the_endpoint_client(introspection_server: LocalServer) -> None:
+    url = f'{introspection_server.url}/introspect'
+    client = introspection_client(url, client_id='scanner')
+    assert introspection_client(url, client_id='scanner') is client
+
+    token = parse_token('active-1', url, client_id='scanner')
+    assert isinstance(token, OAuthToken)
+    assert token.active
+    assert parse_token('active-1', url, client_id='scanner') is token
+    assert introspection_server.requests['POST'] == 1
+
+    # Inactive tokens are not kept beyond the client TTL
+    client.ttl_seconds = 0
+    assert not parse_token('revoked', url, client_id='scanner').active  # type: ignore[union-attr]
+    assert not parse_token('revoked', url, client_id='scanner').active  # type: ignore[union-attr]
+    assert introspection_server.requests['POST'] == 3
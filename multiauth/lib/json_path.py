@@ -0,0 +1,394 @@
+"""
+Path expressions selecting a value within a JSON document, such as `data.login.tokens[0].access`.
+
+- `.name` or `["name"]` selects a member of an object, `[0]` an element of an array.
+- `..name` selects a member with this name at any depth. An object's own member wins over the members nested within
+its values, which are then searched in document order: `{"data": {"token": "a"}, "token": "b"}` selects `b`.
+- A leading `$` is optional. A bare key, without any `.`, `[` or `$`, is searched at any depth: `token` is `$..token`.
+"""
+
+import bisect
+import json
+import re
+from collections.abc import Iterable
+from typing import Any, NamedTuple
+
+_NAME = re.compile(r'[^.\[\]]+')
+_BRACKET = re.compile(r'\[\s*(?:(?P<index>[0-9]+)|"(?P<double>(?:[^"\\]|\\.)*)"|\'(?P<single>[^\']*)\')\s*\]')
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]')
+_DECODER = json.JSONDecoder()
+
+
+class InvalidJSONPathException(ValueError):
+    pass
+
+
+class _Segment(NamedTuple):
+    key: str | int
+    descent: bool
+
+
+class JSONPath:
+    """
+    A compiled path expression. `find` evaluates it against a parsed document, and `scan` against the raw bytes of a
+    document, without parsing anything but the keys on the way to the value. Both stop at the first match.
+    """
+
+    expression: str
+
+    __segments: tuple[_Segment, ...]
+    # Segments before the first descent have a single candidate: missing it misses the whole document
+    __anchored_until: int
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.__segments = _parse(expression)
+        descents = [index for index, segment in enumerate(self.__segments) if segment.descent]
+        self.__anchored_until = descents[0] if descents else len(self.__segments)
+
+    def __repr__(self) -> str:
+        return f'JSONPath({self.expression!r})'
+
+    def find(self, document: Any) -> Any:
+        """
+        Evaluate the path against a parsed document.
+
+        - Raises a `KeyError` if no value matches
+        """
+        found, value = self.__find(document, 0)
+        if not found:
+            raise KeyError(self.expression)
+        return value
+
+    def __find(self, value: Any, position: int) -> tuple[bool, Any]:
+        if position == len(self.__segments):
+            return True, value
+
+        key, descent = self.__segments[position]
+        if isinstance(key, int):
+            if isinstance(value, list) and key < len(value):
+                return self.__find(value[key], position + 1)
+            return False, None
+
+        if not descent:
+            if isinstance(value, dict) and key in value:
+                return self.__find(value[key], position + 1)
+            return False, None
+
+        children: Iterable[Any] = ()
+        if isinstance(value, dict):
+            # The members of the object are matched before the values nested within them
+            if key in value:
+                found, result = self.__find(value[key], position + 1)
+                if found:
+                    return found, result
+            children = value.values()
+        elif isinstance(value, list):
+            children = value
+
+        for child in children:
+            found, result = self.__find(child, position)
+            if found:
+                return found, result
+
+        return False, None
+
+    def scan(self, data: bytes) -> Any:
+        """
+        Evaluate the path against the raw bytes of a document, without building it. Only the keys on the way to the
+        value are read: other values are skipped a member at a time, and the scan stops at the first match.
+
+        - Raises a `KeyError` if no value matches
+        - Raises a `ValueError` if the document is not a JSON object or array, or is malformed on the way to the value
+        """
+        text = data.decode()
+        start = _whitespace(text, 0)
+        if start == len(text) or text[start] not in '{[':
+            raise ValueError('Not a JSON object or array')
+
+        scanner = _Scanner(text, self.__segments, self.__anchored_until)
+        if scanner.missing():
+            raise KeyError(self.expression)
+        try:
+            found, value, _ = scanner.scan(start, 0)
+        except IndexError as e:
+            raise ValueError('Unexpected end of JSON document') from e
+        if not found:
+            raise KeyError(self.expression)
+        return value
+
+
+class _Occurrences:
+    """
+    The occurrences of a key as an object key in the text, with the containers enclosing each of them. They are found
+    with `str.find` as the scan needs them, and brackets are counted once, up to the last occurrence found.
+    """
+
+    text: str
+    positions: list[int]
+    # The start of the value of each occurrence, and the positions of the containers enclosing it, innermost last
+    values: list[int]
+    enclosing: list[tuple[int, ...]]
+
+    __encodings: tuple[str, ...]
+    __exhausted: bool
+    __opened: list[int]
+    __counted: int
+
+    def __init__(self, text: str, key: str) -> None:
+        self.text = text
+        self.positions = []
+        self.values = []
+        self.enclosing = []
+        self.__encodings = tuple({json.dumps(key, ensure_ascii=False), json.dumps(key)})
+        self.__exhausted = False
+        self.__opened = []
+        self.__counted = 0
+
+    def __find(self, start: int) -> tuple[int, int] | None:
+        # Quoted keys cannot occur within strings but escaped
+        text = self.text
+        occurrence: tuple[int, int] | None = None
+        for encoding in self.__encodings:
+            position = text.find(encoding, start)
+            while position != -1 and (occurrence is None or position < occurrence[0]):
+                colon = _whitespace(text, position + len(encoding))
+                if text[position - 1 : position] != '\\' and text[colon : colon + 1] == ':':
+                    occurrence = (position, _whitespace(text, colon + 1))
+                    break
+                position = text.find(encoding, position + 1)
+        return occurrence
+
+    def __extend(self) -> bool:
+        if self.__exhausted:
+            return False
+        occurrence = self.__find(self.values[-1] if self.values else 0)
+        if occurrence is None:
+            self.__exhausted = True
+            return False
+
+        position, value = occurrence
+        for token in _TOKEN.finditer(self.text, self.__counted, position):
+            character = self.text[token.start()]
+            if character in '{[':
+                self.__opened.append(token.start())
+            elif character in '}]':
+                self.__opened.pop()
+        self.__counted = position
+        self.positions.append(position)
+        self.values.append(value)
+        self.enclosing.append(tuple(self.__opened))
+        return True
+
+    def first(self) -> bool:
+        """
+        Whether the key occurs at all.
+        """
+        return bool(self.positions) or self.__extend()
+
+    def after(self, start: int) -> int | None:
+        """
+        The index of the first occurrence after `start`.
+        """
+        while (index := bisect.bisect_left(self.positions, start)) == len(self.positions):
+            if not self.__extend():
+                return None
+        return index
+
+
+class _Scanner:
+    text: str
+    segments: tuple[_Segment, ...]
+    anchored_until: int
+
+    __occurrences: dict[str, _Occurrences]
+
+    def __init__(self, text: str, segments: tuple[_Segment, ...], anchored_until: int) -> None:
+        self.text = text
+        self.segments = segments
+        self.anchored_until = anchored_until
+        self.__occurrences = {}
+
+    def __occurrences_of(self, key: str) -> _Occurrences:
+        occurrences = self.__occurrences.get(key)
+        if occurrences is None:
+            occurrences = self.__occurrences[key] = _Occurrences(self.text, key)
+        return occurrences
+
+    def __encloses(self, key: str, start: int) -> bool:
+        """
+        Whether the value starting at `start` encloses the next occurrence of `key`: others are skipped.
+        """
+        occurrences = self.__occurrences_of(key)
+        index = occurrences.after(start)
+        return index is not None and start in occurrences.enclosing[index]
+
+    def __member(self, key: str, start: int) -> int | None:
+        """
+        The start of the value of the member `key` of the object starting at `start`, if any.
+        """
+        occurrences = self.__occurrences_of(key)
+        index = occurrences.after(start)
+        while index is not None:
+            enclosing = occurrences.enclosing[index]
+            if start not in enclosing:
+                return None
+            if enclosing[-1] == start:
+                return occurrences.values[index]
+            index = occurrences.after(occurrences.positions[index] + 1)
+        return None
+
+    def missing(self) -> bool:
+        """
+        Whether a key searched at any depth never occurs in the text, so that nothing can match.
+        """
+        return any(
+            segment.descent and not self.__occurrences_of(segment.key).first()  # type: ignore[arg-type]
+            for segment in self.segments
+        )
+
+    def scan(self, start: int, position: int) -> tuple[bool, Any, int]:
+        """
+        Scan the value starting at `start`. Returns whether the path matched, the matched value, and the end of the
+        scanned value if it did not match.
+        """
+        text = self.text
+        if position == len(self.segments):
+            value, end = _DECODER.raw_decode(text, start)
+            return True, value, end
+
+        opening = text[start]
+        if opening not in '{[':
+            return False, None, _DECODER.raw_decode(text, start)[1]
+
+        key, descent = self.segments[position]
+        anchored = position < self.anchored_until
+        closing = '}' if opening == '{' else ']'
+
+        cursor = _whitespace(text, start + 1)
+        if text[cursor] == closing:
+            return False, None, cursor + 1
+
+        if descent and opening == '{' and (member := self.__member(key, start)) is not None:  # type: ignore[arg-type]
+            # The members of the object are matched before the values nested within them
+            found, value, end = self.scan(member, position + 1)
+            if found:
+                return found, value, end
+
+        index = 0
+        while True:
+            name: str | int
+            if opening == '{':
+                name, cursor = _key(text, cursor)
+                cursor = _whitespace(text, cursor)
+                if text[cursor] != ':':
+                    raise ValueError(f'Expected `:` at position {cursor}')
+                cursor = _whitespace(text, cursor + 1)
+            else:
+                name, index = index, index + 1
+
+            if descent:
+                if self.__encloses(key, cursor):  # type: ignore[arg-type]
+                    found, value, cursor = self.scan(cursor, position)
+                    if found:
+                        return found, value, cursor
+                else:
+                    cursor = _skip(text, cursor)
+            elif name == key:
+                found, value, cursor = self.scan(cursor, position + 1)
+                if found:
+                    return found, value, cursor
+                if anchored:
+                    raise KeyError(key)
+            else:
+                cursor = _skip(text, cursor)
+
+            cursor = _whitespace(text, cursor)
+            if text[cursor] == closing:
+                return False, None, cursor + 1
+            if text[cursor] != ',':
+                raise ValueError(f'Expected `,` at position {cursor}')
+            cursor = _whitespace(text, cursor + 1)
+
+
+def _parse(expression: str) -> tuple[_Segment, ...]:
+    if expression == '':
+        raise InvalidJSONPathException('Empty JSON path')
+    if not any(character in expression for character in '.[$'):
+        return (_Segment(expression, descent=True),)
+
+    segments: list[_Segment] = []
+    cursor = 1 if expression.startswith('$') else 0
+    while cursor < len(expression):
+        descent = expression.startswith('..', cursor)
+        if descent:
+            cursor += 2
+        elif expression[cursor] == '.':
+            cursor += 1
+        elif expression[cursor] != '[' and cursor > 0:
+            raise InvalidJSONPathException(f'Unexpected `{expression[cursor]}` at position {cursor} in {expression}')
+
+        key: str | int
+        if (bracket := _BRACKET.match(expression, cursor)) is not None:
+            if bracket['index'] is not None:
+                if descent:
+                    raise InvalidJSONPathException(f'Indexes cannot follow `..` in {expression}')
+                key = int(bracket['index'])
+            elif bracket['double'] is not None:
+                key = json.loads(f'"{bracket["double"]}"')
+            else:
+                key = bracket['single']
+            cursor = bracket.end()
+        elif (name := _NAME.match(expression, cursor)) is not None:
+            key = name.group()
+            cursor = name.end()
+        else:
+            raise InvalidJSONPathException(f'Expected a key at position {cursor} in {expression}')
+
+        segments.append(_Segment(key, descent))
+
+    return tuple(segments)
+
+
+def _whitespace(text: str, start: int) -> int:
+    return _WHITESPACE.match(text, start).end()  # type: ignore[union-attr]
+
+
+def _key(text: str, start: int) -> tuple[str, int]:
+    match = _STRING.match(text, start)
+    if match is None:
+        raise ValueError(f'Expected a key at position {start}')
+    raw = match.group()
+    key = json.loads(raw) if '\\' in raw else raw[1:-1]
+    return key, match.end()
+
+
+def _skip(text: str, start: int) -> int:
+    """
+    The end of the value starting at `start`. The members of containers are decoded one at a time and dropped, so that
+    skipping a large array of small objects does not hold them all.
+    """
+    opening = text[start]
+    if opening not in '{[':
+        return _DECODER.raw_decode(text, start)[1]
+
+    closing = '}' if opening == '{' else ']'
+    cursor = _whitespace(text, start + 1)
+    if text[cursor] == closing:
+        return cursor + 1
+
+    while True:
+        if opening == '{':
+            cursor = _whitespace(text, _key(text, cursor)[1])
+            if text[cursor] != ':':
+                raise ValueError(f'Expected `:` at position {cursor}')
+            cursor = _whitespace(text, cursor + 1)
+        cursor = _whitespace(text, _DECODER.raw_decode(text, cursor)[1])
+        if text[cursor] == closing:
+            return cursor + 1
+        if text[cursor] != ',':
+            raise ValueError(f'Expected `,` at position {cursor}')
+        cursor = _whitespace(text, cursor + 1)
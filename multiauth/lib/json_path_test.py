@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from multiauth.lib.json_path import InvalidJSONPathException, JSONPath
+
+DOCUMENT = {
+    'data': {
+        'login': {'tokens': [{'access': 'first'}, {'access': 'second'}], 'ttl': 0, 'refreshable': False},
+        'user': {'access': 'nested', 'roles': [{'name': 'admin'}]},
+    },
+    'access': 'top',
+}
+
+
+@pytest.mark.parametrize(
+    ('expression', 'value'),
+    [
+        ('data.login.tokens[0].access', 'first'),
+        ('$.data.login.tokens[1].access', 'second'),
+        ('data["login"][\'ttl\']', 0),
+        ('data.login.refreshable', False),
+        ('data..access', 'first'),
+        ('..roles[0].name', 'admin'),
+        ('access', 'top'),
+        ('$.access', 'top'),
+        ('$', DOCUMENT),
+    ],
+)
+def test_find_and_scan(expression: str, value: object) -> None:
+    path = JSONPath(expression)
+
+    assert path.find(DOCUMENT) == value
+    assert path.scan(json.dumps(DOCUMENT, indent=2).encode()) == value
+
+
+@pytest.mark.parametrize('expression', ['data.login.tokens[2].access', 'data.access', 'data.user.roles.name', 'secret'])
+def test_missing(expression: str) -> None:
+    path = JSONPath(expression)
+
+    with pytest.raises(KeyError):
+        path.find(DOCUMENT)
+    with pytest.raises(KeyError):
+        path.scan(json.dumps(DOCUMENT).encode())
+
+
+@pytest.mark.parametrize(
+    ('document', 'value'),
+    [
+        ({'data': {'token': 'nested'}, 'token': 'top'}, 'top'),
+        ({'data': {'user': {'token': 'deep'}, 'token': 'shallow'}}, 'shallow'),
+        ({'data': [{'user': {'token': 'first'}}, {'token': 'second'}]}, 'first'),
+    ],
+)
+def test_bare_keys_prefer_shallow_members(document: dict, value: str) -> None:
+    path = JSONPath('token')
+
+    assert path.find(document) == value
+    assert path.scan(json.dumps(document).encode()) == value
+
+
+def test_scan_stops_at_the_value() -> None:
+    path = JSONPath('data.login.token')
+
+    # The body is cut after the value: it could not be parsed
+    assert path.scan(b'{"data": {"login": {"token": "abc"}, "items": [{"id": 1}, {"i') == 'abc'
+    assert path.scan(b'{"items": [{"id": "{\\"token\\": 1}"}], "data": {"login": {"token": "abc"}}}') == 'abc'
+    with pytest.raises(ValueError, match='Not a JSON object or array'):
+        path.scan(b'<html></html>')
+
+
+@pytest.mark.parametrize('expression', ['', 'data..', '$data', 'data[0', '..[0]', 'data.login]'])
+def test_invalid(expression: str) -> None:
+    with pytest.raises(InvalidJSONPathException):
+        JSONPath(expression)
@@ -0,0 +1,266 @@
+import base64
+import json
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from multiauth.helpers.concurrency import SingleFlight
+from multiauth.helpers.fork import ForkAware
+from multiauth.lib.http_core.client import HTTPClientPool
+from multiauth.lib.http_core.entities import HTTPRequest, HTTPResponse
+from multiauth.lib.http_core.request import send_request
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    CRYPTOGRAPHY_AVAILABLE = False
+
+CRYPTOGRAPHY_REQUIRED = 'The `cryptography` package is required to verify tokens: install `py-multiauth[jwks]`.'
+
+DEFAULT_JWKS_TTL_SECONDS = 60 * 60
+DEFAULT_JWKS_NEGATIVE_TTL_SECONDS = 60
+
+PublicKey = Any
+
+
+class JWKSException(Exception):
+    pass
+
+
+class UnknownKeyException(JWKSException):
+    kid: str | None
+
+    def __init__(self, kid: str | None) -> None:
+        self.kid = kid
+
+    def __str__(self) -> str:
+        return f'No key with id `{self.kid}` in the JSON Web Key Set.'
+
+
+class InvalidSignatureException(JWKSException):
+    pass
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def _b64url_int(segment: str) -> int:
+    return int.from_bytes(_b64url_decode(segment), 'big')
+
+
+def load_jwk(jwk: dict[str, Any]) -> PublicKey:
+    """Load the public key of a JSON Web Key. Supports RSA, EC (P-256, P-384, P-521) and Ed25519 keys."""
+
+    if not CRYPTOGRAPHY_AVAILABLE:
+        raise JWKSException(CRYPTOGRAPHY_REQUIRED)
+
+    match jwk.get('kty'):
+        case 'RSA':
+            return rsa.RSAPublicNumbers(_b64url_int(jwk['e']), _b64url_int(jwk['n'])).public_key()
+        case 'EC':
+            curves: dict[str, Callable[[], ec.EllipticCurve]] = {
+                'P-256': ec.SECP256R1,
+                'P-384': ec.SECP384R1,
+                'P-521': ec.SECP521R1,
+            }
+            curve = curves.get(jwk.get('crv', ''))
+            if curve is None:
+                raise JWKSException(f'Unsupported elliptic curve `{jwk.get("crv")}`.')
+            return ec.EllipticCurvePublicNumbers(_b64url_int(jwk['x']), _b64url_int(jwk['y']), curve()).public_key()
+        case 'OKP' if jwk.get('crv') == 'Ed25519':
+            return ed25519.Ed25519PublicKey.from_public_bytes(_b64url_decode(jwk['x']))
+
+    raise JWKSException(f'Unsupported key type `{jwk.get("kty")}`.')
+
+
+def verify_signature(key: PublicKey, algorithm: str, signing_input: bytes, signature: bytes) -> None:
+    """
+    Verify the signature of a JWT with a public key.
+
+    - Raises an `InvalidSignatureException` if the signature does not match.
+    - Raises a `JWKSException` if the algorithm is not supported. Symmetric algorithms (HS*) cannot be verified
+    with a public key.
+    """
+    if not CRYPTOGRAPHY_AVAILABLE:
+        raise JWKSException(CRYPTOGRAPHY_REQUIRED)
+
+    digests: dict[str, Callable[[], hashes.HashAlgorithm]] = {
+        '256': hashes.SHA256,
+        '384': hashes.SHA384,
+        '512': hashes.SHA512,
+    }
+
+    try:
+        if algorithm[:2] in ('RS', 'PS') and algorithm[2:] in digests and isinstance(key, rsa.RSAPublicKey):
+            digest = digests[algorithm[2:]]()
+            if algorithm.startswith('RS'):
+                key.verify(signature, signing_input, padding.PKCS1v15(), digest)
+            else:
+                key.verify(signature, signing_input, padding.PSS(padding.MGF1(digest), digest.digest_size), digest)
+        elif algorithm[:2] == 'ES' and algorithm[2:] in digests and isinstance(key, ec.EllipticCurvePublicKey):
+            # JWS signatures are the raw concatenation of r and s
+            size = len(signature) // 2
+            der = encode_dss_signature(int.from_bytes(signature[:size], 'big'), int.from_bytes(signature[size:], 'big'))
+            key.verify(der, signing_input, ec.ECDSA(digests[algorithm[2:]]()))
+        elif algorithm == 'EdDSA' and isinstance(key, ed25519.Ed25519PublicKey):
+            key.verify(signature, signing_input)
+        else:
+            raise JWKSException(f'Unsupported algorithm `{algorithm}` for the provided key.')
+    except InvalidSignature as e:
+        raise InvalidSignatureException('Invalid token signature.') from e
+
+
+class JWKSClient(ForkAware):
+    """
+    Verifies JWT signatures against the keys published at a JSON Web Key Set URL.
+
+    - Keys are fetched with the pooled HTTP client, and cached by key id for `ttl_seconds`.
+    - A token signed with an unknown key id triggers a refetch. Key ids still unknown after the refetch, and failed
+    fetches, are cached for `negative_ttl_seconds`, so that bad tokens do not cost a round trip each.
+    - Concurrent refetches are coalesced.
+    - Raises a `JWKSException` at creation if the `jwks` extra is not installed, rather than reporting every token
+    as unverifiable.
+    """
+
+    url: str
+    ttl_seconds: float
+    negative_ttl_seconds: float
+    client_pool: HTTPClientPool | None
+    fetches: int
+
+    __keys: dict[str | None, PublicKey]
+    __fetched_at: float | None
+    __failed_at: float | None
+    __unknown: dict[str | None, float]
+    __lock: threading.Lock
+    __fetch: SingleFlight[None]
+
+    def __init__(
+        self,
+        url: str,
+        client_pool: HTTPClientPool | None = None,
+        ttl_seconds: float = DEFAULT_JWKS_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_JWKS_NEGATIVE_TTL_SECONDS,
+    ) -> None:
+        if not CRYPTOGRAPHY_AVAILABLE:
+            raise JWKSException(CRYPTOGRAPHY_REQUIRED)
+
+        super().__init__()
+        self.url = url
+        self.client_pool = client_pool
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.fetches = 0
+
+        self.__keys = {}
+        self.__fetched_at = None
+        self.__failed_at = None
+        self.__unknown = {}
+        self.__lock = threading.Lock()
+        self.__fetch = SingleFlight()
+
+    def _after_fork(self) -> None:
+        self.__lock = threading.Lock()
+
+    def __is_fresh(self, fetched_at: float | None, ttl_seconds: float) -> bool:
+        return fetched_at is not None and time.monotonic() - fetched_at < ttl_seconds
+
+    def __refresh(self) -> None:
+        with self.__lock:
+            self.fetches += 1
+
+        response = send_request(HTTPRequest.from_url(self.url), self.client_pool)
+        if not isinstance(response, HTTPResponse) or response.status_code >= 400:
+            with self.__lock:
+                self.__failed_at = time.monotonic()
+            raise JWKSException(f'Could not fetch the JSON Web Key Set at `{self.url}`.')
+
+        keys: dict[str | None, PublicKey] = {}
+        document = response.data_json if isinstance(response.data_json, dict) else {}
+        for jwk in document.get('keys', []):
+            if not isinstance(jwk, dict) or jwk.get('use', 'sig') != 'sig':
+                continue
+            try:
+                keys[jwk.get('kid')] = load_jwk(jwk)
+            except (JWKSException, KeyError, ValueError):
+                continue
+
+        with self.__lock:
+            self.__keys = keys
+            self.__fetched_at = time.monotonic()
+            self.__failed_at = None
+            self.__unknown = {}
+
+    def get_key(self, kid: str | None) -> PublicKey:
+        """
+        Return the key with the provided id. Tokens without key id are accepted if the set holds a single key.
+
+        - Raises an `UnknownKeyException` if no such key is published.
+        - Raises a `JWKSException` if the key set cannot be fetched.
+        """
+        with self.__lock:
+            keys = self.__keys
+            fresh = self.__is_fresh(self.__fetched_at, self.ttl_seconds)
+            failed = self.__is_fresh(self.__failed_at, self.negative_ttl_seconds)
+            unknown = self.__is_fresh(self.__unknown.get(kid), self.negative_ttl_seconds)
+
+        if fresh and (key := self.__lookup(keys, kid)) is not None:
+            return key
+        if unknown:
+            raise UnknownKeyException(kid)
+        if failed:
+            # Serve the outdated keys while the key set cannot be fetched
+            if (key := self.__lookup(keys, kid)) is not None:
+                return key
+            raise JWKSException(f'Could not fetch the JSON Web Key Set at `{self.url}`.')
+
+        try:
+            self.__fetch.do(self.url, self.__refresh)
+        except JWKSException:
+            if (key := self.__lookup(keys, kid)) is not None:
+                return key
+            raise
+
+        with self.__lock:
+            key = self.__lookup(self.__keys, kid)
+            if key is None:
+                self.__unknown[kid] = time.monotonic()
+        if key is None:
+            raise UnknownKeyException(kid)
+        return key
+
+    @staticmethod
+    def __lookup(keys: dict[str | None, PublicKey], kid: str | None) -> PublicKey | None:
+        if kid is None and len(keys) == 1:
+            return next(iter(keys.values()))
+        return keys.get(kid)
+
+    def verify(self, token: str) -> dict[str, Any]:
+        """
+        Verify the signature of a JWT, and return its claims.
+
+        - Raises an `InvalidSignatureException` if the signature does not match the published key.
+        - Raises a `JWKSException` if the token is malformed, or cannot be verified.
+        """
+        try:
+            header_segment, payload_segment, signature_segment = token.split('.')
+            header = json.loads(_b64url_decode(header_segment))
+            claims = json.loads(_b64url_decode(payload_segment))
+            signature = _b64url_decode(signature_segment)
+        except ValueError as e:
+            raise JWKSException('Malformed token.') from e
+
+        algorithm = header.get('alg')
+        if not isinstance(algorithm, str) or algorithm == 'none':
+            raise JWKSException('Unsecured tokens cannot be verified.')
+
+        key = self.get_key(header.get('kid'))
+        verify_signature(key, algorithm, f'{header_segment}.{payload_segment}'.encode(), signature)
+        return claims
@@ -0,0 +1,99 @@
+import base64
+import json
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+from cryptography.hazmat.primitives import hashes  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature  # noqa: E402
+
+from multiauth.conftest import LocalHandler, LocalServer  # noqa: E402
+from multiauth.lib.jwks import InvalidSignatureException, JWKSClient, UnknownKeyException  # noqa: E402
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def b64url_int(value: int) -> str:
+    return b64url(value.to_bytes((value.bit_length() + 7) // 8, 'big'))
+
+
+class JWKSHandler(LocalHandler):
+    def respond(self, _: bytes) -> tuple[int, Any, dict[str, str]]:
+        return 200, {'keys': self.server.state['keys']}, {}
+
+
+@pytest.fixture()
+def jwks_server(serve: Callable[[type[LocalHandler]], LocalServer]) -> LocalServer:
+    server = serve(JWKSHandler)
+    server.state['keys'] = []
+    return server
+
+
+def jwks_url(server: LocalServer) -> str:
+    return f'{server.url}/.well-known/jwks.json'
+
+
+def rsa_jwk(key: rsa.RSAPrivateKey, kid: str) -> dict[str, str]:
+    numbers = key.public_key().public_numbers()
+    return {'kty': 'RSA', 'kid': kid, 'use': 'sig', 'n': b64url_int(numbers.n), 'e': b64url_int(numbers.e)}
+
+
+def ec_jwk(key: ec.EllipticCurvePrivateKey, kid: str) -> dict[str, str]:
+    numbers = key.public_key().public_numbers()
+    return {'kty': 'EC', 'kid': kid, 'crv': 'P-256', 'x': b64url_int(numbers.x), 'y': b64url_int(numbers.y)}
+
+
+def sign(key: rsa.RSAPrivateKey | ec.EllipticCurvePrivateKey, algorithm: str, kid: str) -> str:
+    header = b64url(json.dumps({'alg': algorithm, 'kid': kid, 'typ': 'JWT'}).encode())
+    payload = b64url(json.dumps({'sub': 'user'}).encode())
+    signing_input = f'{header}.{payload}'.encode()
+
+    if isinstance(key, rsa.RSAPrivateKey):
+        signature = key.sign(signing_input, padding.PKCS1v15(), hashes.SHA256())
+    else:
+        r, s = decode_dss_signature(key.sign(signing_input, ec.ECDSA(hashes.SHA256())))
+        signature = r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
+
+    return f'{header}.{payload}.{b64url(signature)}'
+
+
+def test_verify(jwks_server: LocalServer) -> None:
+    rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    jwks_server.state['keys'] = [rsa_jwk(rsa_key, 'rsa'), ec_jwk(ec_key, 'ec')]
+    jwks = JWKSClient(jwks_url(jwks_server))
+
+    assert jwks.verify(sign(rsa_key, 'RS256', 'rsa')) == {'sub': 'user'}
+    assert jwks.verify(sign(ec_key, 'ES256', 'ec')) == {'sub': 'user'}
+
+    with pytest.raises(InvalidSignatureException):
+        jwks.verify(sign(rsa.generate_private_key(public_exponent=65537, key_size=2048), 'RS256', 'rsa'))
+
+    # Keys are fetched once for all the tokens
+    assert jwks_server.requests['GET'] == 1
+
+
+def test_unknown_key_ids(jwks_server: LocalServer) -> None:
+    old_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwks_server.state['keys'] = [rsa_jwk(old_key, 'old')]
+    jwks = JWKSClient(jwks_url(jwks_server))
+
+    jwks.verify(sign(old_key, 'RS256', 'old'))
+
+    # A rotated key triggers a refetch
+    jwks_server.state['keys'] = [rsa_jwk(new_key, 'new')]
+    jwks.verify(sign(new_key, 'RS256', 'new'))
+    assert jwks_server.requests['GET'] == 2
+
+    # Key ids still unknown after a refetch are not fetched again until the negative cache expires
+    for _ in range(3):
+        with pytest.raises(UnknownKeyException):
+            jwks.verify(sign(new_key, 'RS256', 'missing'))
+    assert jwks_server.requests['GET'] == 3
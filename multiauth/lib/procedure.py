@@ -7,13 +7,19 @@ from pydantic import Field
 from multiauth.helpers.base_model import StrictBaseModel
 from multiauth.lib.audit.events.base import EventsList
 from multiauth.lib.audit.events.events import (
+    ExpirationHintEvent,
     ProcedureAbortedEvent,
     ProcedureEndedEvent,
     ProcedureStartedEvent,
     TokenParsedEvent,
+    TokenVerificationFailedEvent,
+    TokenVerifiedEvent,
+    UnresolvedVariablesEvent,
 )
 from multiauth.lib.entities import ProcedureName, VariableName
+from multiauth.lib.http_core.client import HTTPClientPool
 from multiauth.lib.injection import TokenInjection
+from multiauth.lib.jwks import InvalidSignatureException, JWKSClient, JWKSException, UnknownKeyException
 from multiauth.lib.runners.base import BaseRunner, RunnerException
 from multiauth.lib.runners.digest import DigestRunnerConfiguration
 from multiauth.lib.runners.http import HTTPRunnerConfiguration
@@ -21,7 +27,7 @@ from multiauth.lib.runners.webdriver.runner import SeleniumRunnerConfiguration
 from multiauth.lib.store.authentication import Authentication
 from multiauth.lib.store.user import User
 from multiauth.lib.store.variables import AuthenticationVariable
-from multiauth.lib.token import parse_token
+from multiauth.lib.token import Token, TokenType, parse_token
 
 ISOExpirationTimestamp = NewType('ISOExpirationTimestamp', str)
 
@@ -65,60 +71,128 @@ class ProcedureConfiguration(StrictBaseModel, abc.ABC):
             'into the user authentication.'
         ),
     )
+    jwks_url: str | None = Field(
+        default=None,
+        description=(
+            'The URL of the JSON Web Key Set of the identity provider. If provided, the signature of the JWT '
+            'tokens obtained by the procedure is verified against the published keys, and verification failures '
+            'are reported as events. Keys are cached, so that verification does not add a request per token. '
+            'Requires the `jwks` extra: `pip install py-multiauth[jwks]`.'
+        ),
+    )
 
 
-class Procedure:
+class ProcedureRun:
     """
-    Agnostic procedure executor that can run a list of requests and extract variables from the responses
+    State of a single run of a procedure for a user: the variables extracted, the expirations announced by the
+    operations, and the events recorded so far.
     """
 
-    configuration: ProcedureConfiguration
-    runners: list[BaseRunner]
-    events: EventsList
-
-    # The dictionnary where the extracted variables are stored
+    user: User
     variables: dict[VariableName, AuthenticationVariable]
+    expiration_hints: list[datetime]
+    events: EventsList
 
-    def __init__(self, configuration: ProcedureConfiguration):
-        self.configuration = configuration
-
-        self.runners = []
+    def __init__(self, procedure_name: ProcedureName, user: User) -> None:
+        self.user = user
         self.variables = {}
+        self.expiration_hints = []
         self.events = EventsList()
+        self.events.append(ProcedureStartedEvent(user_name=user.name, procedure_name=procedure_name))
 
-        for request in self.configuration.operations:
-            self.runners.append(request.get_runner())
+    def interpolate(self, step: int, runner: BaseRunner) -> BaseRunner:
+        """
+        Interpolate the operation with the variables of the user, then the variables extracted so far.
+        Placeholders that no variable resolves are reported, and sent as is.
+        """
+        variables = list(reversed(list(self.variables.values()) + self.user.variables))
+        unresolved = runner.unresolved(variables)
+        if unresolved:
+            self.events.append(UnresolvedVariablesEvent(step=step, names=sorted(unresolved)))
+        return runner.interpolate(variables)
 
-    def inject(self, user: User) -> tuple[Authentication, EventsList, datetime]:
+    def record(
+        self,
+        step: int,
+        step_variables: list[AuthenticationVariable],
+        step_events: EventsList,
+        error: RunnerException | None,
+    ) -> None:
+        self.events.extend(step_events)
+        self.expiration_hints.extend(
+            event.expiration for event in step_events if isinstance(event, ExpirationHintEvent)
+        )
+
+        for variable in step_variables:
+            self.variables[variable.name] = variable
+
+        if error is not None:
+            self.events.append(
+                ProcedureAbortedEvent(
+                    reason='runner_error',
+                    description=f'Runner error at step {step} of procedure: {error}',
+                ),
+            )
+
+
+class Procedure:
+    """
+    Agnostic procedure executor that can run a list of requests and extract variables from the responses.
+    A procedure holds no state of its own: every run has its own `ProcedureRun`, so that a procedure can be shared
+    by concurrent runs.
+    """
+
+    configuration: ProcedureConfiguration
+    runners: tuple[BaseRunner, ...]
+    jwks: JWKSClient | None
+
+    def __init__(self, configuration: ProcedureConfiguration, client_pool: HTTPClientPool | None = None):
+        self.configuration = configuration
+        self.runners = tuple(request.get_runner(client_pool) for request in self.configuration.operations)
+        self.jwks = JWKSClient(configuration.jwks_url, client_pool) if configuration.jwks_url else None
+
+    @property
+    def hosts(self) -> set[str]:
         """
-        Inject the variables extracted from the procedure into the user's authentication. Injections are performed
-        using the stored variables, so the procedure requests must have been run before calling this method.
+        The hosts targeted by the operations of the procedure.
+        """
+        return set().union(*(runner.hosts for runner in self.runners))
+
+    def inject(
+        self,
+        user: User,
+        variables: dict[VariableName, AuthenticationVariable],
+        expiration_hints: list[datetime] | None = None,
+    ) -> tuple[Authentication, EventsList, datetime]:
+        """
+        Inject the variables extracted during a run of the procedure into the user's authentication.
+        The authentication expires with the first expiring token, or expiration hint announced by the operations.
         """
         events = EventsList()
         authentication = Authentication.empty()
 
         for injection in self.configuration.injections:
-            injected_authentication, injection_events = injection.inject(list(self.variables.values()))
+            injected_authentication, injection_events = injection.inject(list(variables.values()))
             events.extend(injection_events)
             authentication = Authentication.merge(authentication, injected_authentication)
 
-        self.events.extend(events)
-
         # If the user has a session_ttl_seconds set, use it to compute the expiration date
         if user.session_ttl_seconds is not None:
             expiration = datetime.now() + timedelta(seconds=user.session_ttl_seconds)
         else:  # Otherwise, infer the expiration date of the first expiring token
-            expirations: list[datetime] = []
-            for variable in self.variables.values():
+            expirations: list[datetime] = list(expiration_hints or [])
+            for variable in variables.values():
                 token = parse_token(variable.value)
                 if token is None:
                     continue
 
-                self.events.append(TokenParsedEvent(token=token))
+                events.append(TokenParsedEvent(token=token))
+                if self.jwks is not None and token.type == TokenType.JWT:
+                    events.append(self.verify(self.jwks, token))
                 if token.expiration is not None:
                     expirations.append(token.expiration)
 
-            # Fall back to default expiration date if no token has an expiration date
+            # Fall back to default expiration date if no token nor hint has an expiration date
             expiration = min(expirations) if len(expirations) > 0 else default_expiration_date()
 
         return (
@@ -127,6 +201,28 @@ class Procedure:
             expiration,
         )
 
+    @staticmethod
+    def verify(jwks: JWKSClient, token: Token) -> TokenVerifiedEvent | TokenVerificationFailedEvent:
+        """
+        Verify the signature of a JWT against the key set of the identity provider.
+        """
+        try:
+            jwks.verify(token.raw)
+        except InvalidSignatureException as e:
+            return TokenVerificationFailedEvent(reason='invalid_signature', description=str(e), token=token)
+        except UnknownKeyException as e:
+            return TokenVerificationFailedEvent(reason='unknown_key', description=str(e), token=token)
+        except JWKSException as e:
+            return TokenVerificationFailedEvent(reason='unverifiable', description=str(e), token=token)
+        return TokenVerifiedEvent(token=token)
+
+    def _end(self, run: ProcedureRun) -> tuple[Authentication, EventsList, datetime, RunnerException | None]:
+        authentication, injection_events, expiration = self.inject(run.user, run.variables, run.expiration_hints)
+        run.events.extend(injection_events)
+        run.events.append(ProcedureEndedEvent(user_name=run.user.name))
+
+        return authentication, run.events, expiration, None
+
     def run(
         self,
         user: User,
@@ -137,34 +233,29 @@ class Procedure:
         If one of the procedure requests fails, it will generate an authentication object from the extracted variables
         up to that request.
         """
-
-        events = EventsList()
-        events.append(ProcedureStartedEvent(user_name=user.name, procedure_name=self.configuration.name))
+        run = ProcedureRun(self.configuration.name, user)
 
         for i, runner in enumerate(self.runners):
-            variables = list(reversed(list(self.variables.values()) + user.variables))
+            step_variables, step_events, error = run.interpolate(i, runner).run(user)
+            run.record(i, step_variables, step_events, error)
+            if error is not None:
+                return Authentication.empty(), run.events, default_expiration_date(), error
 
-            variables, run_events, error = runner.interpolate(variables).run(user)
-            events.extend(run_events)
+        return self._end(run)
 
-            for variable in variables:
-                self.variables[variable.name] = variable
+    async def run_async(
+        self,
+        user: User,
+    ) -> tuple[Authentication, EventsList, datetime, RunnerException | None]:
+        """
+        Execute the full procedure for the given user from a coroutine. See `run`.
+        """
+        run = ProcedureRun(self.configuration.name, user)
 
+        for i, runner in enumerate(self.runners):
+            step_variables, step_events, error = await run.interpolate(i, runner).run_async(user)
+            run.record(i, step_variables, step_events, error)
             if error is not None:
-                events.append(
-                    ProcedureAbortedEvent(
-                        reason='runner_error',
-                        description=f'Runner error at step {i} of procedure: {error}',
-                    ),
-                )
-                return Authentication.empty(), events, default_expiration_date(), error
-
-        authentication, injection_events, expiration = self.inject(user)
-        for event in injection_events:
-            events.append(event)
-
-        events.append(ProcedureEndedEvent(user_name=user.name))
-        for event in events:
-            self.events.append(event)
-
-        return authentication, events, expiration, None
+                return Authentication.empty(), run.events, default_expiration_date(), error
+
+        return self._end(run)
@@ -1,9 +1,13 @@
 import abc
+import asyncio
+from functools import cached_property
 from typing import Generic, Literal, TypeVar
 
 from multiauth.helpers.base_model import StrictBaseModel
 from multiauth.lib.audit.events.base import EventsList
 from multiauth.lib.extraction import TokenExtraction
+from multiauth.lib.http_core.client import HTTPClientPool
+from multiauth.lib.runners.template import ConfigurationTemplate
 from multiauth.lib.store.user import User
 from multiauth.lib.store.variables import AuthenticationVariable
 
@@ -23,7 +27,7 @@ class BaseRunnerConfiguration(StrictBaseModel, abc.ABC, Generic[RunnerParameters
     extractions: list[TokenExtraction]
 
     @abc.abstractmethod
-    def get_runner(self) -> 'BaseRunner':
+    def get_runner(self, client_pool: HTTPClientPool | None = None) -> 'BaseRunner':
         ...
 
 
@@ -36,14 +40,42 @@ class RunnerException(Exception):
 
 class BaseRunner(abc.ABC, Generic[T]):
     request_configuration: T
+    client_pool: HTTPClientPool | None
 
-    def __init__(self, request_configuration: T) -> None:
+    def __init__(self, request_configuration: T, client_pool: HTTPClientPool | None = None) -> None:
         self.request_configuration = request_configuration
+        self.client_pool = client_pool
+
+    @property
+    def hosts(self) -> set[str]:
+        """
+        The hosts targeted by the operation, used to limit the concurrency per host.
+        """
+        return set()
 
     @abc.abstractmethod
     def run(self, user: User) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
         ...
 
+    async def run_async(self, user: User) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
+        """
+        Run the operation from a coroutine. Runners without native async support are run in a worker thread.
+        """
+        return await asyncio.to_thread(self.run, user)
+
+    @cached_property
+    def template(self) -> ConfigurationTemplate[T]:
+        """
+        The configuration of the runner, compiled on first use for interpolation.
+        """
+        return ConfigurationTemplate(self.request_configuration)
+
+    def unresolved(self, variables: list[AuthenticationVariable]) -> set[str]:
+        """
+        The names of the placeholders of the configuration that the provided variables do not resolve.
+        """
+        return self.template.unresolved(variables)
+
     @abc.abstractmethod
     def interpolate(self, variables: list[AuthenticationVariable]) -> 'BaseRunner':
         ...
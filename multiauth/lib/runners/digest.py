@@ -1,4 +1,5 @@
 import hashlib
+from functools import cached_property
 from http import HTTPMethod
 from typing import Literal
 
@@ -7,7 +8,8 @@ from pydantic import Field
 from multiauth.helpers.base_model import StrictBaseModel
 from multiauth.lib.audit.events.base import EventsList
 from multiauth.lib.audit.events.events import HTTPFailureEvent
-from multiauth.lib.http_core.entities import HTTPHeader, HTTPLocation
+from multiauth.lib.http_core.client import HTTPClientPool
+from multiauth.lib.http_core.entities import HTTPHeader, HTTPLocation, HTTPRequest, HTTPResponse
 from multiauth.lib.http_core.mergers import merge_headers
 from multiauth.lib.runners.base import BaseRunnerConfiguration, RunnerException
 from multiauth.lib.runners.http import (
@@ -16,8 +18,9 @@ from multiauth.lib.runners.http import (
     HTTPRunnerConfiguration,
     TokenExtraction,
 )
+from multiauth.lib.runners.template import ConfigurationTemplate
 from multiauth.lib.store.user import Credentials, User
-from multiauth.lib.store.variables import AuthenticationVariable, VariableName, interpolate_string
+from multiauth.lib.store.variables import AuthenticationVariable, VariableName
 
 
 class DigestSecondRequestConfiguration(StrictBaseModel):
@@ -106,8 +109,8 @@ class DigestRunnerConfiguration(BaseRunnerConfiguration):
             parameters=self.parameters.first_request,
         )
 
-    def get_runner(self) -> 'DigestRunner':
-        return DigestRunner(self)
+    def get_runner(self, client_pool: HTTPClientPool | None = None) -> 'DigestRunner':
+        return DigestRunner(self, client_pool)
 
     @staticmethod
     def examples() -> list:
@@ -177,31 +180,38 @@ class DigestServerParameters(StrictBaseModel):
 class DigestRunner(HTTPRequestRunner):
     digest_configuration: DigestRunnerConfiguration
 
-    def __init__(self, configuration: DigestRunnerConfiguration) -> None:
+    def __init__(self, configuration: DigestRunnerConfiguration, client_pool: HTTPClientPool | None = None) -> None:
         self.digest_configuration = configuration
-        super().__init__(self.digest_configuration.to_http())
+        super().__init__(self.digest_configuration.to_http(), client_pool)
 
-    def interpolate(self, variables: list[AuthenticationVariable]) -> 'DigestRunner':
-        digest_configuration_str = self.digest_configuration.model_dump_json()
-        digest_configuration_str = interpolate_string(digest_configuration_str, variables)
-        digest_configuration = DigestRunnerConfiguration.model_validate_json(digest_configuration_str)
+    @cached_property
+    def digest_template(self) -> ConfigurationTemplate[DigestRunnerConfiguration]:
+        """
+        The digest configuration of the runner, compiled on first use for interpolation.
+        """
+        return ConfigurationTemplate(self.digest_configuration)
 
-        return DigestRunner(digest_configuration)
+    def unresolved(self, variables: list[AuthenticationVariable]) -> set[str]:
+        return self.digest_template.unresolved(variables)
 
-    def run(self, user: User) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
-        events = EventsList()
+    def interpolate(self, variables: list[AuthenticationVariable]) -> 'DigestRunner':
+        return DigestRunner(self.digest_template.render(variables), self.client_pool)
+
+    def challenge(
+        self,
+        credentials: tuple[str, str],
+        request: HTTPRequest,
+        response: HTTPResponse | None,
+        events: EventsList,
+    ) -> tuple[list[AuthenticationVariable], HTTPRequestRunner | None, RunnerException | None]:
+        """
+        Answer the digest challenge of the first response. Returns the variables extracted from the challenge,
+        along with the runner of the second request.
+        """
         variables: list[AuthenticationVariable] = []
 
-        credentials = user.credentials or Credentials()
-
-        if not credentials.username or not credentials.password:
-            raise ValueError(f'User {user.name} is missing a username or password.')
-
-        request, response, http_events = super().request(user)
-        events.extend(http_events)
-
         if response is None:
-            return [], events, RunnerException('No response received.')
+            return [], None, RunnerException('No response received.')
 
         www_authenticate_header = next(
             (header for header in response.headers if header.name.lower() == 'www-authenticate'),
@@ -211,7 +221,7 @@ class DigestRunner(HTTPRequestRunner):
         if www_authenticate_header is None:
             event = HTTPFailureEvent(reason='http_error', description='Digest response has no WWW-Authenticate header.')
             events.append(event)
-            return [], events, RunnerException(event.description)
+            return [], None, RunnerException(event.description)
 
         raw_headers = www_authenticate_header.values
 
@@ -255,15 +265,15 @@ class DigestRunner(HTTPRequestRunner):
                 description='Digest response has no realm or nonce.',
             )
             events.append(event)
-            return [], events, RunnerException(event.description)
+            return [], None, RunnerException(event.description)
 
         if domain is None:
             domain = request.path
 
         header = build_digest_headers(
             realm=realm,
-            username=credentials.username,
-            password=credentials.password,
+            username=credentials[0],
+            password=credentials[1],
             domain=domain,
             method=request.method,
             nonce=nonce,
@@ -299,8 +309,37 @@ class DigestRunner(HTTPRequestRunner):
             ),
         )
 
-        next_variables, next_events, exception = HTTPRequestRunner(next_request_config).run(user)
+        return variables, HTTPRequestRunner(next_request_config, self.client_pool), None
+
+    @staticmethod
+    def _credentials(user: User) -> tuple[str, str]:
+        credentials = user.credentials or Credentials()
+        if not credentials.username or not credentials.password:
+            raise ValueError(f'User {user.name} is missing a username or password.')
+        return credentials.username, credentials.password
+
+    def run(self, user: User) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
+        credentials = self._credentials(user)
+
+        request, response, events = super().request(user)
+        variables, next_runner, error = self.challenge(credentials, request, response, events)
+        if next_runner is None:
+            return [], events, error
+
+        next_variables, next_events, exception = next_runner.run(user)
+        events.extend(next_events)
+
+        return variables + next_variables, events, exception
+
+    async def run_async(self, user: User) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
+        credentials = self._credentials(user)
+
+        request, response, events = await super().request_async(user)
+        variables, next_runner, error = self.challenge(credentials, request, response, events)
+        if next_runner is None:
+            return [], events, error
+
+        next_variables, next_events, exception = await next_runner.run_async(user)
         events.extend(next_events)
-        variables.extend(next_variables)
 
-        return variables, events, exception
+        return variables + next_variables, events, exception
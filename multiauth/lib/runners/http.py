@@ -1,6 +1,8 @@
 import json
 import re
+from datetime import datetime, timedelta
 from enum import StrEnum
+from functools import cached_property
 from http import HTTPMethod
 from typing import Any, Literal
 from urllib.parse import parse_qs, urlparse
@@ -11,11 +13,13 @@ from multiauth.lib.audit.events.base import (
     EventsList,
 )
 from multiauth.lib.audit.events.events import (
+    ExpirationHintEvent,
     ExtractedVariableEvent,
     HTTPFailureEvent,
     HTTPRequestEvent,
     HTTPResponseEvent,
 )
+from multiauth.lib.http_core.client import HTTPClientPool
 from multiauth.lib.http_core.entities import (
     HTTPCookie,
     HTTPHeader,
@@ -26,7 +30,8 @@ from multiauth.lib.http_core.entities import (
 )
 from multiauth.lib.http_core.mergers import merge_bodies, merge_cookies, merge_headers, merge_query_parameters
 from multiauth.lib.http_core.parsers import parse_raw_url
-from multiauth.lib.http_core.request import send_request
+from multiauth.lib.http_core.request import send_request, send_request_async
+from multiauth.lib.json_path import JSONPath
 from multiauth.lib.runners.base import (
     BaseRunner,
     BaseRunnerConfiguration,
@@ -35,37 +40,170 @@ from multiauth.lib.runners.base import (
     TokenExtraction,
 )
 from multiauth.lib.store.user import Credentials, User
-from multiauth.lib.store.variables import AuthenticationVariable, interpolate_string
+from multiauth.lib.store.variables import AuthenticationVariable, VariableName
 
 JSONSerializable = dict | list | str | int | float | bool
 
+# Body fields announcing the lifetime of the issued tokens, in seconds: OAuth 2.0, then AWS Cognito
+EXPIRES_IN_KEYS = ('expires_in', 'ExpiresIn')
+_EXPIRES_IN_PATHS = tuple((key, JSONPath(key)) for key in EXPIRES_IN_KEYS)
+
+
+class _ResponseIndex:
+    """
+    Lookup tables of a response, each built on first use, whatever the number of extractions reading them.
+    Header and cookie names are matched case-insensitively: the first entity of each name is kept.
+    """
+
+    response: HTTPResponse
+
+    def __init__(self, response: HTTPResponse) -> None:
+        self.response = response
+
+    @cached_property
+    def headers(self) -> dict[str, HTTPHeader]:
+        index: dict[str, HTTPHeader] = {}
+        for header in self.response.headers:
+            index.setdefault(header.name.lower(), header)
+        return index
+
+    @cached_property
+    def cookies(self) -> dict[str, HTTPCookie]:
+        index: dict[str, HTTPCookie] = {}
+        for cookie in self.response.cookies:
+            index.setdefault(cookie.name.lower(), cookie)
+        return index
+
+    @cached_property
+    def cookie_expirations(self) -> dict[str, datetime]:
+        index: dict[str, datetime] = {}
+        for name, expiration in self.response.cookie_expirations.items():
+            index.setdefault(name.lower(), expiration)
+        return index
+
+    @cached_property
+    def query_parameters(self) -> dict[str, list[str]]:
+        return parse_qs(urlparse(self.response.url).query)
+
+
+class _CompiledExtraction:
+    __slots__ = ('extraction', 'key', 'path', 'slug', 'pattern')
+
+    extraction: TokenExtraction
+    key: str  # lowercased for headers and cookies
+    path: JSONPath | None  # for bodies
+    slug: VariableName
+    pattern: re.Pattern[str] | None
+
+    def __init__(self, extraction: TokenExtraction) -> None:
+        self.extraction = extraction
+        case_insensitive = extraction.location in (HTTPLocation.HEADER, HTTPLocation.COOKIE)
+        self.key = extraction.key.lower() if case_insensitive else extraction.key
+        self.path = JSONPath(extraction.key) if extraction.location == HTTPLocation.BODY else None
+        self.slug = extraction.slug
+        self.pattern = re.compile(extraction.regex) if extraction.regex is not None else None
+
+    def find(self, response: HTTPResponse) -> Any:
+        """
+        The value at the path of the extraction in the body. Bodies which are not JSON objects or arrays are skipped.
+
+        - Raises a `KeyError` if the path matches no value
+        - Raises a `ValueError` if the body is skipped
+        """
+        if self.path is None:
+            raise ValueError(f'Not a body extraction: {self.extraction.location}')
+        if self.extraction.incremental:
+            return self.path.scan(response.content)
+        if not isinstance(response.data_json, dict | list):
+            raise ValueError('Not a JSON object or array')
+        return self.path.find(response.data_json)
+
+    def findings(self, values: list[str]) -> list[str]:
+        if self.pattern is None:
+            return values
+        return [match.group() for value in values if (match := self.pattern.search(value))]
+
+
+class ExtractionPlan:
+    """
+    The extractions of an operation, compiled once: their regexes are compiled and their slugs computed. Responses
+    are indexed once per location, so that running many extractions costs a single pass over the response.
+    """
+
+    extractions: list[TokenExtraction]
+    # Whether the body is scanned rather than parsed
+    incremental: bool
+
+    __steps: list[_CompiledExtraction]
+
+    def __init__(self, extractions: list[TokenExtraction]) -> None:
+        self.extractions = extractions
+        self.incremental = any(e.incremental and e.location == HTTPLocation.BODY for e in extractions)
+        self.__steps = [_CompiledExtraction(extraction) for extraction in extractions]
+
+    def extract(self, response: HTTPResponse) -> tuple[list[AuthenticationVariable], EventsList]:
+        """
+        Run the extractions against a response.
+
+        - Raises a `RunnerException` if a header, cookie, query parameter or body key is missing
+        """
+        events = EventsList()
+        variables: list[AuthenticationVariable] = []
+        index = _ResponseIndex(response)
 
-def extract_with_regex(string_list: list[str], regex_pattern: str | None) -> list[str]:
-    if regex_pattern is None:
-        return string_list  # Return an empty list when no regex is provided
-
-    extracted_items = []
-    for input_string in string_list:
-        match = re.search(regex_pattern, input_string)
-        if match:
-            extracted_items.append(match.group())
+        for step in self.__steps:
+            extraction = step.extraction
+            match extraction.location:
+                case HTTPLocation.HEADER:
+                    header = index.headers.get(step.key)
+                    if header is None:
+                        raise RunnerException(f'No header found with name {extraction.key}')
+                    value = ','.join(step.findings(header.values))
 
-    return extracted_items
+                case HTTPLocation.COOKIE:
+                    cookie = index.cookies.get(step.key)
+                    if cookie is None:
+                        raise RunnerException(f'No cookie found with name {extraction.key}')
+                    value = ','.join(step.findings(cookie.values))
 
+                case HTTPLocation.BODY:
+                    try:
+                        result = step.find(response)
+                    except KeyError:
+                        result = None
+                    except ValueError:
+                        continue
+                    if result is None:
+                        raise RunnerException(f'No body key found with name {extraction.key}')
+                    findings = step.findings([result if isinstance(result, str) else str(result)])
+                    if not findings:
+                        raise RunnerException(f'Body key {extraction.key} does not match {extraction.regex}')
+                    value = findings[0]
 
-def search_key_in_dict(body: dict, key: str) -> Any | None:
-    """Search for a key in a dictionary."""
+                case HTTPLocation.QUERY:
+                    query_parameter = index.query_parameters.get(step.key)
+                    if query_parameter is None:
+                        raise RunnerException(f'No query parameter found with name {extraction.key}')
+                    value = ','.join(step.findings(query_parameter))
 
-    if key in body:
-        return body[key]
+            variable = AuthenticationVariable(name=step.slug, value=value)
+            events.append(ExtractedVariableEvent(location=extraction.location, variable=variable))
+            variables.append(variable)
 
-    for value in body.values():
-        if isinstance(value, dict):
-            result = search_key_in_dict(value, key)
-            if result:
-                return result
+        return variables, events
 
-    return None
+    def cookie_expirations(self, response: HTTPResponse) -> list[tuple[str, datetime]]:
+        """
+        The `Max-Age` or `Expires` attributes of the extracted cookies, matched as their values are.
+        """
+        index = _ResponseIndex(response)
+        expirations: list[tuple[str, datetime]] = []
+        for step in self.__steps:
+            if step.extraction.location != HTTPLocation.COOKIE:
+                continue
+            if (expiration := index.cookie_expirations.get(step.key)) is not None:
+                expirations.append((step.extraction.key, expiration))
+        return expirations
 
 
 class HTTPScheme(StrEnum):
@@ -178,26 +316,47 @@ class HTTPRunnerConfiguration(BaseRunnerConfiguration):
         ],
     )
 
-    def get_runner(self) -> 'HTTPRequestRunner':
-        return HTTPRequestRunner(self)
+    def get_runner(self, client_pool: HTTPClientPool | None = None) -> 'HTTPRequestRunner':
+        return HTTPRequestRunner(self, client_pool)
 
 
 class HTTPRequestRunner(BaseRunner[HTTPRunnerConfiguration]):
-    def __init__(self, request_configuration: HTTPRunnerConfiguration):
-        super().__init__(request_configuration)
+    __extraction_plan: ExtractionPlan | None
+
+    def __init__(
+        self,
+        request_configuration: HTTPRunnerConfiguration,
+        client_pool: HTTPClientPool | None = None,
+        extraction_plan: ExtractionPlan | None = None,
+    ):
+        super().__init__(request_configuration, client_pool)
+        self.__extraction_plan = extraction_plan
+
+    @property
+    def extraction_plan(self) -> ExtractionPlan:
+        """
+        The extractions of the operation, compiled on first use.
+        """
+        plan = self.__extraction_plan
+        if plan is None or plan.extractions is not self.request_configuration.extractions:
+            plan = self.__extraction_plan = ExtractionPlan(self.request_configuration.extractions)
+        return plan
 
     def interpolate(self, variables: list[AuthenticationVariable]) -> 'HTTPRequestRunner':
-        request_configuration_str = self.request_configuration.model_dump_json()
-        request_configuration_str = interpolate_string(request_configuration_str, variables)
-        request_configuration = HTTPRunnerConfiguration.model_validate_json(request_configuration_str)
+        # Extractions without placeholders are shared with the rendered configuration, and so is their plan
+        return HTTPRequestRunner(self.template.render(variables), self.client_pool, self.extraction_plan)
 
-        return HTTPRequestRunner(request_configuration)
+    @property
+    def hosts(self) -> set[str]:
+        try:
+            _, host, _ = parse_raw_url(self.request_configuration.parameters.url)
+        except ValueError:
+            return set()
+        return {host}
 
-    def request(self, user: User) -> tuple[HTTPRequest, HTTPResponse | None, EventsList]:
+    def build_request(self, user: User) -> HTTPRequest:
         parameters = self.request_configuration.parameters
 
-        events = EventsList()
-
         credentials = user.credentials or Credentials()
 
         scheme, host, path = parse_raw_url(parameters.url)
@@ -213,7 +372,7 @@ class HTTPRequestRunner(BaseRunner[HTTPRunnerConfiguration]):
         except json.JSONDecodeError:
             pass
 
-        request = HTTPRequest(
+        return HTTPRequest(
             scheme=scheme,
             host=host,
             path=path,
@@ -228,75 +387,75 @@ class HTTPRequestRunner(BaseRunner[HTTPRunnerConfiguration]):
             proxy=parameters.proxy,
         )
 
-        events.append(HTTPRequestEvent(request=request))
-        response = send_request(request)
-
+    @staticmethod
+    def _record_response(
+        response: HTTPResponse | HTTPFailureEvent,
+        events: EventsList,
+    ) -> HTTPResponse | None:
         if isinstance(response, HTTPFailureEvent):
             events.append(response)
-            return request, None, events
+            return None
 
         events.append(HTTPResponseEvent(response=response))
-        return request, response, events
-
-    def extract(self, response: HTTPResponse | None) -> tuple[list[AuthenticationVariable], EventsList]:
-        extractions = self.request_configuration.extractions
+        return response
 
+    def request(self, user: User) -> tuple[HTTPRequest, HTTPResponse | None, EventsList]:
         events = EventsList()
 
-        if response is None:
-            return [], events
+        request = self.build_request(user)
+        events.append(HTTPRequestEvent(request=request))
+        response = send_request(request, self.client_pool)
 
-        variables: list[AuthenticationVariable] = []
+        return request, self._record_response(response, events), events
 
-        for extraction in extractions:
-            match extraction.location:
-                case HTTPLocation.HEADER:
-                    h_findings = [h for h in response.headers if h.name == extraction.key]
-                    if len(h_findings) == 0:
-                        raise RunnerException(f'No header found with name {extraction.key}')
-                    findings = extract_with_regex(h_findings[0].values, extraction.regex)
-                    variable = AuthenticationVariable(name=extraction.slug, value=','.join(findings))
-                    events.append(ExtractedVariableEvent(location=HTTPLocation.HEADER, variable=variable))
-                    variables.append(variable)
+    async def request_async(self, user: User) -> tuple[HTTPRequest, HTTPResponse | None, EventsList]:
+        events = EventsList()
 
-                case HTTPLocation.COOKIE:
-                    c_findings = [c for c in response.cookies if c.name == extraction.key]
-                    if len(c_findings) == 0:
-                        raise RunnerException(f'No cookie found with name {extraction.key}')
-                    findings = extract_with_regex(c_findings[0].values, extraction.regex)
-                    variable = AuthenticationVariable(name=extraction.slug, value=','.join(findings))
-                    events.append(ExtractedVariableEvent(location=HTTPLocation.COOKIE, variable=variable))
-                    variables.append(variable)
+        request = self.build_request(user)
+        events.append(HTTPRequestEvent(request=request))
+        response = await send_request_async(request, self.client_pool)
 
-                case HTTPLocation.BODY:
-                    if response.data_json is None:
-                        continue
-                    if not isinstance(response.data_json, dict):
-                        continue
-                    result = search_key_in_dict(response.data_json, extraction.key)
-                    if result is None:
-                        raise RunnerException(f'No body key found with name {extraction.key}')
-                    result_str = str(result) if not isinstance(result, str) else result
-                    findings = extract_with_regex([result_str], extraction.regex)
-                    variable = AuthenticationVariable(name=extraction.slug, value=findings[0])
-                    events.append(ExtractedVariableEvent(location=HTTPLocation.BODY, variable=variable))
-                    variables.append(variable)
+        return request, self._record_response(response, events), events
 
-                case HTTPLocation.QUERY:
-                    parsed_qp = parse_qs(urlparse(response.url).query)
-                    q_finding = parsed_qp.get(extraction.key)
-                    if q_finding is None:
-                        raise RunnerException(f'No query parameter found with name {extraction.key}')
-                    findings = extract_with_regex(q_finding, extraction.regex)
-                    variable = AuthenticationVariable(name=extraction.slug, value=','.join(findings))
-                    events.append(ExtractedVariableEvent(location=HTTPLocation.QUERY, variable=variable))
-                    variables.append(variable)
+    def extract(self, response: HTTPResponse | None) -> tuple[list[AuthenticationVariable], EventsList]:
+        if response is None:
+            return [], EventsList()
 
-        return variables, events
+        return self.extraction_plan.extract(response)
 
-    def run(self, user: User) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
-        request, response, events = self.request(user)
+    def extract_expiration_hints(self, response: HTTPResponse) -> EventsList:
+        """
+        Collect the expirations announced by the response: the lifetime fields of the body, and the `Max-Age` or
+        `Expires` attributes of the extracted cookies.
+        """
+        events = EventsList()
 
+        # Scanned bodies are not parsed for the sole sake of their lifetime fields
+        if not self.extraction_plan.incremental and isinstance(response.data_json, dict | list):
+            for key, path in _EXPIRES_IN_PATHS:
+                try:
+                    lifetime = path.find(response.data_json)
+                except KeyError:
+                    continue
+                if lifetime is None or isinstance(lifetime, bool):
+                    continue
+                try:
+                    seconds = float(lifetime)
+                except (TypeError, ValueError):
+                    continue
+                expiration = datetime.now() + timedelta(seconds=seconds)
+                events.append(ExpirationHintEvent(source=f'body field `{key}`', expiration=expiration))
+
+        for key, cookie_expiration in self.extraction_plan.cookie_expirations(response):
+            events.append(ExpirationHintEvent(source=f'cookie `{key}`', expiration=cookie_expiration))
+
+        return events
+
+    def handle_response(
+        self,
+        response: HTTPResponse | None,
+        events: EventsList,
+    ) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
         if response is None:
             return [], events, RunnerException('No response received.')
 
@@ -311,4 +470,15 @@ class HTTPRequestRunner(BaseRunner[HTTPRunnerConfiguration]):
             return [], events, e
         events.extend(extraction_events)
 
+        if variables:
+            events.extend(self.extract_expiration_hints(response))
+
         return variables, events, None
+
+    def run(self, user: User) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
+        _, response, events = self.request(user)
+        return self.handle_response(response, events)
+
+    async def run_async(self, user: User) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
+        _, response, events = await self.request_async(user)
+        return self.handle_response(response, events)
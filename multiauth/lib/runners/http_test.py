@@ -0,0 +1,104 @@
+import datetime
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from multiauth.lib.http_core.entities import HTTPCookie, HTTPHeader, HTTPLocation, HTTPResponse
+from multiauth.lib.runners.base import RunnerException
+from multiauth.lib.runners.http import HTTPRequestRunner, HTTPRunnerConfiguration
+from multiauth.lib.store.variables import AuthenticationVariable
+
+
+def http_runner(extractions: list[dict]) -> HTTPRequestRunner:
+    return HTTPRequestRunner(
+        HTTPRunnerConfiguration.model_validate(
+            {'tech': 'http', 'parameters': {'url': 'https://example.com/login'}, 'extractions': extractions},
+        ),
+    )
+
+
+def http_response(**parameters: object) -> HTTPResponse:
+    return HTTPResponse(
+        url='https://example.com/callback?code=abc&state=xyz',
+        status_code=200,
+        reason='OK',
+        elapsed=datetime.timedelta(milliseconds=10),
+        **parameters,  # type: ignore[arg-type]
+    )
+
+
+def test_extract() -> None:
+    runner = http_runner(
+        [
+            {'location': 'header', 'key': 'authorization', 'regex': '[a-z]+$', 'name': 'token'},
+            {'location': 'cookie', 'key': 'SESSION', 'name': 'session'},
+            {'location': 'query', 'key': 'code', 'name': 'code'},
+            {'location': 'body', 'key': 'expires_in', 'name': 'expires_in'},
+        ],
+    )
+    response = http_response(
+        headers=[HTTPHeader(name='Authorization', values=['Bearer abc', 'Bearer def'])],
+        cookies=[HTTPCookie(name='session', values=['s3ss10n'])],
+        content=json.dumps({'expires_in': 3600}).encode(),
+    )
+
+    variables, events = runner.extract(response)
+
+    # Header and cookie names are case-insensitive
+    assert [(variable.name, variable.value) for variable in variables] == [
+        ('token', 'abc,def'),
+        ('session', 's3ss10n'),
+        ('code', 'abc'),
+        ('expires_in', '3600'),
+    ]
+    assert [event.location for event in events] == [  # type: ignore[attr-defined]
+        HTTPLocation.HEADER,
+        HTTPLocation.COOKIE,
+        HTTPLocation.QUERY,
+        HTTPLocation.BODY,
+    ]
+
+    # Interpolated runners share the compiled extractions
+    assert runner.interpolate([AuthenticationVariable(name='user', value='alice')]).extraction_plan is (  # type: ignore[arg-type]
+        runner.extraction_plan
+    )
+
+
+def test_extract_unmatched_body_regex() -> None:
+    runner = http_runner([{'location': 'body', 'key': 'token', 'regex': '^[0-9]+$'}])
+
+    with pytest.raises(RunnerException, match='does not match'):
+        runner.extract(http_response(content=b'{"token": "abc"}'))
+
+
+def test_extract_body_path() -> None:
+    content = b'{"data": {"login": {"tokens": [{"access": "abc"}], "expires_in": 0}}}'
+    for incremental in (False, True):
+        runner = http_runner(
+            [
+                {'location': 'body', 'key': 'data.login.tokens[0].access', 'incremental': incremental},
+                {'location': 'body', 'key': 'expires_in', 'name': 'expires_in', 'incremental': incremental},
+            ],
+        )
+        variables, _ = runner.extract(http_response(content=content))
+
+        assert [variable.value for variable in variables] == ['abc', '0']
+        # Scanned bodies are not parsed for their lifetime fields
+        assert len(runner.extract_expiration_hints(http_response(content=content))) == (0 if incremental else 1)
+
+    with pytest.raises(ValidationError, match='Indexes cannot follow'):
+        http_runner([{'location': 'body', 'key': 'data..[0]'}])
+
+
+def test_cookie_expiration_hints_are_case_insensitive() -> None:
+    runner = http_runner([{'location': 'cookie', 'key': 'SESSION'}])
+    expiration = datetime.datetime(2030, 1, 1)
+    response = http_response(
+        cookies=[HTTPCookie(name='session', values=['s3ss10n'])],
+        cookie_expirations={'session': expiration},
+    )
+
+    assert [(event.source, event.expiration) for event in runner.extract_expiration_hints(response)] == [  # type: ignore[attr-defined]
+        ('cookie `SESSION`', expiration),
+    ]
@@ -0,0 +1,139 @@
+import dataclasses
+from collections.abc import Mapping
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel
+
+from multiauth.lib.store.variables import StringTemplate, Variables, variables_by_name
+
+M = TypeVar('M', bound=BaseModel)
+
+TemplatePath = tuple[str | int, ...]
+
+
+class _Slots:
+    """
+    Tree of the values containing placeholders. A leaf is a compiled string.
+    """
+
+    __slots__ = ('children', 'keys', 'string')
+
+    children: dict[Any, '_Slots']
+    keys: dict[str, StringTemplate]  # keys of the dictionary that contain placeholders
+    string: StringTemplate | None
+
+    def __init__(self, string: StringTemplate | None = None) -> None:
+        self.children = {}
+        self.keys = {}
+        self.string = string
+
+
+def _has_placeholder(value: Any) -> bool:
+    return isinstance(value, str) and '{{' in value
+
+
+def _compile(value: Any, path: TemplatePath, paths: list[TemplatePath], names: set[str]) -> _Slots | None:
+    if isinstance(value, str):
+        if not _has_placeholder(value):
+            return None
+        string = StringTemplate(value)
+        if not string.names:
+            return None
+        paths.append(path)
+        names.update(string.names)
+        return _Slots(string)
+
+    if isinstance(value, BaseModel):
+        items: Any = ((name, getattr(value, name)) for name in type(value).model_fields)
+    elif dataclasses.is_dataclass(value):
+        items = ((field.name, getattr(value, field.name)) for field in dataclasses.fields(value))
+    elif isinstance(value, list | tuple):
+        items = enumerate(value)
+    elif isinstance(value, dict):
+        items = value.items()
+    else:
+        return None
+
+    slots = _Slots()
+    for key, item in items:
+        child = _compile(item, (*path, key), paths, names)
+        if child is not None:
+            slots.children[key] = child
+
+    if isinstance(value, dict):
+        for key in value:
+            if _has_placeholder(key) and (string := StringTemplate(key)).names:
+                slots.keys[key] = string
+                names.update(string.names)
+        if slots.keys:
+            paths.append(path)
+
+    return slots if slots.children or slots.keys else None
+
+
+def _render(value: Any, slots: _Slots, variables: Mapping[str, str]) -> Any:
+    if slots.string is not None:
+        return slots.string.render(variables)
+
+    if isinstance(value, BaseModel):
+        # Fields are copied as is: the configuration has been validated once, when the template was compiled
+        return value.model_copy(
+            update={name: _render(getattr(value, name), child, variables) for name, child in slots.children.items()},
+        )
+
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.replace(
+            value,
+            **{name: _render(getattr(value, name), child, variables) for name, child in slots.children.items()},
+        )
+
+    if isinstance(value, list | tuple):
+        rendered = list(value)
+        for index, child in slots.children.items():
+            rendered[index] = _render(value[index], child, variables)
+        return rendered if isinstance(value, list) else tuple(rendered)
+
+    if isinstance(value, dict):
+        return {
+            (slots.keys[key].render(variables) if key in slots.keys else key): (
+                _render(item, slots.children[key], variables) if key in slots.children else item
+            )
+            for key, item in value.items()
+        }
+
+    return value
+
+
+class ConfigurationTemplate(Generic[M]):
+    """
+    A configuration compiled once for interpolation: the strings containing `{{ variable }}` placeholders are located
+    at compilation, then only these fields, and the objects containing them, are copied when rendering.
+    """
+
+    configuration: M
+    paths: list[TemplatePath]
+    names: set[str]
+
+    __slots: _Slots | None
+
+    def __init__(self, configuration: M) -> None:
+        self.configuration = configuration
+        self.paths = []
+        self.names = set()
+        self.__slots = _compile(configuration, (), self.paths, self.names)
+
+    def render(self, variables: Variables) -> M:
+        """
+        Interpolate the configuration with the provided variables. The configuration is returned as is if it has
+        no placeholders. Unresolved placeholders are left as is.
+        """
+        if self.__slots is None:
+            return self.configuration
+        return _render(self.configuration, self.__slots, variables_by_name(variables))
+
+    def unresolved(self, variables: Variables) -> set[str]:
+        """
+        The names of the placeholders that the provided variables do not resolve.
+        """
+        values = variables_by_name(variables)
+        return {name for name in self.names if name not in values}
@@ -0,0 +1,55 @@
+from multiauth.lib.entities import VariableName
+from multiauth.lib.runners.http import HTTPRunnerConfiguration
+from multiauth.lib.runners.template import ConfigurationTemplate
+from multiauth.lib.store.variables import AuthenticationVariable
+
+
+def http_configuration(**parameters: object) -> HTTPRunnerConfiguration:
+    return HTTPRunnerConfiguration.model_validate(
+        {'tech': 'http', 'parameters': {'url': 'https://example.com/login', **parameters}, 'extractions': []},
+    )
+
+
+def test_render() -> None:
+    configuration = http_configuration(
+        headers=[{'name': 'X-Tenant', 'values': ['static']}, {'name': 'X-User', 'values': ['{{ user }}']}],
+        body={'credentials': {'{{user}}': '{{ password }}', 'remember': True}, 'scopes': ['read']},
+    )
+    template = ConfigurationTemplate(configuration)
+
+    assert template.paths == [
+        ('parameters', 'headers', 1, 'values', 0),
+        ('parameters', 'body', 'credentials', '{{user}}'),
+        ('parameters', 'body', 'credentials'),
+    ]
+
+    rendered = template.render(
+        [
+            AuthenticationVariable(name=VariableName('user'), value='alice'),
+            AuthenticationVariable(name=VariableName('password'), value='p"a\\ss'),
+        ],
+    )
+
+    assert rendered.parameters.headers[1].values == ['alice']
+    assert rendered.parameters.body == {'credentials': {'alice': 'p"a\\ss', 'remember': True}, 'scopes': ['read']}
+
+    # Fields without placeholders are shared with the template, which is left untouched
+    assert rendered.parameters.headers[0] is configuration.parameters.headers[0]
+    assert rendered.parameters.body['scopes'] is configuration.parameters.body['scopes']  # type: ignore[index]
+    assert configuration.parameters.headers[1].values == ['{{ user }}']
+
+
+def test_render_without_placeholders() -> None:
+    configuration = http_configuration()
+    template = ConfigurationTemplate(configuration)
+
+    assert template.paths == []
+    assert template.render([]) is configuration
+
+
+def test_unresolved() -> None:
+    template = ConfigurationTemplate(http_configuration(url='https://{{ host }}/login', body={'otp': '{{ otp }}'}))
+
+    assert template.names == {'host', 'otp'}
+    assert template.unresolved({'host': 'example.com'}) == {'otp'}
+    assert template.render({'host': 'example.com'}).parameters.body == {'otp': '{{ otp }}'}
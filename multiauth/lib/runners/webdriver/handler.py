@@ -1,6 +1,7 @@
 import logging
 import re
 import time
+from http import HTTPMethod
 
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.remote.webelement import WebElement
@@ -17,7 +18,7 @@ from multiauth.lib.audit.events.events import (
     SeleniumScriptErrorEvent,
     SeleniumScriptLogEvent,
 )
-from multiauth.lib.http_core.entities import HTTPHeader, HTTPQueryParameter, HTTPRequest, HTTPResponse
+from multiauth.lib.http_core.entities import HTTPHeader, HTTPQueryParameter, HTTPRequest, HTTPResponse, HTTPScheme
 from multiauth.lib.runners.base import RunnerException
 from multiauth.lib.runners.webdriver.configuration import SeleniumCommand
 from multiauth.lib.runners.webdriver.transformers import (
@@ -36,17 +37,17 @@ class SeleniumCommandException(RunnerException):
 
 def build_http_request_from_selenium_request(request: Request) -> HTTPRequest:
     return HTTPRequest(
-        method=request.method.upper(),
+        method=HTTPMethod(request.method.upper()),
         cookies=[],
         data_text=request.body.decode('utf-8', 'ignore') if request.body else '',
         headers=[HTTPHeader(name=name, values=[str(value)]) for name, value in request.headers.items()],
         host=request.host,
         path=request.path,
-        scheme=request.url.split('://')[0],
+        scheme=HTTPScheme(request.url.split('://')[0]),
         query_parameters=[
             HTTPQueryParameter(
                 name=name,
-                values=values if isinstance(values, list) else [values],
+                values=[str(value) for value in values] if isinstance(values, list) else [str(values)],
             )
             for name, values in request.params.items()
         ],
@@ -56,10 +57,10 @@ def build_http_request_from_selenium_request(request: Request) -> HTTPRequest:
 def build_http_response_from_selenium_request(request: Request) -> HTTPResponse:
     return HTTPResponse(
         status_code=request.response.status_code,
-        data_text=request.response.body.decode('utf-8', 'ignore') if request.response.body else '',
+        content=request.response.body or b'',
         headers=[HTTPHeader(name=name, values=[str(value)]) for name, value in request.response.headers.items()],
         reason=request.response.reason,
-        elapsed=(request.response.date - request.date).total_seconds(),
+        elapsed=request.response.date - request.date,
         url=request.url,
         cookies=[],
     )
@@ -15,6 +15,7 @@ from multiauth.lib.audit.events.events import (
     SeleniumScriptErrorEvent,
     SeleniumScriptLogEvent,
 )
+from multiauth.lib.http_core.client import HTTPClientPool
 from multiauth.lib.http_core.entities import HTTPLocation
 from multiauth.lib.runners.base import (
     BaseRunner,
@@ -31,7 +32,7 @@ from multiauth.lib.runners.webdriver.configuration import (
 from multiauth.lib.runners.webdriver.extractors import extract_token
 from multiauth.lib.runners.webdriver.handler import SeleniumCommandHandler
 from multiauth.lib.store.user import User
-from multiauth.lib.store.variables import AuthenticationVariable, VariableName, interpolate_string
+from multiauth.lib.store.variables import AuthenticationVariable, VariableName
 
 
 class SeleniumScriptOptions(StrictBaseModel):
@@ -115,8 +116,8 @@ class SeleniumRunnerConfiguration(BaseRunnerConfiguration):
         examples=SeleniumScriptParameters.examples(),
     )
 
-    def get_runner(self) -> 'SeleniumRunner':
-        return SeleniumRunner(self)
+    def get_runner(self, client_pool: HTTPClientPool | None = None) -> 'SeleniumRunner':
+        return SeleniumRunner(self, client_pool)
 
     @staticmethod
     def examples() -> list:
@@ -157,9 +158,9 @@ class SeleniumRunnerConfiguration(BaseRunnerConfiguration):
 class SeleniumRunner(BaseRunner[SeleniumRunnerConfiguration]):
     selenium_configuration: SeleniumRunnerConfiguration
 
-    def __init__(self, configuration: SeleniumRunnerConfiguration) -> None:
+    def __init__(self, configuration: SeleniumRunnerConfiguration, client_pool: HTTPClientPool | None = None) -> None:
         self.selenium_configuration = configuration
-        super().__init__(configuration)
+        super().__init__(configuration, client_pool)
 
     @property
     def visited_hosts(self) -> set[str]:
@@ -176,6 +177,10 @@ class SeleniumRunner(BaseRunner[SeleniumRunnerConfiguration]):
                         continue
         return visited_hosts
 
+    @property
+    def hosts(self) -> set[str]:
+        return self.visited_hosts
+
     def run(self, _user: User) -> tuple[list[AuthenticationVariable], EventsList, RunnerException | None]:
         driver = self.setup_driver()
         events = EventsList()
@@ -259,8 +264,4 @@ class SeleniumRunner(BaseRunner[SeleniumRunnerConfiguration]):
         return driver
 
     def interpolate(self, variables: list[AuthenticationVariable]) -> 'SeleniumRunner':
-        selenium_configuration_str = self.selenium_configuration.model_dump_json()
-        selenium_configuration_str = interpolate_string(selenium_configuration_str, variables)
-        selenium_configuration = SeleniumRunnerConfiguration.model_validate_json(selenium_configuration_str)
-
-        return SeleniumRunner(selenium_configuration)
+        return SeleniumRunner(self.template.render(variables), self.client_pool)
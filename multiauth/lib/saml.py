@@ -0,0 +1,191 @@
+"""Streaming parser for SAML assertions."""
+
+import base64
+import binascii
+import re
+import xml.etree.ElementTree as ET
+import zlib
+from collections.abc import Iterator
+from typing import Any
+from urllib.parse import unquote
+
+SAML_ASSERTION_NAMESPACE = 'urn:oasis:names:tc:SAML:2.0:assertion'
+SAML_NAMESPACE_PREFIX = b'urn:oasis:names:tc:SAML:'
+
+# Decoded assertions are read by chunks, and rejected beyond this size
+SAML_CHUNK_SIZE = 64 * 1024
+MAX_SAML_SIZE = 10 * 1024 * 1024
+SAML_SNIFF_SIZE = 1024
+
+# Document type declarations are never needed by SAML, and allow entity expansion attacks
+_FORBIDDEN_DECLARATIONS = (b'<!DOCTYPE', b'<!ENTITY')
+_FORBIDDEN_DECLARATION_LENGTH = max(len(declaration) for declaration in _FORBIDDEN_DECLARATIONS)
+
+_BASE64_PATTERN = re.compile(r'[A-Za-z0-9+/_\-\s]+={0,2}')
+
+
+class SAMLException(Exception):
+    pass
+
+
+def _tag(name: str) -> str:
+    return f'{{{SAML_ASSERTION_NAMESPACE}}}{name}'
+
+
+ASSERTION = _tag('Assertion')
+ISSUER = _tag('Issuer')
+SUBJECT = _tag('Subject')
+NAME_ID = _tag('NameID')
+CONDITIONS = _tag('Conditions')
+ATTRIBUTE_STATEMENT = _tag('AttributeStatement')
+ATTRIBUTE = _tag('Attribute')
+ATTRIBUTE_VALUE = _tag('AttributeValue')
+AUTHN_CONTEXT_CLASS_REF = _tag('AuthnContextClassRef')
+
+
+def _base64_decode(token: str) -> bytes | None:
+    token = unquote(token).strip()
+    if not _BASE64_PATTERN.fullmatch(token):
+        return None
+
+    token = re.sub(r'\s', '', token).rstrip('=')
+    try:
+        return base64.b64decode(token.replace('-', '+').replace('_', '/') + '=' * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _inflate(data: bytes) -> Iterator[bytes]:
+    # Inflated by chunks, so that compression bombs are detected before being expanded in memory
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    chunk = decompressor.decompress(data, SAML_CHUNK_SIZE)
+    while chunk:
+        yield chunk
+        chunk = decompressor.decompress(decompressor.unconsumed_tail, SAML_CHUNK_SIZE)
+
+
+def saml_chunks(token: str) -> Iterator[bytes]:
+    """
+    Decode a SAML message, as raw XML, base64-encoded XML (POST binding), or base64-encoded deflated XML
+    (Redirect binding), and yield its XML by chunks.
+
+    - Raises a `SAMLException` if the token is not a SAML message.
+    """
+    stripped = token.lstrip()
+    if stripped.startswith('<'):
+        data = stripped.encode()
+        for i in range(0, len(data), SAML_CHUNK_SIZE):
+            yield data[i : i + SAML_CHUNK_SIZE]
+        return
+
+    decoded = _base64_decode(token)
+    if decoded is None:
+        raise SAMLException('The token is neither XML nor base64-encoded.')
+
+    if decoded.lstrip().startswith(b'<'):
+        for i in range(0, len(decoded), SAML_CHUNK_SIZE):
+            yield decoded[i : i + SAML_CHUNK_SIZE]
+        return
+
+    try:
+        yield from _inflate(decoded)
+    except zlib.error as e:
+        raise SAMLException('The token is neither XML nor deflated XML.') from e
+
+
+def _looks_like_saml(data: bytes) -> bool:
+    # Every SAML message declares its namespace on its root element
+    return data.lstrip().startswith(b'<') and SAML_NAMESPACE_PREFIX in data
+
+
+def is_saml(token: str) -> bool:
+    """
+    Whether a token looks like a SAML message, possibly encoded: an XML document declaring a SAML namespace in its
+    first bytes. Only the first bytes are decoded.
+    """
+
+    if token.lstrip().startswith('<'):
+        return _looks_like_saml(token[:SAML_SNIFF_SIZE].encode())
+
+    # A multiple of 4 base64 characters decodes without padding. Deflated messages need enough bytes to cover the
+    # Huffman tables that precede the first characters
+    decoded = _base64_decode(token.strip()[:SAML_SNIFF_SIZE])
+    if decoded is None:
+        return False
+    if decoded.lstrip().startswith(b'<'):
+        return _looks_like_saml(decoded)
+
+    try:
+        return _looks_like_saml(zlib.decompressobj(-zlib.MAX_WBITS).decompress(decoded, SAML_SNIFF_SIZE))
+    except zlib.error:
+        return False
+
+
+def parse_saml(token: str) -> dict[str, Any]:
+    """
+    Read the claims of the first assertion of a SAML message, without building its tree: the parsing stops once the
+    assertion has been read, and the elements are discarded as soon as they have been read.
+
+    - Raises a `SAMLException` if the token is not a well-formed SAML message, or declares a document type.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    claims: dict[str, Any] = {
+        'issuer': None,
+        'subject': None,
+        'not_before': None,
+        'not_on_or_after': None,
+        'attributes': {},
+        'authn_context': None,
+    }
+
+    stack: list[str] = []
+    attribute_name: str | None = None
+    attribute_value: str | None = None
+    size = 0
+    tail = b''
+
+    try:
+        for chunk in saml_chunks(token):
+            size += len(chunk)
+            if size > MAX_SAML_SIZE:
+                raise SAMLException('The SAML message is too large.')
+
+            window = tail + chunk
+            if any(declaration in window for declaration in _FORBIDDEN_DECLARATIONS):
+                raise SAMLException('SAML messages must not declare a document type or entities.')
+            tail = window[-_FORBIDDEN_DECLARATION_LENGTH:]
+
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == 'start':
+                    stack.append(element.tag)
+                    if element.tag == CONDITIONS and claims['not_on_or_after'] is None:
+                        claims['not_before'] = element.get('NotBefore')
+                        claims['not_on_or_after'] = element.get('NotOnOrAfter')
+                    elif element.tag == ATTRIBUTE and ATTRIBUTE_STATEMENT in stack:
+                        attribute_name, attribute_value = element.get('Name'), None
+                    continue
+
+                stack.pop()
+                if element.tag == ISSUER and claims['issuer'] is None:
+                    claims['issuer'] = element.text
+                elif element.tag == NAME_ID and stack and stack[-1] == SUBJECT and claims['subject'] is None:
+                    claims['subject'] = element.text
+                elif element.tag == ATTRIBUTE_VALUE and attribute_value is None and ATTRIBUTE in stack:
+                    attribute_value = element.text or ''
+                elif element.tag == ATTRIBUTE and attribute_name is not None:
+                    if attribute_value is not None:
+                        claims['attributes'][attribute_name] = attribute_value
+                    attribute_name = None
+                elif element.tag == AUTHN_CONTEXT_CLASS_REF and claims['authn_context'] is None:
+                    claims['authn_context'] = element.text
+                elif element.tag == ASSERTION:
+                    return claims
+
+                element.clear()
+
+        parser.close()
+    except ET.ParseError as e:
+        raise SAMLException(f'Malformed SAML message: {e}') from e
+
+    return claims
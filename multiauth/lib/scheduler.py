@@ -0,0 +1,268 @@
+import abc
+import asyncio
+import datetime
+import heapq
+import logging
+import random
+import threading
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from multiauth.helpers.fork import ForkAware
+from multiauth.lib.entities import UserName
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_MARGIN_SECONDS = 60
+DEFAULT_REFRESH_JITTER_SECONDS = 5
+DEFAULT_CLOCK_SKEW_SECONDS = 5
+DEFAULT_RETRY_SECONDS = 30
+
+
+class BaseRefreshScheduler(abc.ABC):
+    """
+    Min-heap of the upcoming refreshes, ordered by refresh date. Each user is refreshed a margin before the expiration
+    of its authentication, minus the tolerated clock skew with the identity provider, minus a random jitter that
+    spreads the refreshes of users authenticated at the same time.
+    """
+
+    margin_seconds: float
+    jitter_seconds: float
+    clock_skew_seconds: float
+    retry_seconds: float
+
+    # Heap entries are never removed: an entry is stale if it does not match the latest refresh date of its user
+    _heap: list[tuple[datetime.datetime, UserName]]
+    _scheduled: dict[UserName, datetime.datetime]
+
+    def __init__(
+        self,
+        margin_seconds: float = DEFAULT_REFRESH_MARGIN_SECONDS,
+        jitter_seconds: float = DEFAULT_REFRESH_JITTER_SECONDS,
+        clock_skew_seconds: float = DEFAULT_CLOCK_SKEW_SECONDS,
+        retry_seconds: float = DEFAULT_RETRY_SECONDS,
+    ) -> None:
+        super().__init__()
+        self.margin_seconds = margin_seconds
+        self.jitter_seconds = jitter_seconds
+        self.clock_skew_seconds = clock_skew_seconds
+        self.retry_seconds = retry_seconds
+
+        self._heap = []
+        self._scheduled = {}
+
+    def refresh_date(self, expiration: datetime.datetime) -> datetime.datetime:
+        """
+        Compute the date at which an authentication expiring at the provided date should be refreshed.
+        The lead time never exceeds half of the remaining lifetime, so that short-lived sessions are not refreshed
+        continuously.
+        """
+        if expiration.tzinfo is not None:
+            expiration = expiration.astimezone().replace(tzinfo=None)
+
+        now = datetime.datetime.now()
+        lead = self.margin_seconds + self.clock_skew_seconds + random.uniform(0, self.jitter_seconds)
+        remaining = (expiration - now).total_seconds()
+        return expiration - datetime.timedelta(seconds=max(min(lead, remaining / 2), 0))
+
+    @abc.abstractmethod
+    def schedule(self, user_name: UserName, expiration: datetime.datetime) -> None:
+        """
+        Schedule the refresh of a user, replacing any previously scheduled refresh of this user.
+        """
+
+    @abc.abstractmethod
+    def unschedule(self, user_name: UserName) -> None:
+        """
+        Cancel the scheduled refresh of a user, if any.
+        """
+
+    def _push(self, user_name: UserName, refresh_at: datetime.datetime) -> None:
+        self._scheduled[user_name] = refresh_at
+        heapq.heappush(self._heap, (refresh_at, user_name))
+
+    def _unschedule(self, user_name: UserName) -> None:
+        self._scheduled.pop(user_name, None)
+
+    def _pop_due(self) -> tuple[UserName | None, float | None]:
+        """
+        Pop the next due user. Otherwise, return the number of seconds until the next refresh, if any.
+        """
+        while self._heap:
+            refresh_at, user_name = self._heap[0]
+            if self._scheduled.get(user_name) != refresh_at:
+                heapq.heappop(self._heap)
+                continue
+
+            delay = (refresh_at - datetime.datetime.now()).total_seconds()
+            if delay > 0:
+                return None, delay
+
+            heapq.heappop(self._heap)
+            del self._scheduled[user_name]
+            return user_name, None
+
+        return None, None
+
+    def _on_refreshed(self, user_name: UserName, result: Any) -> None:
+        # Failed refreshes are retried soon, rather than at the default expiration of the failed authentication
+        if isinstance(result, tuple) and len(result) == 4 and result[3] is not None:
+            self._push(user_name, datetime.datetime.now() + datetime.timedelta(seconds=self.retry_seconds))
+
+    @property
+    def pending(self) -> dict[UserName, datetime.datetime]:
+        """
+        The refresh date of every scheduled user.
+        """
+        return dict(self._scheduled)
+
+
+class RefreshScheduler(BaseRefreshScheduler, ForkAware):
+    """
+    Refreshes users from a background thread, shortly before their authentication expires.
+
+    - In the children of a fork, the scheduler is stopped, unless `restart_after_fork` is enabled: it is then started
+    again if it was running in the parent, with the refreshes scheduled by the parent.
+    """
+
+    refresh: Callable[[UserName], Any]
+    restart_after_fork: bool
+
+    __condition: threading.Condition
+    __thread: threading.Thread | None
+    __stopped: bool
+
+    def __init__(self, refresh: Callable[[UserName], Any], restart_after_fork: bool = False, **kwargs: float) -> None:
+        super().__init__(**kwargs)
+        self.refresh = refresh
+        self.restart_after_fork = restart_after_fork
+
+        self.__condition = threading.Condition()
+        self.__thread = None
+        self.__stopped = True
+
+    def _after_fork(self) -> None:
+        # Only the forking thread survives in the child
+        was_running = not self.__stopped
+        self.__condition = threading.Condition()
+        self.__thread = None
+        self.__stopped = True
+        if was_running and self.restart_after_fork:
+            self.start()
+
+    def schedule(self, user_name: UserName, expiration: datetime.datetime) -> None:
+        with self.__condition:
+            self._push(user_name, self.refresh_date(expiration))
+            self.__condition.notify()
+
+    def unschedule(self, user_name: UserName) -> None:
+        with self.__condition:
+            self._unschedule(user_name)
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self) -> None:
+        with self.__condition:
+            if self.running:
+                return
+            self.__stopped = False
+            self.__thread = threading.Thread(target=self.__run, name='multiauth-refresh-scheduler', daemon=True)
+            self.__thread.start()
+
+    def stop(self) -> None:
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+            thread, self.__thread = self.__thread, None
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def __run(self) -> None:
+        while True:
+            with self.__condition:
+                if self.__stopped:
+                    return
+                user_name, delay = self._pop_due()
+                if user_name is None:
+                    self.__condition.wait(delay)
+                    continue
+
+            try:
+                result = self.refresh(user_name)
+            except Exception as e:
+                logger.error(f'Scheduled refresh of user `{user_name}` failed: {e}')
+                result = (None, None, None, e)
+
+            with self.__condition:
+                self._on_refreshed(user_name, result)
+
+
+class AsyncRefreshScheduler(BaseRefreshScheduler):
+    """
+    Refreshes users from a background asyncio task, shortly before their authentication expires.
+    """
+
+    refresh: Callable[[UserName], Awaitable[Any]]
+
+    __wakeup: asyncio.Event | None
+    __task: asyncio.Task | None
+
+    def __init__(self, refresh: Callable[[UserName], Awaitable[Any]], **kwargs: float) -> None:
+        super().__init__(**kwargs)
+        self.refresh = refresh
+
+        self.__wakeup = None
+        self.__task = None
+
+    def schedule(self, user_name: UserName, expiration: datetime.datetime) -> None:
+        self._push(user_name, self.refresh_date(expiration))
+        if self.__wakeup is not None:
+            self.__wakeup.set()
+
+    def unschedule(self, user_name: UserName) -> None:
+        self._unschedule(user_name)
+
+    @property
+    def running(self) -> bool:
+        return self.__task is not None and not self.__task.done()
+
+    def start(self) -> None:
+        """
+        Start the scheduler task on the running event loop.
+        """
+        if self.running:
+            return
+        self.__wakeup = asyncio.Event()
+        self.__task = asyncio.get_running_loop().create_task(self.__run(self.__wakeup))
+
+    async def stop(self) -> None:
+        task, self.__task = self.__task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def __run(self, wakeup: asyncio.Event) -> None:
+        while True:
+            user_name, delay = self._pop_due()
+            if user_name is None:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), delay)
+                except TimeoutError:
+                    pass
+                continue
+
+            try:
+                result = await self.refresh(user_name)
+            except Exception as e:
+                logger.error(f'Scheduled refresh of user `{user_name}` failed: {e}')
+                result = (None, None, None, e)
+
+            self._on_refreshed(user_name, result)
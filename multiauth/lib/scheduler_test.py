@@ -0,0 +1,63 @@
+import asyncio
+import datetime
+import threading
+
+import pytest
+
+from multiauth.lib.entities import UserName
+from multiauth.lib.scheduler import AsyncRefreshScheduler, RefreshScheduler
+
+
+def test_refresh_date() -> None:
+    scheduler = RefreshScheduler(lambda _: None, margin_seconds=60, jitter_seconds=10, clock_skew_seconds=5)
+    expiration = datetime.datetime.now() + datetime.timedelta(hours=1)
+
+    refresh_at = scheduler.refresh_date(expiration)
+    assert expiration - datetime.timedelta(seconds=75) <= refresh_at <= expiration - datetime.timedelta(seconds=65)
+
+    # Short-lived sessions are refreshed at half of their remaining lifetime at most
+    expiration = datetime.datetime.now() + datetime.timedelta(seconds=20)
+    assert scheduler.refresh_date(expiration) >= expiration - datetime.timedelta(seconds=10)
+
+
+def test_refresh_scheduler() -> None:
+    refreshed: list[UserName] = []
+    done = threading.Event()
+
+    def refresh(user_name: UserName) -> None:
+        refreshed.append(user_name)
+        done.set()
+
+    scheduler = RefreshScheduler(refresh, margin_seconds=0, jitter_seconds=0, clock_skew_seconds=0)
+    scheduler.start()
+    try:
+        now = datetime.datetime.now()
+        scheduler.schedule(UserName('late'), now + datetime.timedelta(hours=1))
+        scheduler.schedule(UserName('soon'), now + datetime.timedelta(seconds=0.1))
+
+        assert done.wait(2)
+        assert refreshed == ['soon']
+        assert list(scheduler.pending) == ['late']
+    finally:
+        scheduler.stop()
+
+    assert not scheduler.running
+
+
+@pytest.mark.asyncio()
+async def test_async_refresh_scheduler_retries_failures() -> None:
+    attempts: list[UserName] = []
+
+    async def refresh(user_name: UserName) -> None:
+        attempts.append(user_name)
+        raise ValueError('identity provider unavailable')
+
+    scheduler = AsyncRefreshScheduler(refresh, retry_seconds=0.05)
+    scheduler.start()
+    try:
+        scheduler.schedule(UserName('user'), datetime.datetime.now())
+        await asyncio.sleep(0.3)
+    finally:
+        await scheduler.stop()
+
+    assert len(attempts) >= 2
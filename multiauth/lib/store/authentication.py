@@ -1,24 +1,63 @@
 import abc
 import datetime
+import sys
+import threading
+from collections import OrderedDict, deque
+from functools import cached_property
+from typing import NamedTuple
 
-from pydantic import Field
+from pydantic import ConfigDict, Field
 
 from multiauth.helpers.base_model import StrictBaseModel
+from multiauth.helpers.fork import ForkAware
 from multiauth.lib.http_core.entities import HTTPCookie, HTTPHeader, HTTPQueryParameter
 from multiauth.lib.http_core.mergers import merge_cookies, merge_headers, merge_query_parameters
 from multiauth.lib.store.user import Credentials, UserName
 
 
+class AuthenticationWire(NamedTuple):
+    """
+    The authentication of an user, as sent on the wire.
+    """
+
+    headers: dict[str, str]
+    cookies: str
+    query_string: str
+
+
 class Authentication(StrictBaseModel):
+    """
+    Authentications are immutable once created: their wire form is computed on first use, and reused by every
+    request they are attached to.
+    """
+
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     headers: list[HTTPHeader] = Field(default_factory=list)
     cookies: list[HTTPCookie] = Field(default_factory=list)
     query_parameters: list[HTTPQueryParameter] = Field(default_factory=list)
 
+    @cached_property
+    def wire(self) -> AuthenticationWire:
+        """
+        The authentication as sent on the wire. It is shared by every caller, and must not be modified.
+        """
+        cookies = HTTPCookie.serialize(self.cookies)
+        return AuthenticationWire(
+            headers={header.name: header.str_value for header in self.headers} | {'Cookies': cookies},
+            cookies=cookies,
+            query_string='&'.join(
+                f'{query_parameter.name}={query_parameter.str_value}' for query_parameter in self.query_parameters
+            ),
+        )
+
     @property
     def all_headers(self) -> dict[str, str]:
-        return {header.name: header.str_value for header in self.headers} | {
-            'Cookies': HTTPCookie.serialize(self.cookies),
-        }
+        return dict(self.wire.headers)
+
+    @property
+    def query_string(self) -> str:
+        return self.wire.query_string
 
     @staticmethod
     def empty() -> 'Authentication':
@@ -26,12 +65,11 @@ class Authentication(StrictBaseModel):
 
     @staticmethod
     def from_credentials(credentials: Credentials) -> 'Authentication':
-        authentication = Authentication.empty()
-        authentication.headers = credentials.headers
-        authentication.cookies = credentials.cookies
-        authentication.query_parameters = credentials.query_parameters
-
-        return authentication
+        return Authentication(
+            headers=list(credentials.headers),
+            cookies=list(credentials.cookies),
+            query_parameters=list(credentials.query_parameters),
+        )
 
     def __str__(self) -> str:
         authentication_str = ''
@@ -67,6 +105,10 @@ class Authentication(StrictBaseModel):
         )
 
 
+# Number of authentication objects retained per user
+DEFAULT_HISTORY_DEPTH = 16
+
+
 class AuthenticationStoreException(Exception, abc.ABC):
     pass
 
@@ -93,18 +135,35 @@ class UnauthenticatedUserException(AuthenticationStoreException):
         return f'User `{self.user_name}` is not authenticated.'
 
 
-class AuthenticationStore:
+class AuthenticationBackend(abc.ABC):
     """
-    Store for user authentication objects.
+    Interface of the stores of user authentication objects.
     """
 
-    __store: dict[UserName, list[tuple[Authentication, datetime.datetime]]]  # list is for history
-    __refresh_counts: dict[UserName, int]
+    @abc.abstractmethod
+    def get(self, user_name: UserName) -> tuple[Authentication, datetime.datetime]:
+        """
+        Retrive the authentication object of an user, with its expiration datetime.
 
-    def __init__(self) -> None:
-        self.__store = {}
-        self.__refresh_counts = {}
+        - Raises an `UnauthenticatedUserException` if no authentication object has been provided yet for this user
+        """
+
+    @abc.abstractmethod
+    def get_history(self, user_name: UserName) -> list[tuple[Authentication, datetime.datetime]]:
+        """
+        Retrive the retained authentication objects of an user, from the oldest to the current one.
+
+        - Raises an `UnauthenticatedUserException` if no authentication object has been provided yet for this user
+        """
+
+    @abc.abstractmethod
+    def store(self, user_name: UserName, authentication: Authentication, expiration: datetime.datetime) -> int:
+        """
+        Store an authentication object with an expiration time for the provided user_name.
+        Return an integer describing the number of authentication objects that have already been store for this user.
+        """
 
+    @abc.abstractmethod
     def expire(self, user_name: UserName) -> None:
         """
         Mark the user as immediately expired.
@@ -112,9 +171,6 @@ class AuthenticationStore:
         - Raises an `UnauthenticatedUserException` if no authentication object has been provided yet for this user
         """
 
-        authentication, _expiration = self.get(user_name)
-        self.__store[user_name].append((authentication, datetime.datetime.now()))
-
     def is_expired(self, user_name: UserName) -> bool:
         """
         Assess the expiration status of an user.
@@ -124,14 +180,64 @@ class AuthenticationStore:
         _, expiration = self.get(user_name)
         return expiration < datetime.datetime.now()
 
+    def close(self) -> None:  # noqa: B027
+        """
+        Release the connections or files held by the backend. Nothing to release by default.
+        """
+
+
+class AuthenticationStore(AuthenticationBackend, ForkAware):
+    """
+    In-memory store for user authentication objects. This is the default backend.
+
+    - Only the last `history_depth` authentication objects of each user are retained.
+    - If `max_users` is set, the least recently used users are evicted beyond this number of users.
+    """
+
+    history_depth: int
+    max_users: int | None
+
+    __store: OrderedDict[UserName, deque[tuple[Authentication, datetime.datetime]]]  # deque is for history
+    __refresh_counts: dict[UserName, int]
+    __lock: threading.RLock
+
+    def __init__(self, history_depth: int = DEFAULT_HISTORY_DEPTH, max_users: int | None = None) -> None:
+        if history_depth < 1:
+            raise ValueError('The history depth must be at least 1.')
+
+        super().__init__()
+        self.history_depth = history_depth
+        self.max_users = max_users
+
+        self.__store = OrderedDict()
+        self.__refresh_counts = {}
+        self.__lock = threading.RLock()
+
+    def _after_fork(self) -> None:
+        # Stored authentications are kept: children use them without authenticating again
+        self.__lock = threading.RLock()
+
+    def expire(self, user_name: UserName) -> None:
+        """
+        Mark the user as immediately expired.
+
+        - Raises an `UnauthenticatedUserException` if no authentication object has been provided yet for this user
+        """
+
+        with self.__lock:
+            authentication, _expiration = self.get(user_name)
+            self.__store[user_name][-1] = (authentication, datetime.datetime.now())
+
     def get_history(self, user_name: UserName) -> list[tuple[Authentication, datetime.datetime]]:
         """
-        Retrive all the authentication objects of an user.
+        Retrive the retained authentication objects of an user, from the oldest to the current one.
         """
-        records = self.__store.get(user_name)
-        if not records:
-            raise UnauthenticatedUserException(user_name)
-        return records
+        with self.__lock:
+            records = self.__store.get(user_name)
+            if not records:
+                raise UnauthenticatedUserException(user_name)
+            self.__store.move_to_end(user_name)
+            return list(records)
 
     def get(self, user_name: UserName) -> tuple[Authentication, datetime.datetime]:
         """
@@ -139,20 +245,63 @@ class AuthenticationStore:
 
         - Raises an `UnauthenticatedUserException` if no authentication object has been provided yet for this user
         """
-        return self.get_history(user_name)[-1]  # last record is the current one
+        with self.__lock:
+            records = self.__store.get(user_name)
+            if not records:
+                raise UnauthenticatedUserException(user_name)
+            self.__store.move_to_end(user_name)
+            return records[-1]  # last record is the current one
 
     def store(self, user_name: UserName, authentication: Authentication, expiration: datetime.datetime) -> int:
         """
         Store an authentication object with an expiration time for the provided user_name.
         Return an integer describing the number of authentication objects that have already been store for this user.
         """
-        if user_name in self.__refresh_counts:
-            self.__refresh_counts[user_name] += 1
-        else:
-            self.__refresh_counts[user_name] = 0
+        with self.__lock:
+            if user_name in self.__refresh_counts:
+                self.__refresh_counts[user_name] += 1
+            else:
+                self.__refresh_counts[user_name] = 0
+
+            if user_name not in self.__store:
+                self.__store[user_name] = deque(maxlen=self.history_depth)
+
+            self.__store[user_name].append((authentication, expiration))
+            self.__store.move_to_end(user_name)
+
+            while self.max_users is not None and len(self.__store) > self.max_users:
+                evicted, _ = self.__store.popitem(last=False)
+                del self.__refresh_counts[evicted]
+                self._evicted(evicted)
+
+            return self.__refresh_counts[user_name]
+
+    def _evicted(self, user_name: UserName) -> None:
+        """
+        Called with the store lock held when an user is evicted because of `max_users`.
+        """
+
+    def memory_report(self) -> dict[str, int]:
+        """
+        Report the number of users and authentication objects retained, and an estimation of their size in bytes.
+        """
+        with self.__lock:
+            records = [record for history in self.__store.values() for record in history]
+
+        return {
+            'users': len(self.__store),
+            'records': len(records),
+            'bytes': sum(_authentication_size(authentication) for authentication, _ in records),
+        }
 
-        if user_name not in self.__store:
-            self.__store[user_name] = []
 
-        self.__store[user_name].append((authentication, expiration))
-        return self.__refresh_counts[user_name]
+def _authentication_size(authentication: Authentication) -> int:
+    size = sys.getsizeof(authentication)
+    entries: list[HTTPHeader | HTTPCookie | HTTPQueryParameter] = [
+        *authentication.headers,
+        *authentication.cookies,
+        *authentication.query_parameters,
+    ]
+    for entry in entries:
+        size += sys.getsizeof(entry) + sys.getsizeof(entry.name) + sum(sys.getsizeof(value) for value in entry.values)
+    return size
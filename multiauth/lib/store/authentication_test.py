@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from multiauth.lib.entities import UserName
+from multiauth.lib.http_core.entities import HTTPCookie, HTTPHeader, HTTPQueryParameter
+from multiauth.lib.store.authentication import Authentication, AuthenticationStore, UnauthenticatedUserException
+
+
+def authentication(token: str) -> Authentication:
+    return Authentication(headers=[HTTPHeader(name='Authorization', values=[f'Bearer {token}'])])
+
+
+def test_history_is_bounded() -> None:
+    store = AuthenticationStore(history_depth=3)
+    expiration = datetime.datetime.now() + datetime.timedelta(hours=1)
+
+    for i in range(10):
+        assert store.store(UserName('user'), authentication(f'token-{i}'), expiration) == i
+
+    history = store.get_history(UserName('user'))
+    tokens = [record.headers[0].values[0] for record, _ in history]
+    assert tokens == ['Bearer token-7', 'Bearer token-8', 'Bearer token-9']
+    assert store.get(UserName('user')) == history[-1]
+
+    # Expiring a user does not add a record
+    store.expire(UserName('user'))
+    assert len(store.get_history(UserName('user'))) == 3
+    assert store.is_expired(UserName('user'))
+
+
+def test_least_recently_used_users_are_evicted() -> None:
+    store = AuthenticationStore(max_users=2)
+    expiration = datetime.datetime.now() + datetime.timedelta(hours=1)
+
+    store.store(UserName('alice'), authentication('alice'), expiration)
+    store.store(UserName('bob'), authentication('bob'), expiration)
+    store.get(UserName('alice'))
+    store.store(UserName('carol'), authentication('carol'), expiration)
+
+    with pytest.raises(UnauthenticatedUserException):
+        store.get(UserName('bob'))
+    assert store.memory_report()['users'] == 2
+    assert store.memory_report()['records'] == 2
+    assert store.memory_report()['bytes'] > 0
+
+
+def test_wire_form_is_computed_once() -> None:
+    auth = Authentication(
+        headers=[HTTPHeader(name='Authorization', values=['Bearer token'])],
+        cookies=[HTTPCookie(name='session', values=['a b'])],
+        query_parameters=[HTTPQueryParameter(name='token', values=['token'])],
+    )
+
+    assert auth.wire is auth.wire
+    assert auth.wire.headers == {'Authorization': 'Bearer token', 'Cookies': 'session=a%20b'}
+    assert auth.wire.cookies == 'session=a%20b'
+    assert auth.query_string == 'token=token'
+
+    # Callers get their own copy of the headers
+    auth.all_headers['Authorization'] = 'Bearer other'
+    assert auth.all_headers['Authorization'] == 'Bearer token'
+
+    with pytest.raises(ValidationError):
+        auth.headers = []
@@ -0,0 +1,349 @@
+import datetime
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from multiauth.helpers.fork import ForkAware
+from multiauth.lib.store.authentication import (
+    DEFAULT_HISTORY_DEPTH,
+    Authentication,
+    AuthenticationBackend,
+    AuthenticationStore,
+    AuthenticationStoreException,
+    AuthenticationWire,
+    UnauthenticatedUserException,
+)
+from multiauth.lib.store.user import UserName
+
+DEFAULT_TABLE_SLOTS = 256
+DEFAULT_SLOT_SIZE = 8 * 1024
+
+# Number of torn reads after which a reader yields to the writer, and gives up
+SPIN_READ_ATTEMPTS = 64
+MAX_READ_ATTEMPTS = 4096
+
+_MAGIC = b'MAUTHTB1'
+_TABLE_HEADER = struct.Struct('<8sII')  # magic, slots, slot size
+_TABLE_HEADER_SIZE = 64
+_SLOT_HEADER = struct.Struct('<QdI4x')  # sequence, expiration timestamp, payload length
+_SEQUENCE = struct.Struct('<Q')
+# Payload of a released slot: probes go on past it, and it can be taken by another user
+_RELEASED = b'\n'
+
+
+class SharedTableException(AuthenticationStoreException):
+    pass
+
+
+class ReadOnlyStoreException(AuthenticationStoreException):
+    def __str__(self) -> str:
+        return 'Authentication replicas are read-only: authentications are written by the refresher process.'
+
+
+class SharedAuthenticationTable(ForkAware):
+    """
+    Memory-mapped table of the current authentication of each user, written by a single process and read without
+    locks by any number of processes.
+
+    - Each user has a slot, found by hashing its name, whose payload is prefixed with the user name and a newline:
+    user names cannot contain newlines.
+    - Slots are released when users are evicted from the writer, and can then be taken by other users.
+    - Each slot is versioned by a sequence number, odd while the slot is being written: readers retry until they
+    read the same even sequence number before and after copying the slot (seqlock).
+    """
+
+    path: str
+    slots: int
+    slot_size: int
+    writable: bool
+
+    __file: mmap.mmap
+    __slot_indexes: dict[UserName, int]
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        path: str,
+        slots: int = DEFAULT_TABLE_SLOTS,
+        slot_size: int = DEFAULT_SLOT_SIZE,
+        writable: bool = False,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.writable = writable
+        self.__slot_indexes = {}
+        self.__lock = threading.Lock()
+
+        if writable:
+            self.__file = self.__create(path, slots, slot_size)
+        else:
+            with open(path, 'rb') as f:
+                self.__file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.slots, self.slot_size = _TABLE_HEADER.unpack_from(self.__file, 0)
+        if magic != _MAGIC:
+            raise SharedTableException(f'`{path}` is not a shared authentication table.')
+
+    def _after_fork(self) -> None:
+        # The mapping itself is shared with the parent
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __create(path: str, slots: int, slot_size: int) -> mmap.mmap:
+        size = _TABLE_HEADER_SIZE + slots * slot_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # A table left by a previous writer is reused, so that readers keep their mapping
+            header = os.pread(fd, _TABLE_HEADER.size, 0)
+            if len(header) < _TABLE_HEADER.size or _TABLE_HEADER.unpack(header) != (_MAGIC, slots, slot_size):
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _TABLE_HEADER.pack(_MAGIC, slots, slot_size), 0)
+            return mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def __offset(self, index: int) -> int:
+        return _TABLE_HEADER_SIZE + index * self.slot_size
+
+    def __probe(self, user_name: UserName) -> list[int]:
+        start = zlib.crc32(user_name.encode()) % self.slots
+        return [(start + i) % self.slots for i in range(self.slots)]
+
+    def snapshot(self, index: int) -> tuple[int, float, bytes]:
+        """
+        Read a consistent copy of a slot: its sequence number, expiration timestamp and payload.
+        """
+        offset = self.__offset(index)
+        capacity = self.slot_size - _SLOT_HEADER.size
+
+        for attempt in range(MAX_READ_ATTEMPTS):
+            sequence, expiration, length = _SLOT_HEADER.unpack_from(self.__file, offset)
+            if sequence % 2 == 0:
+                start = offset + _SLOT_HEADER.size
+                payload = self.__file[start : start + min(length, capacity)]
+                if _SEQUENCE.unpack_from(self.__file, offset)[0] == sequence:
+                    return sequence, expiration, payload
+            if attempt >= SPIN_READ_ATTEMPTS:
+                time.sleep(0)
+
+        raise SharedTableException(f'Slot {index} of `{self.path}` is being written continuously.')
+
+    def sequence(self, index: int) -> int:
+        return _SEQUENCE.unpack_from(self.__file, self.__offset(index))[0]
+
+    @staticmethod
+    def prefix(user_name: UserName) -> bytes:
+        """
+        The prefix of the payloads of an user.
+
+        - Raises a `SharedTableException` if the user name contains a newline
+        """
+        if '\n' in user_name:
+            raise SharedTableException(f'User names containing newlines cannot be shared: {user_name!r}.')
+        return user_name.encode() + b'\n'
+
+    def find(self, user_name: UserName) -> int | None:
+        """
+        The index of the slot of an user, if it has been published. The index is cached: readers check the prefix of
+        the payload they read, and `forget` the index if the slot was released since.
+        """
+        index = self.__slot_indexes.get(user_name)
+        if index is not None:
+            return index
+        if '\n' in user_name:
+            return None
+
+        prefix = self.prefix(user_name)
+        for index in self.__probe(user_name):
+            _, _, payload = self.snapshot(index)
+            if not payload:
+                return None
+            if payload.startswith(prefix):
+                self.__slot_indexes[user_name] = index
+                return index
+        return None
+
+    def forget(self, user_name: UserName) -> None:
+        """
+        Drop the cached index of the slot of an user.
+        """
+        self.__slot_indexes.pop(user_name, None)
+
+    def publish(self, user_name: UserName, payload: bytes, expiration: datetime.datetime) -> None:
+        """
+        Write the payload of an user to its slot.
+
+        - Raises a `SharedTableException` if the payload does not fit in a slot, or if the table is full.
+        """
+        if not self.writable:
+            raise ReadOnlyStoreException
+        payload = self.prefix(user_name) + payload
+        if len(payload) > self.slot_size - _SLOT_HEADER.size:
+            raise SharedTableException(f'The authentication of user `{user_name}` does not fit in a slot.')
+
+        with self.__lock:
+            index = self.find(user_name)
+            if index is None:
+                index = next((i for i in self.__probe(user_name) if self.snapshot(i)[2] in (b'', _RELEASED)), None)
+            if index is None:
+                raise SharedTableException(f'The shared authentication table `{self.path}` is full.')
+
+            self.__write(index, payload, expiration.timestamp())
+            self.__slot_indexes[user_name] = index
+
+    def release(self, user_name: UserName) -> None:
+        """
+        Release the slot of an user: readers no longer find it, and it can be taken by another user.
+        """
+        if not self.writable:
+            raise ReadOnlyStoreException
+
+        with self.__lock:
+            index = self.find(user_name)
+            if index is None:
+                return
+            self.__write(index, _RELEASED, 0)
+            self.forget(user_name)
+
+    def __write(self, index: int, payload: bytes, expiration: float) -> None:
+        offset = self.__offset(index)
+        sequence = self.sequence(index)
+        _SEQUENCE.pack_into(self.__file, offset, sequence + 1)
+        start = offset + _SLOT_HEADER.size
+        self.__file[start : start + len(payload)] = payload
+        _SLOT_HEADER.pack_into(self.__file, offset, sequence + 1, expiration, len(payload))
+        _SEQUENCE.pack_into(self.__file, offset, sequence + 2)
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+def _payload(authentication: Authentication) -> bytes:
+    return json.dumps(
+        {
+            'authentication': authentication.model_dump(),
+            'headers': authentication.wire.headers,
+            'cookies': authentication.wire.cookies,
+            'query_string': authentication.wire.query_string,
+        },
+        separators=(',', ':'),
+    ).encode()
+
+
+class SharedAuthenticationStore(AuthenticationStore):
+    """
+    In-memory store that also publishes the current authentication of each user to a shared authentication table,
+    read by `ReplicaAuthenticationStore` instances in other processes. A single process should write to a table.
+
+    - Users evicted because of `max_users` are released from the table, so `slots` must be greater than `max_users`.
+    """
+
+    table: SharedAuthenticationTable
+
+    def __init__(
+        self,
+        path: str,
+        slots: int = DEFAULT_TABLE_SLOTS,
+        slot_size: int = DEFAULT_SLOT_SIZE,
+        history_depth: int = DEFAULT_HISTORY_DEPTH,
+        max_users: int | None = None,
+    ) -> None:
+        if max_users is not None and max_users >= slots:
+            # An user is published before the least recently used one is evicted
+            raise SharedTableException(f'A table of {slots} slots cannot hold {max_users} users and a new one.')
+        super().__init__(history_depth, max_users)
+        self.table = SharedAuthenticationTable(path, slots, slot_size, writable=True)
+
+    def store(self, user_name: UserName, authentication: Authentication, expiration: datetime.datetime) -> int:
+        # Published first, so that an authentication that does not fit in the table is not stored either
+        self.table.publish(user_name, _payload(authentication), expiration)
+        return super().store(user_name, authentication, expiration)
+
+    def expire(self, user_name: UserName) -> None:
+        super().expire(user_name)
+        authentication, expiration = self.get(user_name)
+        self.table.publish(user_name, _payload(authentication), expiration)
+
+    def _evicted(self, user_name: UserName) -> None:
+        self.table.release(user_name)
+
+    def close(self) -> None:
+        self.table.close()
+
+
+class ReplicaAuthenticationStore(AuthenticationBackend):
+    """
+    Read-only view of a shared authentication table. Reads take no lock: an unchanged slot costs a single
+    sequence number comparison, and a changed slot is decoded once.
+
+    - Only the current authentication of each user is available.
+    - Raises a `ReadOnlyStoreException` on writes.
+    """
+
+    table: SharedAuthenticationTable
+
+    __decoded: dict[int, tuple[int, Authentication, datetime.datetime, AuthenticationWire]]
+
+    def __init__(self, path: str) -> None:
+        self.table = SharedAuthenticationTable(path)
+        self.__decoded = {}
+
+    def __read(self, user_name: UserName) -> tuple[Authentication, datetime.datetime, AuthenticationWire]:
+        index = self.table.find(user_name)
+        if index is None:
+            raise UnauthenticatedUserException(user_name)
+
+        decoded = self.__decoded.get(index)
+        if decoded is not None and decoded[0] == self.table.sequence(index):
+            return decoded[1:]
+
+        sequence, expiration, payload = self.table.snapshot(index)
+        prefix = self.table.prefix(user_name)
+        if not payload.startswith(prefix):
+            # The slot was released since its index was cached
+            self.table.forget(user_name)
+            return self.__read(user_name)
+
+        document = json.loads(payload[len(prefix) :])
+        decoded = (
+            sequence,
+            Authentication.model_validate(document['authentication']),
+            datetime.datetime.fromtimestamp(expiration),
+            AuthenticationWire(document['headers'], document['cookies'], document['query_string']),
+        )
+        self.__decoded[index] = decoded
+        return decoded[1:]
+
+    def get(self, user_name: UserName) -> tuple[Authentication, datetime.datetime]:
+        authentication, expiration, _ = self.__read(user_name)
+        return authentication, expiration
+
+    def get_history(self, user_name: UserName) -> list[tuple[Authentication, datetime.datetime]]:
+        return [self.get(user_name)]
+
+    def wire(self, user_name: UserName) -> AuthenticationWire:
+        """
+        The current authentication of an user, as sent on the wire.
+
+        - Raises an `UnauthenticatedUserException` if the user has not been published yet
+        """
+        return self.__read(user_name)[2]
+
+    def store(
+        self,
+        user_name: UserName,  # noqa: ARG002
+        authentication: Authentication,  # noqa: ARG002
+        expiration: datetime.datetime,  # noqa: ARG002
+    ) -> int:
+        raise ReadOnlyStoreException
+
+    def expire(self, user_name: UserName) -> None:  # noqa: ARG002
+        raise ReadOnlyStoreException
+
+    def close(self) -> None:
+        self.table.close()
@@ -0,0 +1,123 @@
+import datetime
+import pathlib
+import threading
+
+import pytest
+
+from multiauth.lib.http_core.entities import HTTPCookie, HTTPHeader, HTTPQueryParameter
+from multiauth.lib.store.authentication import Authentication, UnauthenticatedUserException
+from multiauth.lib.store.shared import (
+    ReadOnlyStoreException,
+    ReplicaAuthenticationStore,
+    SharedAuthenticationStore,
+    SharedTableException,
+)
+from multiauth.lib.store.user import UserName
+
+
+def authentication(token: str) -> Authentication:
+    return Authentication(
+        headers=[HTTPHeader(name='Authorization', values=[f'Bearer {token}'])],
+        cookies=[HTTPCookie(name='session', values=[token])],
+        query_parameters=[HTTPQueryParameter(name='token', values=[token])],
+    )
+
+
+def test_replica(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'authentications.table')
+    expiration = (datetime.datetime.now() + datetime.timedelta(hours=1)).replace(microsecond=0)
+
+    writer = SharedAuthenticationStore(path, slots=4, slot_size=1024)
+    replica = ReplicaAuthenticationStore(path)
+
+    with pytest.raises(UnauthenticatedUserException):
+        replica.get(UserName('user'))
+
+    writer.store(UserName('user'), authentication('a'), expiration)
+    writer.store(UserName('other'), authentication('b'), expiration)
+    assert replica.get(UserName('user')) == (authentication('a'), expiration)
+    assert replica.wire(UserName('other')).headers == authentication('b').all_headers
+    assert replica.wire(UserName('other')).cookies == 'session=b'
+    assert replica.wire(UserName('other')).query_string == 'token=b'
+
+    # Updates are visible to the replica
+    writer.store(UserName('user'), authentication('c'), expiration)
+    assert replica.get(UserName('user'))[0] == authentication('c')
+    writer.expire(UserName('user'))
+    assert replica.is_expired(UserName('user'))
+
+    with pytest.raises(ReadOnlyStoreException):
+        replica.store(UserName('user'), authentication('d'), expiration)
+
+    # Authentications larger than a slot are rejected
+    with pytest.raises(SharedTableException):
+        writer.store(UserName('user'), authentication('e' * 1024), expiration)
+    assert writer.get(UserName('user'))[0] == authentication('c')
+
+    replica.close()
+    writer.close()
+
+
+def test_evicted_users_are_released(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'authentications.table')
+    expiration = datetime.datetime.now() + datetime.timedelta(hours=1)
+
+    with pytest.raises(SharedTableException):
+        SharedAuthenticationStore(path, slots=2, max_users=2)
+
+    writer = SharedAuthenticationStore(path, slots=3, slot_size=1024, max_users=2)
+    replica = ReplicaAuthenticationStore(path)
+
+    # Cycling through more users than slots does not fill the table, and replicas do not serve evicted users
+    for i in range(16):
+        writer.store(UserName(f'user-{i}'), authentication(str(i)), expiration)
+        assert replica.get(UserName(f'user-{i}'))[0] == authentication(str(i))
+        if i >= 2:
+            with pytest.raises(UnauthenticatedUserException):
+                replica.get(UserName(f'user-{i - 2}'))
+    assert replica.get(UserName('user-14'))[0] == authentication('14')
+
+    # User names cannot collide with the prefix of another user
+    with pytest.raises(SharedTableException):
+        writer.store(UserName('user-15\n{"authentication"'), authentication('x'), expiration)
+    with pytest.raises(UnauthenticatedUserException):
+        replica.get(UserName('user-15\n'))
+
+    replica.close()
+    writer.close()
+
+
+def test_replica_reads_are_consistent(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'authentications.table')
+    expiration = datetime.datetime.now() + datetime.timedelta(hours=1)
+
+    # Large enough for the longest token written below
+    writer = SharedAuthenticationStore(path, slots=4, slot_size=4096)
+    writer.store(UserName('user'), authentication('0'), expiration)
+    replica = ReplicaAuthenticationStore(path)
+    done = threading.Event()
+    errors: list[Exception] = []
+
+    def write() -> None:
+        try:
+            for i in range(2000):
+                writer.store(UserName('user'), authentication(str(i) * (i % 50 + 1)), expiration)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    while not done.is_set():
+        wire = replica.wire(UserName('user'))
+        token = wire.cookies.removeprefix('session=')
+        assert wire.headers['Authorization'] == f'Bearer {token}'
+        assert wire.query_string == f'token={token}'
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert errors == []
+
+    replica.close()
+    writer.close()
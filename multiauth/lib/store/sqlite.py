@@ -0,0 +1,247 @@
+import datetime
+import os
+import sqlite3
+import threading
+import weakref
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from multiauth.helpers.fork import ForkAware
+from multiauth.lib.store.authentication import (
+    DEFAULT_HISTORY_DEPTH,
+    Authentication,
+    AuthenticationBackend,
+    UnauthenticatedUserException,
+)
+from multiauth.lib.store.user import UserName
+
+# Number of seconds a connection waits for the write lock held by another connection
+DEFAULT_BUSY_TIMEOUT_SECONDS = 10
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS authentications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_name TEXT NOT NULL,
+        authentication TEXT NOT NULL,
+        expiration REAL NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS authentications_user_name ON authentications (user_name, id)',
+    'CREATE INDEX IF NOT EXISTS authentications_expiration ON authentications (expiration)',
+    """
+    CREATE TABLE IF NOT EXISTS refresh_counts (
+        user_name TEXT PRIMARY KEY,
+        count INTEGER NOT NULL
+    )
+    """,
+)
+
+
+class SQLiteAuthenticationStore(AuthenticationBackend, ForkAware):
+    """
+    Store for user authentication objects, persisted in a SQLite database, so that valid authentications survive
+    restarts and are shared between the processes of a host.
+
+    - The database is opened in WAL mode: readers do not block the writer, and the writer does not block readers.
+    - Writes are serialized with `BEGIN IMMEDIATE` transactions, waiting up to `busy_timeout_seconds` for the lock.
+    - Each thread of each process uses its own connection, closed once the thread has exited.
+    - Only the last `history_depth` authentication objects of each user are retained.
+    """
+
+    path: str
+    history_depth: int
+    busy_timeout_seconds: float
+
+    __local: threading.local
+    # The connection of each thread, along with the thread
+    __connections: list[tuple[weakref.ref[threading.Thread], sqlite3.Connection]]
+    __lock: threading.Lock
+    __initialized: bool
+
+    def __init__(
+        self,
+        path: str,
+        history_depth: int = DEFAULT_HISTORY_DEPTH,
+        busy_timeout_seconds: float = DEFAULT_BUSY_TIMEOUT_SECONDS,
+    ) -> None:
+        if history_depth < 1:
+            raise ValueError('The history depth must be at least 1.')
+
+        super().__init__()
+        self.path = path
+        self.history_depth = history_depth
+        self.busy_timeout_seconds = busy_timeout_seconds
+
+        self.__local = threading.local()
+        self.__connections = []
+        self.__lock = threading.Lock()
+        self.__initialized = False
+
+    def _after_fork(self) -> None:
+        # Inherited connections are left to the parent: the child opens its own ones on demand
+        self.__local = threading.local()
+        self.__connections = []
+        self.__lock = threading.Lock()
+
+    @property
+    def __connection(self) -> sqlite3.Connection:
+        # Connections are not shared between threads, nor inherited by forked processes
+        connection: sqlite3.Connection | None = getattr(self.__local, 'connection', None)
+        if connection is not None and self.__local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_seconds,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_seconds * 1000)}')
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA synchronous = NORMAL')
+
+        with self.__lock:
+            if not self.__initialized:
+                with self.__transaction(connection):
+                    for statement in _SCHEMA:
+                        connection.execute(statement)
+                self.__initialized = True
+            # Executors start new threads for each batch: the connections of the exited ones are released here
+            released = [previous for thread, previous in self.__connections if not _is_alive(thread)]
+            self.__connections = [entry for entry in self.__connections if _is_alive(entry[0])]
+            self.__connections.append((weakref.ref(threading.current_thread()), connection))
+
+        for previous in released:
+            previous.close()
+
+        self.__local.connection = connection
+        self.__local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    @contextmanager
+    def __transaction(connection: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        # Take the write lock upfront, so that concurrent writers wait for each other instead of failing to upgrade
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    @staticmethod
+    def __record(row: tuple[str, float]) -> tuple[Authentication, datetime.datetime]:
+        return Authentication.model_validate_json(row[0]), datetime.datetime.fromtimestamp(row[1])
+
+    def get(self, user_name: UserName) -> tuple[Authentication, datetime.datetime]:
+        row = self.__connection.execute(
+            'SELECT authentication, expiration FROM authentications WHERE user_name = ? ORDER BY id DESC LIMIT 1',
+            (user_name,),
+        ).fetchone()
+        if row is None:
+            raise UnauthenticatedUserException(user_name)
+        return self.__record(row)
+
+    def get_history(self, user_name: UserName) -> list[tuple[Authentication, datetime.datetime]]:
+        rows = self.__connection.execute(
+            'SELECT authentication, expiration FROM authentications WHERE user_name = ? ORDER BY id',
+            (user_name,),
+        ).fetchall()
+        if not rows:
+            raise UnauthenticatedUserException(user_name)
+        return [self.__record(row) for row in rows]
+
+    def store(self, user_name: UserName, authentication: Authentication, expiration: datetime.datetime) -> int:
+        with self.__transaction(self.__connection) as connection:
+            connection.execute(
+                'INSERT INTO authentications (user_name, authentication, expiration) VALUES (?, ?, ?)',
+                (user_name, authentication.model_dump_json(), expiration.timestamp()),
+            )
+            connection.execute(
+                """
+                DELETE FROM authentications WHERE user_name = ? AND id NOT IN (
+                    SELECT id FROM authentications WHERE user_name = ? ORDER BY id DESC LIMIT ?
+                )
+                """,
+                (user_name, user_name, self.history_depth),
+            )
+            connection.execute(
+                """
+                INSERT INTO refresh_counts (user_name, count) VALUES (?, 0)
+                ON CONFLICT (user_name) DO UPDATE SET count = count + 1
+                """,
+                (user_name,),
+            )
+            (count,) = connection.execute(
+                'SELECT count FROM refresh_counts WHERE user_name = ?',
+                (user_name,),
+            ).fetchone()
+
+        return count
+
+    def expire(self, user_name: UserName) -> None:
+        with self.__transaction(self.__connection) as connection:
+            cursor = connection.execute(
+                """
+                UPDATE authentications SET expiration = ?
+                WHERE id = (SELECT MAX(id) FROM authentications WHERE user_name = ?)
+                """,
+                (datetime.datetime.now().timestamp(), user_name),
+            )
+            if cursor.rowcount == 0:
+                raise UnauthenticatedUserException(user_name)
+
+    def expiring(self, before: datetime.datetime) -> list[tuple[UserName, datetime.datetime]]:
+        """
+        The users whose current authentication expires before the provided date, with its expiration datetime,
+        from the first to expire to the last.
+        """
+        rows = self.__connection.execute(
+            """
+            SELECT user_name, expiration FROM authentications
+            WHERE expiration < ? AND id IN (SELECT MAX(id) FROM authentications GROUP BY user_name)
+            ORDER BY expiration
+            """,
+            (before.timestamp(),),
+        ).fetchall()
+        return [(UserName(user_name), datetime.datetime.fromtimestamp(expiration)) for user_name, expiration in rows]
+
+    def purge(self, before: datetime.datetime) -> int:
+        """
+        Delete the past authentication objects that expired before the provided date. The current authentication
+        object of each user is kept. Return the number of deleted objects.
+        """
+        with self.__transaction(self.__connection) as connection:
+            cursor = connection.execute(
+                """
+                DELETE FROM authentications
+                WHERE expiration < ? AND id NOT IN (SELECT MAX(id) FROM authentications GROUP BY user_name)
+                """,
+                (before.timestamp(),),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """
+        Close the connections opened by this process. Connections inherited from a parent process are left to it.
+        """
+        with self.__lock:
+            connections, self.__connections = self.__connections, []
+        for _, connection in connections:
+            connection.close()
+        self.__local = threading.local()
+
+    @property
+    def open_connections(self) -> int:
+        """
+        The number of connections open in this process, including those of exited threads not released yet.
+        """
+        with self.__lock:
+            return len(self.__connections)
+
+
+def _is_alive(thread: weakref.ref[threading.Thread]) -> bool:
+    referent = thread()
+    return referent is not None and referent.is_alive()
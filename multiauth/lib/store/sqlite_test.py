@@ -0,0 +1,75 @@
+import datetime
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from multiauth.lib.http_core.entities import HTTPCookie, HTTPHeader
+from multiauth.lib.store.authentication import Authentication, UnauthenticatedUserException
+from multiauth.lib.store.sqlite import SQLiteAuthenticationStore
+from multiauth.lib.store.user import UserName
+
+
+def authentication(token: str) -> Authentication:
+    return Authentication(
+        headers=[HTTPHeader(name='Authorization', values=[f'Bearer {token}'])],
+        cookies=[HTTPCookie(name='session', values=[token])],
+    )
+
+
+def test_authentications_survive_restarts(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'authentications.db')
+    expiration = (datetime.datetime.now() + datetime.timedelta(hours=1)).replace(microsecond=0)
+
+    store = SQLiteAuthenticationStore(path, history_depth=2)
+    with pytest.raises(UnauthenticatedUserException):
+        store.get(UserName('user'))
+    for i in range(3):
+        assert store.store(UserName('user'), authentication(f'token-{i}'), expiration) == i
+    store.close()
+
+    # Another store, e.g. in another worker, reads the same authentications
+    store = SQLiteAuthenticationStore(path, history_depth=2)
+    assert store.get(UserName('user')) == (authentication('token-2'), expiration)
+    assert [record for record, _ in store.get_history(UserName('user'))] == [
+        authentication('token-1'),
+        authentication('token-2'),
+    ]
+
+    store.expire(UserName('user'))
+    assert store.is_expired(UserName('user'))
+    assert len(store.get_history(UserName('user'))) == 2
+    assert [user_name for user_name, _ in store.expiring(datetime.datetime.now())] == ['user']
+    store.close()
+
+
+def test_concurrent_writers(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'authentications.db')
+    expiration = datetime.datetime.now() + datetime.timedelta(hours=1)
+    stores = [SQLiteAuthenticationStore(path), SQLiteAuthenticationStore(path)]
+
+    def store(i: int) -> int:
+        return stores[i % 2].store(UserName('user'), authentication(f'token-{i}'), expiration)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        counts = list(executor.map(store, range(64)))
+
+    # Each write saw the previous ones
+    assert sorted(counts) == list(range(64))
+    for s in stores:
+        s.close()
+
+
+def test_connections_of_exited_threads_are_released(tmp_path: pathlib.Path) -> None:
+    store = SQLiteAuthenticationStore(str(tmp_path / 'authentications.db'))
+    store.store(UserName('user'), authentication('token'), datetime.datetime.now() + datetime.timedelta(hours=1))
+
+    # As `Multiauth.authenticate_users`, each batch runs in a new executor: the connections of the previous batch are
+    # released as the next one opens its own
+    for _ in range(3):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: store.get(UserName('user')), range(16)))
+        assert store.open_connections <= 1 + 4
+
+    store.close()
+    assert store.open_connections == 0
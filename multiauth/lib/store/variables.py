@@ -1,21 +1,79 @@
+import re
+from collections.abc import Mapping
+
 from pydantic import Field
 
 from multiauth.helpers.base_model import StrictBaseModel
 from multiauth.lib.entities import VariableName
 
+# `{{ name }}`, with any whitespace around the name
+PLACEHOLDER_PATTERN = re.compile(r'(\{\{\s*([^{}]+?)\s*\}\})')
+
 
 class AuthenticationVariable(StrictBaseModel):
     name: VariableName = Field(description='The name of the variable')
     value: str = Field(description='The value of the variable')
 
 
-def interpolate_string(string: str, variables: list[AuthenticationVariable]) -> str:
-    """Interpolate a string with variables."""
+Variables = list[AuthenticationVariable] | Mapping[str, str]
+
+
+def variables_by_name(variables: Variables) -> Mapping[str, str]:
+    """Index variables by name. When a name is declared several times, the first variable wins."""
+
+    if isinstance(variables, Mapping):
+        return variables
+    return {variable.name: variable.value for variable in reversed(variables)}
+
+
+class StringTemplate:
+    """A string compiled once into literals and placeholders, interpolated in a single pass."""
+
+    __slots__ = ('string', 'names', '__parts')
+
+    string: str
+    names: frozenset[str]
+
+    # Literals, followed by (placeholder, name) pairs and the literal after them
+    __parts: list[str]
+
+    def __init__(self, string: str) -> None:
+        self.string = string
+        self.__parts = PLACEHOLDER_PATTERN.split(string)
+        self.names = frozenset(self.__parts[2::3])
+
+    def render(self, variables: Variables) -> str:
+        if not self.names:
+            return self.string
+
+        values = variables_by_name(variables)
+        parts = self.__parts
+        rendered = [parts[0]]
+        for i in range(1, len(parts), 3):
+            # Unresolved placeholders are left as is
+            rendered.append(values.get(parts[i + 1], parts[i]))
+            rendered.append(parts[i + 2])
+
+        return ''.join(rendered)
+
+    def unresolved(self, variables: Variables) -> set[str]:
+        """The names of the placeholders that the provided variables do not resolve."""
+
+        values = variables_by_name(variables)
+        return {name for name in self.names if name not in values}
+
+
+def interpolate_string(string: str, variables: Variables) -> str:
+    """Interpolate a string with variables. Substituted values are not interpolated again."""
+
+    if '{{' not in string:
+        return string
+
+    values = variables_by_name(variables)
+    return PLACEHOLDER_PATTERN.sub(lambda match: values.get(match[2], match[1]), string)
+
 
-    for variable in variables:
-        string = string.replace('{{ %s }}' % variable.name, variable.value)
-        string = string.replace('{{ %s}}' % variable.name, variable.value)
-        string = string.replace('{{%s }}' % variable.name, variable.value)
-        string = string.replace('{{%s}}' % variable.name, variable.value)
+def unresolved_placeholders(string: str, variables: Variables) -> set[str]:
+    """The names of the placeholders of a string that the provided variables do not resolve."""
 
-    return string
+    return StringTemplate(string).unresolved(variables)
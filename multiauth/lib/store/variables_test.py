@@ -0,0 +1,32 @@
+from multiauth.lib.entities import VariableName
+from multiauth.lib.store.variables import (
+    AuthenticationVariable,
+    StringTemplate,
+    interpolate_string,
+    unresolved_placeholders,
+)
+
+
+def test_interpolate_string() -> None:
+    variables = [
+        AuthenticationVariable(name=VariableName('user'), value='alice'),
+        AuthenticationVariable(name=VariableName('token'), value='{{ user }}'),
+        AuthenticationVariable(name=VariableName('user'), value='bob'),
+    ]
+
+    assert interpolate_string('{{user}} {{ user}} {{user }} {{  user\t}}', variables) == 'alice alice alice alice'
+    # Substituted values are not interpolated again
+    assert interpolate_string('Bearer {{ token }}', variables) == 'Bearer {{ user }}'
+    assert interpolate_string('{{ user }}:{{ password }}', variables) == 'alice:{{ password }}'
+    assert interpolate_string('{{ user }}', {'user': 'carol'}) == 'carol'
+
+
+def test_string_template() -> None:
+    template = StringTemplate('{"user": "{{ user }}", "password": "{{password}}", "user_again": "{{user}}"}')
+
+    assert template.names == {'user', 'password'}
+    assert template.render({'user': 'alice', 'password': 's3cret'}) == (
+        '{"user": "alice", "password": "s3cret", "user_again": "alice"}'
+    )
+    assert template.unresolved({'user': 'alice'}) == {'password'}
+    assert unresolved_placeholders('{{ a }} {{ b }}', {'a': ''}) == {'b'}
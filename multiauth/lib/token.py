@@ -1,14 +1,19 @@
 import base64
+import functools
 import json
-import xml.etree.ElementTree as ET
+import re
+from collections.abc import Callable
 from datetime import datetime
 from enum import StrEnum
 from http.cookies import SimpleCookie
+from typing import TypeVar
 
-import requests
+import httpx
 from pydantic import Field
 
 from multiauth.helpers.base_model import StrictBaseModel
+from multiauth.lib.saml import SAMLException, is_saml, parse_saml
+from multiauth.lib.token_cache import TokenCache, token_digest
 
 
 class TokenType(StrEnum):
@@ -17,6 +22,10 @@ class TokenType(StrEnum):
     OAUTH = 'OAUTH'
 
 
+# Three base64url segments, the signature being empty for unsecured tokens
+JWT_PATTERN = re.compile(r'[A-Za-z0-9_-]+={0,2}\.[A-Za-z0-9_-]+={0,2}\.[A-Za-z0-9_-]*={0,2}')
+
+
 class Token(StrictBaseModel):
     """This class represents a generic token."""
 
@@ -77,6 +86,36 @@ class OAuthToken(Token):
     # Add other fields as needed based on your OAuth server's response
 
 
+TokenT = TypeVar('TokenT', bound=Token)
+
+# Shared by all the parsers, so that a token is decoded once until it expires
+_token_cache: TokenCache[Token] = TokenCache()
+
+
+def token_cache() -> TokenCache[Token]:
+    """The cache of the tokens parsed by this process."""
+
+    return _token_cache
+
+
+def cached_parser(parse: Callable[..., TokenT | None]) -> Callable[..., TokenT | None]:
+    """Cache the tokens returned by a parser, keyed by the digest of the parser name and its arguments."""
+
+    @functools.wraps(parse)
+    def wrapper(*args: str) -> TokenT | None:
+        key = token_digest(parse.__name__, *args)
+        cached = _token_cache.get(key)
+        if cached is not None:
+            return cached  # type: ignore[return-value]
+
+        token = parse(*args)
+        if token is not None:
+            _token_cache.put(key, token, token.expiration)
+        return token
+
+    return wrapper
+
+
 def extract_token(string: str) -> str:
     """Extracts a token from a string that could be an authorization header or a cookie."""
     # Handling Bearer tokens
@@ -98,51 +137,39 @@ def extract_token(string: str) -> str:
     return string
 
 
+def _saml_date(value: str | None) -> datetime | None:
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ') if value else None
+
+
+@cached_parser
 def parse_saml_token(token: str) -> SAMLToken | None:
-    """Extracts a SAML token into a SAMLToken object."""
+    """
+    Extracts a SAML token into a SAMLToken object. The token can be raw XML, or a base64-encoded, optionally
+    deflated, SAML message.
+    """
 
     token = extract_token(token)
 
     try:
-        root = ET.fromstring(token)  # noqa: S314
-        namespace = {'saml': 'urn:oasis:names:tc:SAML:2.0:assertion'}
-
-        issuer = root.find('.//saml:Issuer', namespace)
-        subject = root.find('.//saml:Subject/saml:NameID', namespace)
-        conditions = root.find('.//saml:Conditions', namespace)
-        attributes: dict[str, str] = {}
-
-        for attr in root.findall('.//saml:AttributeStatement/saml:Attribute', namespace):
-            if ((attr_name := attr.get('Name')) is not None) and (
-                (attr_val := attr.find('.//saml:AttributeValue', namespace)) is not None
-            ):
-                attributes[attr_name] = attr_val.text or ''
-
-        authn_context = root.find('.//saml:AuthnContextClassRef', namespace)
-
-        expiration = (
-            datetime.strptime(conditions.get('NotOnOrAfter', ''), '%Y-%m-%dT%H:%M:%SZ')
-            if conditions is not None and conditions.get('NotOnOrAfter')
-            else None
-        )
+        claims = parse_saml(token)
+        expiration = _saml_date(claims['not_on_or_after'])
 
         return SAMLToken(
             raw=token,
             type=TokenType.SAML,
-            issuer=issuer.text if issuer is not None else None,
-            subject=subject.text if subject is not None else None,
-            notBefore=datetime.strptime(conditions.get('NotBefore', ''), '%Y-%m-%dT%H:%M:%SZ')
-            if conditions is not None and conditions.get('NotBefore')
-            else None,
+            issuer=claims['issuer'],
+            subject=claims['subject'],
+            notBefore=_saml_date(claims['not_before']),
             notOnOrAfter=expiration,
             expiration=expiration,
-            attributes=attributes,
-            authnContext=authn_context.text if authn_context is not None else None,
+            attributes=claims['attributes'],
+            authnContext=claims['authn_context'],
         )
-    except Exception:
+    except (SAMLException, ValueError):
         return None
 
 
+@cached_parser
 def parse_jwt_token(token: str) -> JWTToken | None:
     """This function transforms a JWT token into a defined datatype."""
 
@@ -180,9 +207,42 @@ def parse_jwt_token(token: str) -> JWTToken | None:
         return None
 
 
-def parse_oauth_token(token: str, introspection_url: str, client_id: str, client_secret: str) -> OAuthToken | None:
-    """Parses an opaque OAuth 2.0 Access Token using introspection endpoint."""
-    token = extract_token(token)
+INTROSPECTION_TIMEOUT = 5
+
+
+def oauth_token_from_introspection(token: str, token_data: dict) -> OAuthToken:
+    """Build an OAuthToken from the response of an introspection endpoint (RFC 7662)."""
+
+    expiration = token_data.get('exp', None)
+
+    return OAuthToken(
+        raw=token,
+        type=TokenType.OAUTH,
+        active=token_data.get('active', False),
+        scope=token_data.get('scope'),
+        client_id=token_data.get('client_id'),
+        username=token_data.get('username'),
+        token_type=token_data.get('token_type'),
+        exp=token_data.get('exp'),
+        iat=token_data.get('iat'),
+        nbf=token_data.get('nbf'),
+        sub=token_data.get('sub'),
+        aud=token_data.get('aud'),
+        iss=token_data.get('iss'),
+        jti=token_data.get('jti'),
+        expiration=datetime.fromtimestamp(expiration) if expiration is not None else None,
+        # Map other fields as required
+    )
+
+
+def introspect(
+    client: httpx.Client,
+    token: str,
+    introspection_url: str,
+    client_id: str,
+    client_secret: str,
+) -> OAuthToken | None:
+    """Post a token to an introspection endpoint. Returns None if the endpoint could not be reached."""
 
     data = {
         'token': token,
@@ -191,51 +251,60 @@ def parse_oauth_token(token: str, introspection_url: str, client_id: str, client
     }
 
     try:
-        response = requests.post(introspection_url, data=data, timeout=5)
+        response = client.post(introspection_url, data=data, timeout=INTROSPECTION_TIMEOUT)
         response.raise_for_status()
         token_data = response.json()
+    except (httpx.HTTPError, json.JSONDecodeError):
+        return None
 
-        expiration = token_data.get('exp', None)
-
-        return OAuthToken(
-            raw=token,
-            type=TokenType.OAUTH,
-            active=token_data.get('active', False),
-            scope=token_data.get('scope'),
-            client_id=token_data.get('client_id'),
-            username=token_data.get('username'),
-            token_type=token_data.get('token_type'),
-            exp=token_data.get('exp'),
-            iat=token_data.get('iat'),
-            nbf=token_data.get('nbf'),
-            sub=token_data.get('sub'),
-            aud=token_data.get('aud'),
-            iss=token_data.get('iss'),
-            jti=token_data.get('jti'),
-            expiration=datetime.fromtimestamp(expiration) if expiration is not None else None,
-            # Map other fields as required
-        )
-    except requests.RequestException:
+    if not isinstance(token_data, dict):
         return None
+    return oauth_token_from_introspection(token, token_data)
+
+
+def parse_oauth_token(token: str, introspection_url: str, client_id: str, client_secret: str) -> OAuthToken | None:
+    """
+    Parses an opaque OAuth 2.0 Access Token using introspection endpoint. Results are cached by the introspection
+    client of the endpoint: inactive tokens, and tokens without expiry, are introspected again after a while.
+    """
+    # Imported here, as the introspection client is built upon the token types
+    from multiauth.lib.introspection import introspection_client
+
+    return introspection_client(introspection_url, client_id, client_secret).introspect(token)
+
+
+def sniff_token(token: str) -> TokenType:
+    """
+    Classify a token from its shape, decoding its first bytes at most. Tokens that are neither JWT nor SAML
+    messages, possibly encoded, are opaque.
+    """
 
+    token = extract_token(token).strip()
+    if JWT_PATTERN.fullmatch(token):
+        return TokenType.JWT
+    if is_saml(token):
+        return TokenType.SAML
+    return TokenType.OAUTH
 
-def parse_token(token: str) -> Token | None:
-    """This function transforms a token into a defined datatype."""
-
-    res: Token | None
-
-    res = parse_jwt_token(token)
-    if res is not None:
-        return res
-    res = parse_saml_token(token)
-    if res is not None:
-        return res
-    res = parse_oauth_token(
-        token,
-        '',
-        '',
-        '',
-    )  # TODO(antoine@escape.tech): add support fot missing arguments
-    if res is not None:
-        return res
-    return None
+
+def parse_token(
+    token: str,
+    introspection_url: str | None = None,
+    client_id: str = '',
+    client_secret: str = '',
+) -> Token | None:
+    """
+    This function transforms a token into a defined datatype.
+    JWT and SAML tokens are decoded locally. Opaque tokens are introspected only if an introspection endpoint is
+    provided. Parsed tokens are cached until they expire.
+    """
+
+    token_type = sniff_token(token)
+    if token_type == TokenType.JWT:
+        return parse_jwt_token(token)
+    if token_type == TokenType.SAML:
+        return parse_saml_token(token)
+
+    if not introspection_url:
+        return None
+    return parse_oauth_token(token, introspection_url, client_id, client_secret)
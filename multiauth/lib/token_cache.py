@@ -0,0 +1,84 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Generic, TypeVar
+
+from multiauth.helpers.fork import ForkAware
+
+T = TypeVar('T')
+
+DEFAULT_TOKEN_CACHE_SIZE = 4096
+
+
+def token_digest(*parts: str) -> str:
+    """Digest identifying a raw token, so that the cache does not keep raw tokens as keys."""
+
+    return hashlib.sha256('\x00'.join(parts).encode()).hexdigest()
+
+
+class TokenCache(ForkAware, Generic[T]):
+    """
+    Bounded LRU cache of parsed tokens, keyed by the digest of the raw token.
+    Entries expire with the token they were parsed from.
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+
+    __entries: OrderedDict[str, tuple[T, datetime | None]]
+    __lock: threading.Lock
+
+    def __init__(self, maxsize: int = DEFAULT_TOKEN_CACHE_SIZE) -> None:
+        super().__init__()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def _after_fork(self) -> None:
+        self.__lock = threading.Lock()
+
+    def get(self, key: str) -> T | None:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= datetime.now():
+                del self.__entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, value: T, expiration: datetime | None) -> None:
+        """
+        Cache a value until the provided expiration, or until it is evicted if it has none.
+        Values that have already expired are not cached.
+        """
+        if expiration is not None and expiration <= datetime.now():
+            return
+
+        with self.__lock:
+            self.__entries[key] = (value, expiration)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.__entries), 'maxsize': self.maxsize}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
@@ -1,6 +1,22 @@
+import base64
+import json
+import time
+import zlib
+
 import pytest
+from pytest_mock import MockerFixture
 
-from multiauth.lib.token import JWTToken, SAMLToken, TokenType, extract_token, parse_jwt_token, parse_saml_token
+from multiauth.lib.token import (
+    JWTToken,
+    SAMLToken,
+    TokenType,
+    extract_token,
+    parse_jwt_token,
+    parse_saml_token,
+    parse_token,
+    sniff_token,
+    token_cache,
+)
 
 
 # Fixture for valid JWT token
@@ -82,3 +98,61 @@ def test_parse_saml_token(valid_sample_token: str) -> None:
     assert token.notOnOrAfter.isoformat() == '2021-01-02T00:00:00'  # type: ignore[union-attr]
     assert token.attributes['SampleAttribute'] == 'SampleValue'
     assert token.authnContext == 'SampleAuthnContext'
+
+
+def test_sniff_token(valid_jwt_token: str, valid_sample_token: str) -> None:
+    assert sniff_token(valid_jwt_token) == TokenType.JWT
+    assert sniff_token(f'Bearer {valid_jwt_token}') == TokenType.JWT
+    assert sniff_token(valid_sample_token) == TokenType.SAML
+    assert sniff_token('2YotnFZFEjr1zCsicMWpAA') == TokenType.OAUTH
+    assert sniff_token('not.a.jwt!') == TokenType.OAUTH
+
+
+def test_parse_token_does_not_introspect_without_endpoint(mocker: MockerFixture) -> None:
+    post = mocker.patch('multiauth.lib.introspection.introspect')
+
+    assert parse_token('2YotnFZFEjr1zCsicMWpAA') is None
+    post.assert_not_called()
+
+
+def test_parsed_tokens_are_cached_until_they_expire(valid_jwt_token: str) -> None:
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': int(time.time()) + 60}).encode()).decode().rstrip('=')
+    fresh_jwt_token = f'eyJhbGciOiJIUzI1NiJ9.{payload}.c2lnbmF0dXJl'
+    cache = token_cache()
+    cache.clear()
+
+    assert parse_token(fresh_jwt_token) is parse_token(fresh_jwt_token)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Expired tokens are parsed again
+    assert parse_token(valid_jwt_token) is not parse_token(valid_jwt_token)
+    assert len(cache) == 1
+
+
+def test_parse_encoded_saml_token(valid_sample_token: str) -> None:
+    encoded = base64.b64encode(valid_sample_token.encode()).decode()
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    deflated = base64.b64encode(compressor.compress(valid_sample_token.encode()) + compressor.flush()).decode()
+
+    for token in (encoded, deflated):
+        assert sniff_token(token) == TokenType.SAML
+        saml_token = parse_token(token)
+        assert isinstance(saml_token, SAMLToken)
+        assert saml_token.subject == 'SampleSubject'
+        assert saml_token.attributes == {'SampleAttribute': 'SampleValue'}
+
+
+def test_opaque_tokens_are_not_sniffed_as_saml() -> None:
+    # Decodes to bytes starting with `<`
+    assert sniff_token('PAxYzq81kf') == TokenType.OAUTH
+    assert sniff_token(base64.b64encode(b'<html><body>Not SAML</body></html>').decode()) == TokenType.OAUTH
+
+
+def test_parse_saml_token_rejects_entities() -> None:
+    token = """<?xml version="1.0"?>
+    <!DOCTYPE lolz [<!ENTITY lol "lol"><!ENTITY lol2 "&lol;&lol;&lol;&lol;&lol;">]>
+    <saml:Assertion xmlns:saml="urn:oasis:names:tc:SAML:2.0:assertion">
+        <saml:Issuer>&lol2;</saml:Issuer>
+    </saml:Assertion>
+    """
+    assert parse_saml_token(token) is None
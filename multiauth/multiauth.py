@@ -1,10 +1,19 @@
+import asyncio
 import json
-from typing import Any
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import TracebackType
+from typing import Any, Self
+
+import httpx
 
 from multiauth.configuration import (
     MultiauthConfiguration,
 )
 from multiauth.exceptions import MissingProcedureException, MissingUserException, MultiAuthException
+from multiauth.helpers.concurrency import AsyncKeyedSemaphore, AsyncSingleFlight, KeyedSemaphore, SingleFlight
+from multiauth.helpers.fork import ForkAware
 from multiauth.lib.audit.events.base import EventsList
 from multiauth.lib.audit.events.events import (
     HTTPFailureEvent,
@@ -17,22 +26,35 @@ from multiauth.lib.audit.events.events import (
     ValidationSucceededEvent,
 )
 from multiauth.lib.entities import ProcedureName, UserName
-from multiauth.lib.http_core.entities import HTTPRequest
-from multiauth.lib.http_core.request import send_request
+from multiauth.lib.http_core.client import HTTPClientPool
+from multiauth.lib.http_core.entities import HTTPRequest, HTTPResponse
+from multiauth.lib.http_core.request import send_request, send_request_async
 from multiauth.lib.procedure import ISOExpirationTimestamp, Procedure, default_expiration_date
+from multiauth.lib.scheduler import (
+    DEFAULT_CLOCK_SKEW_SECONDS,
+    DEFAULT_REFRESH_JITTER_SECONDS,
+    DEFAULT_REFRESH_MARGIN_SECONDS,
+    DEFAULT_RETRY_SECONDS,
+    AsyncRefreshScheduler,
+    BaseRefreshScheduler,
+    RefreshScheduler,
+)
 from multiauth.lib.store.authentication import (
     Authentication,
+    AuthenticationBackend,
     AuthenticationStore,
     AuthenticationStoreException,
     UnauthenticatedUserException,
 )
 from multiauth.lib.store.user import Credentials, User
 
+# Number of seconds an expired authentication is still served while it is refreshed in the background
+DEFAULT_MAX_STALE_SECONDS = 30
+
 
-class Multiauth:
+class BaseMultiauth:
     """
-    Multiauth is the main entrypoint of the library. It is responsible for running the authentication procedures.
-    Every authentication procedures should be run through a Multiauth instance.
+    State and I/O-free logic shared by the `Multiauth` and `AsyncMultiauth` entrypoints.
     """
 
     configuration: MultiauthConfiguration
@@ -40,15 +62,26 @@ class Multiauth:
     procedures: dict[ProcedureName, Procedure]
     users: dict[UserName, User]
 
-    authentication_store: AuthenticationStore
+    authentication_store: AuthenticationBackend
+    client_pool: HTTPClientPool
 
-    def __init__(self, configuration: MultiauthConfiguration) -> None:
+    # Opt-in: refreshes users in the background before their authentication expires
+    refresh_scheduler: BaseRefreshScheduler | None
+
+    def __init__(
+        self,
+        configuration: MultiauthConfiguration,
+        http_limits: httpx.Limits | None = None,
+        authentication_store: AuthenticationBackend | None = None,
+    ) -> None:
         self.configuration = configuration
 
         self.procedures = {}
         self.users = {}
 
-        self.authentication_store = AuthenticationStore()
+        self.authentication_store = authentication_store if authentication_store is not None else AuthenticationStore()
+        self.client_pool = HTTPClientPool(limits=http_limits)
+        self.refresh_scheduler = None
 
         if configuration.proxy is not None:
             for procedure in configuration.procedures or []:
@@ -57,7 +90,7 @@ class Multiauth:
 
         expanded = configuration.expand()
         for procedure_configuration in expanded.procedures or []:
-            self.procedures[procedure_configuration.name] = Procedure(procedure_configuration)
+            self.procedures[procedure_configuration.name] = Procedure(procedure_configuration, self.client_pool)
         for user in expanded.users or []:
             self.users[user.name] = user
 
@@ -105,13 +138,10 @@ class Multiauth:
 
         return procedure
 
-    def authenticate_users(
-        self,
-    ) -> dict[UserName, tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]]:
-        """
-        Runs the authentication for all users in the configuration. Retrocompatibility purposes with MultiAuth v2.
-        """
-        return {user_name: self.authenticate(user_name) for user_name in self.users.keys()}
+    def _get_user_hosts(self, user_name: UserName) -> set[str]:
+        user = self._get_user(user_name)
+        procedure = self.procedures.get(user.procedure) if user.procedure is not None else None
+        return procedure.hosts if procedure is not None else set()
 
     @property
     def headers_by_user(self) -> dict[UserName, dict[str, str]]:
@@ -120,114 +150,118 @@ class Multiauth:
         """
         return {user: self.authentication_store.get(user)[0].all_headers for user in self.users}
 
-    def authenticate(
-        self,
-        user_name: UserName,
-    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+    def should_refresh(self, user_name: UserName) -> bool:
         """
-        Runs the authentication procedure of the provided user.
+        Assess the expiration status of an user.
 
-        - Raises a `MissingUserException` if the provided user_name is not declared in the multiauth configuration
-        - Raises a `MissingProcedureException` if the provided user relies on a procedure that
-        is not declared in the multiauth configuration.
+        - Raises an UnauthenticatedUserException if no authentication object has been provided yet for this user
         """
-        user = self._get_user(user_name)
-        authentication = Authentication.from_credentials(user.credentials or Credentials())
-        expiration = default_expiration_date()
+        return self.authentication_store.is_expired(user_name)
 
-        error: Exception | None = None
-        events = EventsList()
+    def _store(self, user_name: UserName, authentication: Authentication, expiration: datetime) -> None:
+        self.authentication_store.store(user_name, authentication, expiration)
+        if self.refresh_scheduler is not None:
+            self.refresh_scheduler.schedule(user_name, expiration)
 
-        if user.procedure is not None:
+    def _schedule_stored_authentications(self, scheduler: BaseRefreshScheduler) -> None:
+        for user_name in self.users:
             try:
-                procedure = self._get_authentication_procedure(user_name)
-                procedure_authentication, procedure_events, expiration, error = procedure.run(user)
-                events.extend(procedure_events)
-                authentication = Authentication.merge(authentication, procedure_authentication)
-            except Exception as e:
-                events.append(ProcedureAbortedEvent(reason='unknown', description=f'Unknown error: {e}'))
-                error = e
-                expiration = default_expiration_date()
-        else:
-            events.append(ProcedureSkippedEvent(user_name=user_name))
+                _, expiration = self.authentication_store.get(user_name)
+            except AuthenticationStoreException:
+                continue
+            scheduler.schedule(user_name, expiration)
 
-        self.authentication_store.store(user_name, authentication, expiration)
+    def _lookup_authentication(self, user_name: UserName, max_stale: float) -> tuple[Authentication | None, bool]:
+        """
+        Return the stored authentication of the user if it is still usable, and whether it is stale, i.e. expired
+        for less than `max_stale` seconds.
+        """
+        self._get_user(user_name)
+        try:
+            authentication, expiration = self.authentication_store.get(user_name)
+        except AuthenticationStoreException:
+            return None, False
 
+        now = datetime.now()
+        if expiration > now:
+            return authentication, False
+        if now - expiration <= timedelta(seconds=max_stale):
+            return authentication, True
+        return None, False
+
+    @staticmethod
+    def _aborted(e: Exception, description: str) -> tuple[Authentication, EventsList, datetime, Exception]:
         return (
-            authentication,
-            events,
-            ISOExpirationTimestamp(expiration.isoformat()),
-            error,
+            Authentication.empty(),
+            EventsList(ProcedureAbortedEvent(reason='unknown', description=f'{description}: {e}')),
+            default_expiration_date(),
+            e,
         )
 
-    def should_refresh(self, user_name: UserName) -> bool:
-        """
-        Assess the expiration status of an user.
-
-        - Raises an UnauthenticatedUserException if no authentication object has been provided yet for this user
-        """
-        return self.authentication_store.is_expired(user_name)
+    def _skip_authentication(
+        self,
+        user: User,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        return self._complete_authentication(
+            user,
+            (Authentication.empty(), EventsList(ProcedureSkippedEvent(user_name=user.name)), None, None),
+        )
 
-    def refresh(
+    def _complete_authentication(
         self,
-        user_name: UserName,
+        user: User,
+        result: tuple[Authentication, EventsList, datetime | None, Exception | None],
     ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
-        """
-        Refresh the authentication object of a given user.
+        procedure_authentication, procedure_events, expiration, error = result
 
-        - If no refresh procedure is provided in the user configuration, the procedure provided in the user
-        authentication configuration will be used instead.
-        - If the user has not been authenticated yet, the authentication procedure will be run instead.
-        - Raises a `MissingUserException` if the provided user_name is not declared in the multiauth configuration
-        - Raises a `MissingProcedureException` if the provided user relies on a procedure that
-        is not declared in the multiauth configuration.
-        - Raises a `MissingProcedureException` if the provided user relies on a refresh procedure that
-        is not declared in the multiauth configuration.
-        """
-        error: Exception | None = None
+        authentication = Authentication.from_credentials(user.credentials or Credentials())
+        if user.procedure is not None:
+            authentication = Authentication.merge(authentication, procedure_authentication)
+        expiration = expiration or default_expiration_date()
 
-        user = self._get_user(user_name)
-        try:
-            base_authentication, _ = self.authentication_store.get(user_name)
-        except AuthenticationStoreException:
-            # @todo(maxence@escape.tech): Record this event when it occurs
-            # If the user is not authenticated already, authenticate it instead
-            return self.authenticate(user_name)
+        events = EventsList()
+        events.extend(procedure_events)
 
-        refresh_procedure = self._get_refresh_procedure(user_name)
+        self._store(user.name, authentication, expiration)
 
-        if refresh_procedure is None:
-            # If the user has no procedure at all (no base and no refresh procedures), return the base authentication
-            return (
-                base_authentication,
-                EventsList(ProcedureSkippedEvent(user_name=user_name)),
-                ISOExpirationTimestamp(default_expiration_date().isoformat()),
-                None,
-            )
+        return (
+            authentication,
+            events,
+            ISOExpirationTimestamp(expiration.isoformat()),
+            error,
+        )
 
-        refreshed_authentication = Authentication.empty()
-        # Run the procedure
-        try:
-            refreshed_authentication, events, expiration, error = refresh_procedure.run(user.refresh_user)
-        except Exception as e:
-            events.append(ProcedureAbortedEvent(reason='unknown', description=f'Unexpected: {e}'))
-            error = e
-            expiration = default_expiration_date()
+    @staticmethod
+    def _skip_refresh(
+        user_name: UserName,
+        base_authentication: Authentication,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        # If the user has no procedure at all (no base and no refresh procedures), return the base authentication
+        return (
+            base_authentication,
+            EventsList(ProcedureSkippedEvent(user_name=user_name)),
+            ISOExpirationTimestamp(default_expiration_date().isoformat()),
+            None,
+        )
+
+    def _complete_refresh(
+        self,
+        user: User,
+        base_authentication: Authentication,
+        result: tuple[Authentication, EventsList, datetime, Exception | None],
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        refreshed_authentication, events, expiration, error = result
 
         # If the user has a refresh procedure, and the `keep` flag is enabled, merge the current authentication object
         if user.refresh is not None and user.refresh.keep:
             refreshed_authentication = Authentication.merge(base_authentication, refreshed_authentication)
 
         # Store the new authentication object
-        self.authentication_store.store(user_name, refreshed_authentication, expiration)
+        self._store(user.name, refreshed_authentication, expiration)
 
         return refreshed_authentication, events, ISOExpirationTimestamp(expiration.isoformat()), error
 
-    def test(self, user_name: UserName, request: HTTPRequest) -> tuple[bool, EventsList, Exception | None]:
-        """
-        Test the authentication object of a given user.
-        Will send a request to the provided URL using the credentials of the given user.
-        """
+    def _prepare_validation(self, user_name: UserName, request: HTTPRequest) -> tuple[EventsList, Exception | None]:
         events = EventsList()
         events.append(ValidationAttemptedEvent(user_name=user_name))
 
@@ -235,24 +269,27 @@ class Multiauth:
             authentication, expiration = self.authentication_store.get(user_name)
         except UnauthenticatedUserException as e:
             events.append(ValidationFailedEvent(reason='unauthenticated', description=str(e), user_name=user_name))
-            return False, events, e
+            return events, e
         except Exception as e:
             events.append(ValidationFailedEvent(reason='unknown', description=str(e), user_name=user_name))
-            return False, events, e
+            return events, e
 
-        for header in authentication.headers:
-            request.headers.append(header)
-        for cookie in authentication.cookies:
-            request.cookies.append(cookie)
-        for query_parameters in authentication.query_parameters:
-            request.query_parameters.append(query_parameters)
+        request.headers.extend(authentication.headers)
+        request.cookies.extend(authentication.cookies)
+        request.query_parameters.extend(authentication.query_parameters)
 
         if self.configuration.proxy:
             request.proxy = self.configuration.proxy
 
         events.append(HTTPRequestEvent(request=request))
-        response = send_request(request)
+        return events, None
 
+    @staticmethod
+    def _validate_response(
+        user_name: UserName,
+        response: HTTPResponse | HTTPFailureEvent,
+        events: EventsList,
+    ) -> tuple[bool, EventsList, Exception | None]:
         if isinstance(response, HTTPFailureEvent):
             events.append(ValidationFailedEvent(reason='http_error', description=str(response), user_name=user_name))
             return False, events, Exception('Received HTTP error during validation')
@@ -286,17 +323,17 @@ class Multiauth:
             return {}
         return {}
 
-    @staticmethod
-    def from_json_string(raw_configuration_string: str) -> 'Multiauth':
+    @classmethod
+    def from_json_string(cls, raw_configuration_string: str) -> Self:
         """
         Static function responsible for parsing a raw stringified JSON configuration
         input into a validated Multiauth object.
         """
         configuration = MultiauthConfiguration.model_validate_json(raw_configuration_string)
-        return Multiauth(configuration)
+        return cls(configuration)
 
-    @staticmethod
-    def from_file(path: str) -> 'Multiauth':
+    @classmethod
+    def from_file(cls, path: str) -> Self:
         """
         Static function responsible for parsing a raw stringified JSON configuration
         input, read from a file into a validated Multiauth object.
@@ -306,17 +343,454 @@ class Multiauth:
                 raw_configuration = f.read()
         except Exception as e:
             raise MultiAuthException(f'Could not read configuration file at path `{path}`.') from e
-        return Multiauth.from_json_string(raw_configuration)
+        return cls.from_json_string(raw_configuration)
 
-    @staticmethod
-    def from_any(raw_configuration: Any) -> 'Multiauth':
+    @classmethod
+    def from_any(cls, raw_configuration: Any) -> Self:
         """
         Static function responsible for parsing a JSON-serializable object representing a multiauth configuration,
         into a validated Multiauth object.
         """
         try:
             if raw_configuration is None:
-                return Multiauth(MultiauthConfiguration.public())
-            return Multiauth.from_json_string(json.dumps(raw_configuration))
+                return cls(MultiauthConfiguration.public())
+            return cls.from_json_string(json.dumps(raw_configuration))
         except Exception as e:
             raise MultiAuthException('Could not serialized configuration object') from e
+
+
+class Multiauth(BaseMultiauth, ForkAware):
+    """
+    Multiauth is the main entrypoint of the library. It is responsible for running the authentication procedures.
+    Every authentication procedures should be run through a Multiauth instance.
+
+    Instances can be created before a pre-fork server forks its workers: children start with the authentications
+    stored by the parent, and reset the HTTP connections, locks and background threads inherited from it.
+    """
+
+    # Concurrent authentications and refreshes of the same user share a single procedure run
+    procedure_runs: SingleFlight[tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]]
+
+    __background_executor: ThreadPoolExecutor | None
+    __background_refreshes: dict[UserName, Future]
+    __background_lock: threading.Lock
+
+    def __init__(
+        self,
+        configuration: MultiauthConfiguration,
+        http_limits: httpx.Limits | None = None,
+        authentication_store: AuthenticationBackend | None = None,
+    ) -> None:
+        super().__init__(configuration, http_limits, authentication_store)
+        ForkAware.__init__(self)
+        self.procedure_runs = SingleFlight()
+
+        self.__background_executor = None
+        self.__background_refreshes = {}
+        self.__background_lock = threading.Lock()
+
+    def _after_fork(self) -> None:
+        # The workers of the background executor do not exist in the child
+        self.__background_executor = None
+        self.__background_refreshes = {}
+        self.__background_lock = threading.Lock()
+
+        # A scheduler that is not restarted in the child would accumulate refreshes that never run
+        if isinstance(self.refresh_scheduler, RefreshScheduler) and not self.refresh_scheduler.restart_after_fork:
+            self.refresh_scheduler = None
+
+    def authenticate_users(
+        self,
+        max_concurrency: int = 1,
+        max_per_host: int | None = None,
+    ) -> dict[UserName, tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]]:
+        """
+        Runs the authentication for all users in the configuration. Retrocompatibility purposes with MultiAuth v2.
+
+        - Users are authenticated one after another, unless `max_concurrency` is greater than 1: they are then
+        authenticated on a pool of `max_concurrency` threads.
+        - `max_per_host` caps the number of concurrent authentications whose procedure targets the same host.
+        """
+        if max_concurrency <= 1:
+            return {user_name: self.authenticate(user_name) for user_name in self.users.keys()}
+
+        hosts_limiter = KeyedSemaphore(max_per_host)
+
+        def authenticate(
+            user_name: UserName,
+        ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+            with hosts_limiter.acquire(self._get_user_hosts(user_name)):
+                return self.authenticate(user_name)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='multiauth') as executor:
+            futures = {user_name: executor.submit(authenticate, user_name) for user_name in self.users.keys()}
+
+        return {user_name: future.result() for user_name, future in futures.items()}
+
+    def authenticate(
+        self,
+        user_name: UserName,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        """
+        Runs the authentication procedure of the provided user.
+
+        - Raises a `MissingUserException` if the provided user_name is not declared in the multiauth configuration
+        - Raises a `MissingProcedureException` if the provided user relies on a procedure that
+        is not declared in the multiauth configuration.
+        - Concurrent authentications or refreshes of the same user are coalesced into a single procedure run.
+        """
+        return self.procedure_runs.do(user_name, lambda: self._authenticate(user_name))
+
+    def _authenticate(
+        self,
+        user_name: UserName,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        user = self._get_user(user_name)
+
+        if user.procedure is None:
+            return self._skip_authentication(user)
+
+        result: tuple[Authentication, EventsList, datetime, Exception | None]
+        try:
+            result = self._get_authentication_procedure(user_name).run(user)
+        except Exception as e:
+            result = self._aborted(e, 'Unknown error')
+
+        return self._complete_authentication(user, result)
+
+    def refresh(
+        self,
+        user_name: UserName,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        """
+        Refresh the authentication object of a given user.
+
+        - If no refresh procedure is provided in the user configuration, the procedure provided in the user
+        authentication configuration will be used instead.
+        - If the user has not been authenticated yet, the authentication procedure will be run instead.
+        - Raises a `MissingUserException` if the provided user_name is not declared in the multiauth configuration
+        - Raises a `MissingProcedureException` if the provided user relies on a procedure that
+        is not declared in the multiauth configuration.
+        - Raises a `MissingProcedureException` if the provided user relies on a refresh procedure that
+        is not declared in the multiauth configuration.
+        - Concurrent authentications or refreshes of the same user are coalesced into a single procedure run.
+        """
+        return self.procedure_runs.do(user_name, lambda: self._refresh(user_name))
+
+    def _refresh(
+        self,
+        user_name: UserName,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        user = self._get_user(user_name)
+        try:
+            base_authentication, _ = self.authentication_store.get(user_name)
+        except AuthenticationStoreException:
+            # @todo(maxence@escape.tech): Record this event when it occurs
+            # If the user is not authenticated already, authenticate it instead
+            return self._authenticate(user_name)
+
+        refresh_procedure = self._get_refresh_procedure(user_name)
+
+        if refresh_procedure is None:
+            return self._skip_refresh(user_name, base_authentication)
+
+        result: tuple[Authentication, EventsList, datetime, Exception | None]
+        try:
+            result = refresh_procedure.run(user.refresh_user)
+        except Exception as e:
+            result = self._aborted(e, 'Unexpected')
+
+        return self._complete_refresh(user, base_authentication, result)
+
+    def get_authentication(self, user_name: UserName, max_stale: float = DEFAULT_MAX_STALE_SECONDS) -> Authentication:
+        """
+        Return the current authentication object of the provided user, without waiting for a refresh when possible.
+
+        - A valid authentication is returned as is.
+        - An authentication expired for less than `max_stale` seconds is returned as is, and refreshed in the
+        background. Concurrent stale reads trigger a single refresh.
+        - Otherwise, the user is refreshed, or authenticated, before returning.
+        """
+        authentication, stale = self._lookup_authentication(user_name, max_stale)
+        if authentication is None:
+            return self.refresh(user_name)[0]
+
+        if stale:
+            self.__refresh_in_background(user_name)
+        return authentication
+
+    def __refresh_in_background(self, user_name: UserName) -> None:
+        with self.__background_lock:
+            pending = self.__background_refreshes.get(user_name)
+            if pending is not None and not pending.done():
+                return
+
+            if self.__background_executor is None:
+                self.__background_executor = ThreadPoolExecutor(thread_name_prefix='multiauth-refresh')
+            self.__background_refreshes[user_name] = self.__background_executor.submit(self.refresh, user_name)
+
+    def test(self, user_name: UserName, request: HTTPRequest) -> tuple[bool, EventsList, Exception | None]:
+        """
+        Test the authentication object of a given user.
+        Will send a request to the provided URL using the credentials of the given user.
+        """
+        events, error = self._prepare_validation(user_name, request)
+        if error is not None:
+            return False, events, error
+
+        response = send_request(request, self.client_pool)
+
+        return self._validate_response(user_name, response, events)
+
+    def start_refresh_scheduler(
+        self,
+        margin_seconds: float = DEFAULT_REFRESH_MARGIN_SECONDS,
+        jitter_seconds: float = DEFAULT_REFRESH_JITTER_SECONDS,
+        clock_skew_seconds: float = DEFAULT_CLOCK_SKEW_SECONDS,
+        retry_seconds: float = DEFAULT_RETRY_SECONDS,
+        in_forked_children: bool = True,
+    ) -> RefreshScheduler:
+        """
+        Refresh every authenticated user from a background thread, `margin_seconds` (plus a random jitter of up to
+        `jitter_seconds`, plus the tolerated `clock_skew_seconds`) before its authentication expires.
+
+        - Users authenticated later on are scheduled as soon as their authentication is stored.
+        - Failed refreshes are retried after `retry_seconds`.
+        - The scheduler is stopped by `close`.
+        - Unless `in_forked_children` is disabled, the scheduler is started again in the children of a fork, each
+        child keeping its own copy of the authentications fresh. It should be disabled when children share the
+        authentications of a single writer, e.g. through a `ReplicaAuthenticationStore`.
+        """
+        if isinstance(self.refresh_scheduler, RefreshScheduler):
+            return self.refresh_scheduler
+
+        scheduler = RefreshScheduler(
+            self.refresh,
+            restart_after_fork=in_forked_children,
+            margin_seconds=margin_seconds,
+            jitter_seconds=jitter_seconds,
+            clock_skew_seconds=clock_skew_seconds,
+            retry_seconds=retry_seconds,
+        )
+        self._schedule_stored_authentications(scheduler)
+        self.refresh_scheduler = scheduler
+        scheduler.start()
+        return scheduler
+
+    def close(self) -> None:
+        """
+        Wait for background refreshes, stop the refresh scheduler, and close the HTTP connections kept alive by this
+        instance, and the authentication store.
+        """
+        if isinstance(self.refresh_scheduler, RefreshScheduler):
+            self.refresh_scheduler.stop()
+        self.refresh_scheduler = None
+
+        with self.__background_lock:
+            executor, self.__background_executor = self.__background_executor, None
+            self.__background_refreshes = {}
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        self.client_pool.close()
+        self.authentication_store.close()
+
+    def __enter__(self) -> 'Multiauth':
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class AsyncMultiauth(BaseMultiauth):
+    """
+    Asyncio flavor of `Multiauth`: procedures are run from coroutines, so that many authentications can be
+    in flight on a single event loop. HTTP operations are natively async, other operations run in worker threads.
+    """
+
+    # Concurrent authentications and refreshes of the same user share a single procedure run
+    procedure_runs: AsyncSingleFlight[tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]]
+
+    __background_refreshes: dict[UserName, asyncio.Task]
+
+    def __init__(
+        self,
+        configuration: MultiauthConfiguration,
+        http_limits: httpx.Limits | None = None,
+        authentication_store: AuthenticationBackend | None = None,
+    ) -> None:
+        super().__init__(configuration, http_limits, authentication_store)
+        self.procedure_runs = AsyncSingleFlight()
+        self.__background_refreshes = {}
+
+    async def authenticate_users(
+        self,
+        max_concurrency: int = 1,
+        max_per_host: int | None = None,
+    ) -> dict[UserName, tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]]:
+        """
+        Runs the authentication for all users in the configuration.
+
+        - Up to `max_concurrency` users are authenticated concurrently, each one in its own task.
+        - `max_per_host` caps the number of concurrent authentications whose procedure targets the same host.
+        """
+        hosts_limiter = AsyncKeyedSemaphore(max_per_host)
+        concurrency_limiter = asyncio.Semaphore(max(max_concurrency, 1))
+
+        async def authenticate(
+            user_name: UserName,
+        ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+            # Host slots are acquired first, so that a task waiting for a busy host does not hold a global slot
+            async with hosts_limiter.acquire(self._get_user_hosts(user_name)), concurrency_limiter:
+                return await self.authenticate(user_name)
+
+        user_names = list(self.users.keys())
+        results = await asyncio.gather(*(authenticate(user_name) for user_name in user_names))
+
+        return dict(zip(user_names, results, strict=True))
+
+    async def authenticate(
+        self,
+        user_name: UserName,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        """
+        Runs the authentication procedure of the provided user. See `Multiauth.authenticate`.
+        """
+        return await self.procedure_runs.do(user_name, lambda: self._authenticate(user_name))
+
+    async def _authenticate(
+        self,
+        user_name: UserName,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        user = self._get_user(user_name)
+
+        if user.procedure is None:
+            return self._skip_authentication(user)
+
+        result: tuple[Authentication, EventsList, datetime, Exception | None]
+        try:
+            result = await self._get_authentication_procedure(user_name).run_async(user)
+        except Exception as e:
+            result = self._aborted(e, 'Unknown error')
+
+        return self._complete_authentication(user, result)
+
+    async def refresh(
+        self,
+        user_name: UserName,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        """
+        Refresh the authentication object of a given user. See `Multiauth.refresh`.
+        """
+        return await self.procedure_runs.do(user_name, lambda: self._refresh(user_name))
+
+    async def _refresh(
+        self,
+        user_name: UserName,
+    ) -> tuple[Authentication, EventsList, ISOExpirationTimestamp, Exception | None]:
+        user = self._get_user(user_name)
+        try:
+            base_authentication, _ = self.authentication_store.get(user_name)
+        except AuthenticationStoreException:
+            # If the user is not authenticated already, authenticate it instead
+            return await self._authenticate(user_name)
+
+        refresh_procedure = self._get_refresh_procedure(user_name)
+
+        if refresh_procedure is None:
+            return self._skip_refresh(user_name, base_authentication)
+
+        result: tuple[Authentication, EventsList, datetime, Exception | None]
+        try:
+            result = await refresh_procedure.run_async(user.refresh_user)
+        except Exception as e:
+            result = self._aborted(e, 'Unexpected')
+
+        return self._complete_refresh(user, base_authentication, result)
+
+    async def get_authentication(
+        self,
+        user_name: UserName,
+        max_stale: float = DEFAULT_MAX_STALE_SECONDS,
+    ) -> Authentication:
+        """
+        Return the current authentication object of the provided user, without waiting for a refresh when possible.
+        Stale authentications are refreshed in a background task. See `Multiauth.get_authentication`.
+        """
+        authentication, stale = self._lookup_authentication(user_name, max_stale)
+        if authentication is None:
+            return (await self.refresh(user_name))[0]
+
+        if stale and user_name not in self.__background_refreshes:
+            task = asyncio.get_running_loop().create_task(self.refresh(user_name))
+            self.__background_refreshes[user_name] = task
+            task.add_done_callback(lambda _: self.__background_refreshes.pop(user_name, None))
+        return authentication
+
+    async def test(self, user_name: UserName, request: HTTPRequest) -> tuple[bool, EventsList, Exception | None]:
+        """
+        Test the authentication object of a given user. See `Multiauth.test`.
+        """
+        events, error = self._prepare_validation(user_name, request)
+        if error is not None:
+            return False, events, error
+
+        response = await send_request_async(request, self.client_pool)
+
+        return self._validate_response(user_name, response, events)
+
+    def start_refresh_scheduler(
+        self,
+        margin_seconds: float = DEFAULT_REFRESH_MARGIN_SECONDS,
+        jitter_seconds: float = DEFAULT_REFRESH_JITTER_SECONDS,
+        clock_skew_seconds: float = DEFAULT_CLOCK_SKEW_SECONDS,
+        retry_seconds: float = DEFAULT_RETRY_SECONDS,
+    ) -> AsyncRefreshScheduler:
+        """
+        Refresh every authenticated user from a background task of the running event loop, before its authentication
+        expires. See `Multiauth.start_refresh_scheduler`. The scheduler is stopped by `aclose`.
+        """
+        if isinstance(self.refresh_scheduler, AsyncRefreshScheduler):
+            return self.refresh_scheduler
+
+        scheduler = AsyncRefreshScheduler(
+            self.refresh,
+            margin_seconds=margin_seconds,
+            jitter_seconds=jitter_seconds,
+            clock_skew_seconds=clock_skew_seconds,
+            retry_seconds=retry_seconds,
+        )
+        self._schedule_stored_authentications(scheduler)
+        self.refresh_scheduler = scheduler
+        scheduler.start()
+        return scheduler
+
+    async def aclose(self) -> None:
+        """
+        Wait for background refreshes, stop the refresh scheduler, and close the HTTP connections kept alive by this
+        instance, and the authentication store.
+        """
+        if self.__background_refreshes:
+            await asyncio.gather(*self.__background_refreshes.values(), return_exceptions=True)
+
+        if isinstance(self.refresh_scheduler, AsyncRefreshScheduler):
+            await self.refresh_scheduler.stop()
+        self.refresh_scheduler = None
+        await self.client_pool.aclose()
+        self.authentication_store.close()
+
+    async def __aenter__(self) -> 'AsyncMultiauth':
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.aclose()
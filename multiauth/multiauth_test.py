@@ -0,0 +1,275 @@
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+
+from multiauth.conftest import LocalHandler, LocalServer, run_in_child
+from multiauth.lib.entities import ProcedureName, UserName
+from multiauth.lib.http_core.entities import HTTPRequest
+from multiauth.lib.scheduler import RefreshScheduler
+from multiauth.multiauth import AsyncMultiauth, Multiauth
+
+
+class IdentityProviderHandler(LocalHandler):
+    def respond(self, body: bytes) -> tuple[int, Any, dict[str, str]]:
+        if self.command == 'GET':
+            authorized = (self.headers.get('Authorization') or '').startswith('Bearer token-')
+            return (200 if authorized else 401), {}, {}
+
+        username = json.loads(body or '{}').get('username')
+        payload: dict[str, Any] = {'access_token': f'token-{username}'}
+        if 'expires_in' in self.server.state:
+            payload['expires_in'] = self.server.state['expires_in']
+        headers = {'Set-Cookie': self.server.state['cookie']} if 'cookie' in self.server.state else {}
+        return 200, payload, headers
+
+
+@pytest.fixture()
+def identity_provider(serve: Callable[[type[LocalHandler]], LocalServer]) -> LocalServer:
+    return serve(IdentityProviderHandler)
+
+
+def configuration(server: LocalServer, users: int = 2) -> dict:
+    return {
+        'procedures': [
+            {
+                'name': 'login',
+                'operations': [
+                    {
+                        'tech': 'http',
+                        'parameters': {
+                            'url': f'{server.url}/login',
+                            'method': 'POST',
+                            'body': {'username': '{{ username }}'},
+                        },
+                        'extractions': [{'location': 'body', 'key': 'access_token', 'name': 'token'}],
+                    },
+                ],
+                'injections': [{'location': 'header', 'key': 'Authorization', 'prefix': 'Bearer', 'variable': 'token'}],
+            },
+        ],
+        'users': [
+            {'name': f'user-{i}', 'procedure': 'login', 'variables': [{'name': 'username', 'value': f'user-{i}'}]}
+            for i in range(users)
+        ],
+    }
+
+
+def validation_request(server: LocalServer) -> HTTPRequest:
+    return HTTPRequest.from_url(f'{server.url}/me')
+
+
+def test_authenticate(identity_provider: LocalServer) -> None:
+    with Multiauth.from_any(configuration(identity_provider)) as multiauth:
+        authentication, _, _, error = multiauth.authenticate(UserName('user-1'))
+
+        assert error is None
+        assert authentication.all_headers['Authorization'] == 'Bearer token-user-1'
+
+        valid, _, error = multiauth.test(UserName('user-1'), validation_request(identity_provider))
+        assert valid
+        assert error is None
+
+
+@pytest.mark.asyncio()
+async def test_authenticate_async(identity_provider: LocalServer) -> None:
+    async with AsyncMultiauth.from_any(configuration(identity_provider)) as multiauth:
+        authentication, _, _, error = await multiauth.authenticate(UserName('user-1'))
+
+        assert error is None
+        assert authentication.all_headers['Authorization'] == 'Bearer token-user-1'
+
+        authentication, _, _, error = await multiauth.refresh(UserName('user-1'))
+        assert error is None
+        assert authentication.all_headers['Authorization'] == 'Bearer token-user-1'
+
+        valid, _, error = await multiauth.test(UserName('user-1'), validation_request(identity_provider))
+        assert valid
+        assert error is None
+
+
+def test_expiration_hints(identity_provider: LocalServer) -> None:
+    identity_provider.state['expires_in'] = 600
+    identity_provider.state['cookie'] = 'sid=session; Max-Age=120; HttpOnly'
+    raw_configuration = configuration(identity_provider, users=1)
+    raw_configuration['procedures'][0]['operations'][0]['extractions'].append(
+        {'location': 'cookie', 'key': 'sid', 'name': 'session'},
+    )
+
+    with Multiauth.from_any(raw_configuration) as multiauth:
+        _, events, expiration, error = multiauth.authenticate(UserName('user-0'))
+
+    assert error is None
+    assert [event.source for event in events if event.type == 'expiration_hint'] == [  # type: ignore[attr-defined]
+        'body field `expires_in`',
+        'cookie `sid`',
+    ]
+    # The session expires with the first expiring hint
+    lifetime = datetime.fromisoformat(expiration) - datetime.now()
+    assert timedelta(seconds=100) < lifetime <= timedelta(seconds=120)
+
+
+def test_authenticate_users_concurrently(identity_provider: LocalServer) -> None:
+    identity_provider.latency = 0.05
+    with Multiauth.from_any(configuration(identity_provider, users=20)) as multiauth:
+        results = multiauth.authenticate_users(max_concurrency=8, max_per_host=4)
+
+        assert list(results.keys()) == list(multiauth.users.keys())
+        for user_name, (authentication, events, _, error) in results.items():
+            assert error is None
+            assert authentication.all_headers['Authorization'] == f'Bearer token-{user_name}'
+            assert events[0].user_name == user_name  # type: ignore[attr-defined]
+
+    # Every user logs in against the same host
+    assert 1 < identity_provider.peak_in_flight <= 4
+
+
+@pytest.mark.asyncio()
+async def test_authenticate_users_concurrently_async(identity_provider: LocalServer) -> None:
+    identity_provider.latency = 0.05
+    async with AsyncMultiauth.from_any(configuration(identity_provider, users=20)) as multiauth:
+        results = await multiauth.authenticate_users(max_concurrency=8, max_per_host=4)
+
+        assert list(results.keys()) == list(multiauth.users.keys())
+        for user_name, (authentication, _, _, error) in results.items():
+            assert error is None
+            assert authentication.all_headers['Authorization'] == f'Bearer token-{user_name}'
+
+    assert 1 < identity_provider.peak_in_flight <= 4
+
+
+def test_concurrent_refreshes_are_coalesced(identity_provider: LocalServer) -> None:
+    identity_provider.latency = 0.2
+    callers = 10
+    barrier = threading.Barrier(callers)
+
+    with Multiauth.from_any(configuration(identity_provider)) as multiauth:
+
+        def refresh() -> None:
+            barrier.wait()
+            multiauth.refresh(UserName('user-1'))
+
+        threads = [threading.Thread(target=refresh) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert identity_provider.requests['POST'] == 1
+        assert multiauth.procedure_runs.calls == callers
+        assert multiauth.procedure_runs.coalesced == callers - 1
+
+
+@pytest.mark.asyncio()
+async def test_concurrent_refreshes_are_coalesced_async(identity_provider: LocalServer) -> None:
+    identity_provider.latency = 0.2
+
+    async with AsyncMultiauth.from_any(configuration(identity_provider)) as multiauth:
+        results = await asyncio.gather(*(multiauth.refresh(UserName('user-1')) for _ in range(10)))
+
+        assert identity_provider.requests['POST'] == 1
+        assert multiauth.procedure_runs.coalesced == 9
+        assert all(result is results[0] for result in results)
+
+
+def test_refresh_scheduler(identity_provider: LocalServer) -> None:
+    raw_configuration = configuration(identity_provider, users=1)
+    raw_configuration['users'][0]['refresh'] = {'session_seconds': 1}
+
+    with Multiauth.from_any(raw_configuration) as multiauth:
+        multiauth.authenticate(UserName('user-0'))
+        multiauth.start_refresh_scheduler()
+
+        # Sessions are refreshed halfway through their lifetime, before they expire
+        deadline = time.monotonic() + 5
+        while identity_provider.requests['POST'] < 3 and time.monotonic() < deadline:
+            assert not multiauth.should_refresh(UserName('user-0'))
+            time.sleep(0.05)
+
+        assert identity_provider.requests['POST'] >= 3
+
+    assert multiauth.refresh_scheduler is None
+
+
+def test_get_authentication_serves_stale_authentications(identity_provider: LocalServer) -> None:
+    with Multiauth.from_any(configuration(identity_provider)) as multiauth:
+        user_name = UserName('user-1')
+
+        # Nothing usable: the user is authenticated before returning
+        assert multiauth.get_authentication(user_name).all_headers['Authorization'] == 'Bearer token-user-1'
+        assert identity_provider.requests['POST'] == 1
+
+        # Stale: served immediately while the user is refreshed in the background
+        multiauth.authentication_store.expire(user_name)
+        for _ in range(5):
+            assert multiauth.get_authentication(user_name).all_headers['Authorization'] == 'Bearer token-user-1'
+
+    assert identity_provider.requests['POST'] == 2
+    assert not multiauth.should_refresh(user_name)
+
+
+@pytest.mark.asyncio()
+async def test_get_authentication_serves_stale_authentications_async(identity_provider: LocalServer) -> None:
+    async with AsyncMultiauth.from_any(configuration(identity_provider)) as multiauth:
+        user_name = UserName('user-1')
+        await multiauth.get_authentication(user_name)
+
+        multiauth.authentication_store.expire(user_name)
+        for _ in range(5):
+            assert (await multiauth.get_authentication(user_name)).all_headers['Authorization'] == 'Bearer token-user-1'
+
+    assert identity_provider.requests['POST'] == 2
+    assert not multiauth.should_refresh(user_name)
+
+
+def test_procedure_runs_do_not_share_state(identity_provider: LocalServer) -> None:
+    with Multiauth.from_any(configuration(identity_provider)) as multiauth:
+        _, first_events, _, _ = multiauth.authenticate(UserName('user-0'))
+        _, second_events, _, _ = multiauth.authenticate(UserName('user-1'))
+
+        assert len(first_events) == len(second_events)
+        assert {event.user_name for event in second_events if hasattr(event, 'user_name')} == {'user-1'}
+        assert not hasattr(multiauth.procedures[ProcedureName('login')], 'variables')
+
+
+def test_unresolved_variables_are_reported(identity_provider: LocalServer) -> None:
+    raw_configuration = configuration(identity_provider, users=1)
+    raw_configuration['procedures'][0]['operations'][0]['parameters']['body']['client'] = '{{ client_id }}'
+
+    with Multiauth.from_any(raw_configuration) as multiauth:
+        _, events, _, error = multiauth.authenticate(UserName('user-0'))
+
+    assert error is None
+    unresolved = [event for event in events if event.type == 'unresolved_variables']
+    assert [(event.step, event.names) for event in unresolved] == [(0, ['client_id'])]  # type: ignore[attr-defined]
+
+
+def test_forked_children_keep_authentications(identity_provider: LocalServer) -> None:
+    raw_configuration = configuration(identity_provider, users=1)
+    raw_configuration['users'][0]['refresh'] = {'session_seconds': 3600}
+
+    for in_forked_children in (True, False):
+        with Multiauth.from_any(raw_configuration) as multiauth:
+            multiauth.authenticate(UserName('user-0'))
+            multiauth.start_refresh_scheduler(in_forked_children=in_forked_children)
+
+            def check(in_forked_children: bool = in_forked_children) -> bool:
+                authentication = multiauth.get_authentication(UserName('user-0'))
+                valid, _, _ = multiauth.test(UserName('user-0'), HTTPRequest.from_url(f'{identity_provider.url}/me'))
+                scheduler = multiauth.refresh_scheduler
+                running = isinstance(scheduler, RefreshScheduler) and scheduler.running
+                return (
+                    authentication.all_headers['Authorization'] == 'Bearer token-user-0'
+                    and valid
+                    and running == in_forked_children
+                )
+
+            assert run_in_child(check)
+
+    # Children used the authentication of the parent
+    assert identity_provider.requests['POST'] == 2
@@ -0,0 +1,125 @@
+"""
+poetry run python scripts/benchmark_entities.py
+
+Time and memory allocated per response converted by `send_request`, and per authentication merge, with the slotted
+HTTP entities and lazily decoded bodies, against the eagerly decoded pydantic models they replace.
+"""
+import datetime
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import httpx
+from pydantic import Field
+
+from multiauth.helpers.base_model import StrictBaseModel
+from multiauth.lib.http_core.entities import HTTPHeader, JSONSerializable
+from multiauth.lib.http_core.mergers import merge_headers
+from multiauth.lib.http_core.request import _to_http_response
+
+ITERATIONS = 5000
+URL = 'https://example.com/login'
+
+
+class ModelHeader(StrictBaseModel):
+    name: str
+    values: list[str]
+
+
+class ModelCookie(StrictBaseModel):
+    name: str
+    values: list[str]
+
+
+class ModelResponse(StrictBaseModel):
+    url: str
+    status_code: int
+    reason: str
+    elapsed: datetime.timedelta
+    headers: list[ModelHeader] = Field(default_factory=list)
+    cookies: list[ModelCookie] = Field(default_factory=list)
+    data_text: str | None = Field(default=None)
+    data_json: JSONSerializable | None = Field(default=None)
+    cookie_expirations: dict[str, datetime.datetime] = Field(default_factory=dict)
+
+
+def build_response() -> httpx.Response:
+    headers = [(f'x-header-{i}', f'value-{i}, other-{i}') for i in range(20)]
+    headers += [('set-cookie', f'cookie-{i}=value-{i}; Path=/; Max-Age=3600') for i in range(5)]
+    response = httpx.Response(
+        200,
+        headers=headers,
+        content=json.dumps({'access_token': 'token', 'expires_in': 3600}).encode(),
+        request=httpx.Request('POST', URL),
+    )
+    response.elapsed = datetime.timedelta(milliseconds=120)
+    return response
+
+
+def model_response(url: str, response: httpx.Response) -> ModelResponse:
+    return ModelResponse(
+        url=url,
+        status_code=response.status_code,
+        reason=response.reason_phrase,
+        headers=[ModelHeader(name=name, values=value.split(',')) for name, value in response.headers.items()],
+        cookies=[ModelCookie(name=name, values=value.split(',')) for name, value in response.cookies.items()],
+        data_text=response.text,
+        data_json=response.json(),
+        elapsed=response.elapsed,
+        cookie_expirations={
+            cookie.name: datetime.datetime.fromtimestamp(cookie.expires)
+            for cookie in response.cookies.jar
+            if cookie.expires
+        },
+    )
+
+
+def model_merge(headers_a: list[ModelHeader], headers_b: list[ModelHeader]) -> list[ModelHeader]:
+    headers = {h.name: h.values for h in headers_a}
+    headers.update({h.name: h.values for h in headers_b})
+    return [ModelHeader(name=name, values=values) for name, values in headers.items()]
+
+
+def measure(fn: Callable[[], object]) -> tuple[float, int]:
+    """
+    Return the time, in microseconds, and the peak memory allocated, in bytes, per call.
+    """
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    elapsed = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    # Results are dropped at each iteration: the peak is the memory held by a single call
+    tracemalloc.start()
+    for _ in range(ITERATIONS):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def report(name: str, baseline: Callable[[], object], candidate: Callable[[], object]) -> None:
+    baseline_time, baseline_memory = measure(baseline)
+    candidate_time, candidate_memory = measure(candidate)
+    print(  # noqa: T201
+        f'{name:<10} models: {baseline_time:8.1f}us {baseline_memory:>8}B   '
+        f'slotted: {candidate_time:8.1f}us {candidate_memory:>8}B   '
+        f'saved: {baseline_time - candidate_time:8.1f}us {baseline_memory - candidate_memory:>8}B',
+    )
+
+
+if __name__ == '__main__':
+    response = build_response()
+    headers_a = [HTTPHeader(name=f'x-header-{i}', values=[f'value-{i}']) for i in range(10)]
+    headers_b = [HTTPHeader(name=f'x-header-{i}', values=[f'other-{i}']) for i in range(5, 15)]
+    model_headers_a = [ModelHeader(name=h.name, values=h.values) for h in headers_a]
+    model_headers_b = [ModelHeader(name=h.name, values=h.values) for h in headers_b]
+
+    report(
+        'response',
+        lambda: model_response(URL, response),
+        lambda: _to_http_response(URL, response, response.content, False),
+    )
+    report('merge', lambda: model_merge(model_headers_a, model_headers_b), lambda: merge_headers(headers_a, headers_b))